@@ -3,17 +3,91 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import logging
-from typing import List, Optional, Dict, Any
+import threading
+from collections import Counter
+from typing import Callable, List, Optional, Dict, Any, Iterable, Iterator, Tuple
 
-from models.recommendation.rule_based import RuleBasedRecommender
+from models.recommendation.rule_based import RISK_TOLERANCES, RuleBasedRecommender
+from models.recommendation.screener import VOLUME_BARS, Screener
 from services.stock_data import StockDataService
+from services.history_views import HistoryViews, PriceView
+from services.lookback import Lookbacks
+from services.price_store import DEFAULT_MAX_ENTRIES, PriceStore
+from services.snapshots import SnapshotRefresher
+from services.stock_details import StockDetailsClient
+from services.metrics import METRICS
+from services.universe_index import UniverseIndex
 
 logger = logging.getLogger(__name__)
 
+# Request counts are kept for up to this many times (twice that before trimming) the snapshot profiles
+PROFILE_COUNT_FACTOR = 4
+
+METRICS.describe("ml_snapshot_lookups_total", "Recommendation requests by whether a snapshot entry served them")
+
+ProfileKey = Tuple[str, str, Tuple[str, ...]]
+
+class ProfileSnapshot:
+    """
+    Precomputed recommendation inputs of one (risk_tolerance, time_horizon, sectors) profile.
+    
+    Holds the full ranking of the profile's universe (without exclusions)
+    and its budget-independent base allocation, plus the histories and
+    sectors they came from, so a request only has to drop its exclusions
+    and size the allocation for its budget. Shared by concurrent requests;
+    never modified.
+    """
+    
+    __slots__ = ("ranking", "positions", "base", "historical_data", "sectors", "interval")
+    
+    def __init__(self, ranking, positions, base, historical_data, sectors, interval):
+        self.ranking = ranking
+        self.positions = positions
+        self.base = base
+        self.historical_data = historical_data
+        self.sectors = sectors
+        self.interval = interval
+
 class RecommendationService:
-    def __init__(self, recommender):
+    def __init__(
+        self,
+        recommender,
+        price_store: Optional[PriceStore] = None,
+        universe_index: Optional[UniverseIndex] = None,
+        lookbacks: Optional[Lookbacks] = None
+    ):
         self.recommender = recommender
+        # Symbol metadata and sector/risk bitmaps, built once per process
+        self.universe_index = universe_index or UniverseIndex.from_env()
         self.stock_data_service = StockDataService()
+        # Bulk, short-TTL cached stock details shared by every request
+        self.stock_details = StockDetailsClient(self.stock_data_service)
+        # Per-horizon history (see ML_LOOKBACK_* env vars), sliced and resampled once per data version
+        self.lookbacks = lookbacks or Lookbacks.from_env()
+        # Shared by every request handled by this process, with room for every series of the
+        # universe (including the daily volumes screens read), so a full sync does not evict itself
+        series = self.lookbacks.base_series() | {(self.lookbacks.base_days or 30, "1d")}
+        self.price_store = price_store or PriceStore(
+            self._fetch_bars, max_entries=max(DEFAULT_MAX_ENTRIES, len(series) * len(self.universe_index))
+        )
+        # Release memoized scores as soon as a symbol's bars change
+        score_cache = getattr(recommender, "score_cache", None)
+        if score_cache is not None:
+            self.price_store.add_listener(score_cache.invalidate)
+        self.history_views = HistoryViews(self.price_store, self.lookbacks)
+        # Per-horizon feature columns of the whole universe for /screen, recomputed per changed symbol
+        self.screener = Screener(
+            recommender, self.universe_index,
+            {time_horizon: self.lookbacks.interval(time_horizon) for time_horizon in self.lookbacks.horizons}
+        )
+        self.price_store.add_listener(self.screener.invalidate)
+        # Background re-sync of the screen features (see start_screen_sync)
+        self._screen_sync: Optional[Tuple[threading.Event, threading.Thread]] = None
+        # Precomputed common profiles (see use_snapshots), and how often each profile is asked for
+        self.snapshots: Optional[SnapshotRefresher] = None
+        self.max_snapshot_profiles = 32
+        self._profile_counts = Counter()
+        self._profile_lock = threading.Lock()
         logger.info("RecommendationService initialized")
         
     def generate_recommendations(
@@ -38,25 +112,301 @@ class RecommendationService:
             List of stock recommendations
         """
         logger.info(f"Generating recommendations for {risk_tolerance} profile with ${budget} budget")
+        # Lots are sized at the prices the response shows
+        stock_details = {}
+        quotes = self._quotes(stock_details)
+        
+        # Common profiles are answered from the current snapshot
+        key = self._profile_key(risk_tolerance, time_horizon, sector_preferences)
+        if self.snapshots is not None:
+            if self._snapshot_eligible(key):
+                self._count_profile(key)
+            snapshot = self.snapshots.fresh()
+            entry = snapshot.get(key) if snapshot is not None else None
+            METRICS.inc("ml_snapshot_lookups_total", result="hit" if entry is not None else "miss")
+            if entry is not None:
+                with METRICS.stage("recommend", "snapshot"):
+                    recommendations = self._from_snapshot(entry, risk_tolerance, budget, exclusions, quotes)
+                return self._format_recommendations(recommendations, stock_details)
         
         # Get default stock universe based on user profile
-        stock_universe = self._get_stock_universe(risk_tolerance, sector_preferences, exclusions)
+        with METRICS.stage("recommend", "stock_universe"):
+            stock_universe = self._get_stock_universe(risk_tolerance, sector_preferences, exclusions)
         
         # Fetch historical data for analysis
-        historical_data = self._fetch_historical_data(stock_universe)
+        with METRICS.stage("recommend", "fetch_historical_data"):
+            historical_data = self._fetch_historical_data(stock_universe, time_horizon)
         
         # Generate recommendations using the rule-based recommender
+        # (times its own score_cache / indicators / scoring stages)
         recommendations = self.recommender.generate_recommendations(
             historical_data=historical_data,
             risk_tolerance=risk_tolerance,
             time_horizon=time_horizon,
-            budget=budget
+            budget=budget,
+            interval=self.lookbacks.interval(time_horizon),
+            sectors=self.universe_index.sectors_of(stock_universe),
+            quotes=quotes
         )
         
+        return self._format_recommendations(recommendations, stock_details)
+        
+    def generate_batch_recommendations(self, profiles: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Generate recommendations for many user profiles, sharing work between them.
+        
+        Profiles are grouped by (risk_tolerance, time_horizon, universe). Each
+        group's market data is fetched and ranked once, and every profile in
+        the group only runs the allocation step on that shared ranking (and
+        histories). Stock
+        details are looked up once per symbol for the whole batch, with one
+        bulk lookup for the symbols each profile adds.
+        
+        Args:
+            profiles: Iterable of dicts with the generate_recommendations arguments
+            
+        Yields:
+            {"index", "recommendations", "cash_allocation"} per profile in input
+            order (see cash_allocation), or {"index", "error"} if that profile
+            could not be processed
+        """
+        rankings = {}
+        stock_details = {}
+        quotes = self._quotes(stock_details)
+        
+        for index, profile in enumerate(profiles):
+            try:
+                risk_tolerance = profile["risk_tolerance"]
+                time_horizon = profile["time_horizon"]
+                with METRICS.stage("recommend", "stock_universe"):
+                    universe = tuple(self._get_stock_universe(
+                        risk_tolerance,
+                        profile.get("sector_preferences"),
+                        profile.get("exclusions")
+                    ))
+                
+                group = (risk_tolerance, time_horizon, universe)
+                ranked = rankings.get(group)
+                if ranked is None:
+                    logger.info(f"Ranking {len(universe)} stocks for batch group {risk_tolerance}/{time_horizon}")
+                    with METRICS.stage("recommend", "fetch_historical_data"):
+                        historical_data = self._fetch_historical_data(list(universe), time_horizon)
+                    ranking = self.recommender.rank_stocks(
+                        historical_data, risk_tolerance, time_horizon, self.lookbacks.interval(time_horizon)
+                    )
+                    ranked = rankings[group] = (ranking, historical_data, self.universe_index.sectors_of(universe))
+                    
+                ranking, historical_data, sectors = ranked
+                recommendations = self.recommender.allocate(
+                    ranking, risk_tolerance, profile["budget"],
+                    historical_data, sectors, self.lookbacks.interval(time_horizon), quotes
+                )
+                formatted = self._format_recommendations(recommendations, stock_details)
+                yield {
+                    "index": index,
+                    "recommendations": formatted,
+                    "cash_allocation": self.cash_allocation(formatted, profile["budget"])
+                }
+            except Exception as e:
+                logger.error(f"Error generating batch recommendations for profile {index}: {str(e)}")
+                yield {"index": index, "error": str(e)}
+                
+    def use_snapshots(self, refresher: SnapshotRefresher, max_profiles: int = 32):
+        """
+        Serve common profiles from snapshots that refresher builds with build_snapshot.
+        
+        Snapshots cover every risk tolerance and time horizon without sector
+        preferences, plus the most requested sector preferences, up to
+        max_profiles profiles. They are rebuilt whenever a symbol's bars change.
+        """
+        self.max_snapshot_profiles = max_profiles
+        self.snapshots = refresher
+        self.price_store.add_listener(refresher.notify)
+        
+    def build_snapshot(self) -> Dict[ProfileKey, ProfileSnapshot]:
+        """Rank and allocate every snapshot profile from the latest market data (a SnapshotRefresher build)."""
+        entries = {}
+        for key in self._snapshot_profiles():
+            risk_tolerance, time_horizon, sectors = key
+            universe = self._get_stock_universe(risk_tolerance, list(sectors) or None, None)
+            historical_data = self._fetch_historical_data(universe, time_horizon)
+            interval = self.lookbacks.interval(time_horizon)
+            sector_map = self.universe_index.sectors_of(universe)
+            ranking = self.recommender.rank_stocks(historical_data, risk_tolerance, time_horizon, interval)
+            entries[key] = ProfileSnapshot(
+                ranking=tuple(ranking),
+                positions=self.universe_index.positions(stock["symbol"] for stock in ranking),
+                base=self.recommender.base_allocation(ranking, risk_tolerance, historical_data, sector_map, interval),
+                historical_data=historical_data,
+                sectors=sector_map,
+                interval=interval
+            )
+        return entries
+        
+    def _snapshot_profiles(self) -> List[ProfileKey]:
+        """Every risk/horizon without sector preferences, then the most requested other profiles."""
+        profiles = [
+            (risk_tolerance, time_horizon, ())
+            for risk_tolerance in RISK_TOLERANCES
+            for time_horizon in self.lookbacks.horizons
+        ]
+        with self._profile_lock:
+            requested = self._profile_counts.most_common()
+        for key, _ in requested:
+            if len(profiles) >= self.max_snapshot_profiles:
+                break
+            if key not in profiles and self._snapshot_eligible(key):
+                profiles.append(key)
+        return profiles
+        
+    def _snapshot_eligible(self, key: ProfileKey) -> bool:
+        """Whether a profile can be snapshotted: a known risk tolerance and horizon, and sectors of the universe."""
+        risk_tolerance, time_horizon, sectors = key
+        if risk_tolerance not in RISK_TOLERANCES or time_horizon not in self.lookbacks.horizons:
+            return False
+        known = {name.lower() for name in self.universe_index.sector_names}
+        return all(sector in known for sector in sectors)
+        
+    def _count_profile(self, key: ProfileKey):
+        """Count a request for a profile, keeping the counts of only the most requested profiles."""
+        with self._profile_lock:
+            self._profile_counts[key] += 1
+            # Sector combinations are client-chosen, so trim the long tail instead of growing without bound
+            if len(self._profile_counts) > 2 * PROFILE_COUNT_FACTOR * self.max_snapshot_profiles:
+                self._profile_counts = Counter(
+                    dict(self._profile_counts.most_common(PROFILE_COUNT_FACTOR * self.max_snapshot_profiles))
+                )
+        
+    def _from_snapshot(
+        self,
+        entry: ProfileSnapshot,
+        risk_tolerance: str,
+        budget: float,
+        exclusions: Optional[List[str]],
+        quotes: Optional[Callable[[List[str]], Dict[str, float]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Recommendations for one request from a snapshot entry.
+        
+        Without exclusions that remove a ranked stock, the base allocation
+        only needs sizing for the budget; otherwise the ranking minus the
+        excluded stocks is allocated again, which is what the full pipeline
+        would have computed for the narrower universe.
+        """
+        if exclusions:
+            kept = self.universe_index.mask(exclusions=exclusions)[entry.positions]
+            if not kept.all():
+                ranking = [stock for stock, keep in zip(entry.ranking, kept) if keep]
+                return self.recommender.allocate(
+                    ranking, risk_tolerance, budget, entry.historical_data, entry.sectors, entry.interval, quotes
+                )
+        return self.recommender.scale_allocation(entry.base, budget, quotes)
+        
+    @staticmethod
+    def _profile_key(
+        risk_tolerance: str,
+        time_horizon: str,
+        sector_preferences: Optional[List[str]]
+    ) -> ProfileKey:
+        return (risk_tolerance, time_horizon, tuple(sorted({sector.lower() for sector in sector_preferences or ()})))
+        
+    def screen(self, risk_tolerance: str, time_horizon: str, **filters) -> Dict[str, Any]:
+        """
+        Rank the whole universe for a profile (see Screener.screen for the filters and paging).
+        
+        Symbols whose bars changed since the last screen are recomputed first;
+        everything else is answered from the precomputed feature columns.
+        """
+        logger.info(f"Screening universe for {risk_tolerance} profile, {time_horizon} horizon")
+        with METRICS.stage("screen", "refresh_features"):
+            self.screener.features_for(time_horizon).refresh(
+                lambda symbol: self._fetch_screen_history(symbol, time_horizon)
+            )
+        screen = self.screener.screen(risk_tolerance, time_horizon, **filters)
+        
+        # Format for the API response
+        for result in screen["results"]:
+            result["confidence_score"] = result.pop("confidence")
+        if screen["as_of"] is not None:
+            screen["as_of"] = datetime.fromtimestamp(screen["as_of"])
+        return screen
+        
+    def sync_screen_features(self, time_horizon: Optional[str] = None) -> int:
+        """
+        Bring the screen features of one (or every) horizon up to date with the data provider.
+        
+        Every symbol's history is read through the price store, which reloads
+        expired bars and so invalidates the symbols whose bars changed; only
+        those are then recomputed.
+        
+        Returns:
+            Number of symbols recomputed
+        """
+        horizons = [time_horizon] if time_horizon else list(self.lookbacks.horizons)
+        refreshed = 0
+        for horizon in horizons:
+            for symbol in self.universe_index.symbols.tolist():
+                try:
+                    self.history_views.get(symbol, horizon)
+                except Exception as e:
+                    logger.warning(f"Could not refresh history of {symbol}: {str(e)}")
+            refreshed += self.screener.features_for(horizon).refresh(
+                lambda symbol: self._fetch_screen_history(symbol, horizon)
+            )
+        return refreshed
+        
+    def start_screen_sync(self, interval_seconds: float):
+        """
+        Run sync_screen_features for every horizon every interval_seconds on a background thread.
+        
+        Features are only recomputed when the price store reloads a symbol's
+        bars, which it does on access; without this, symbols that no request
+        reads would keep the features of their first fetch.
+        """
+        if self._screen_sync is not None:
+            return
+        stop = threading.Event()
+        
+        def run():
+            while not stop.wait(interval_seconds):
+                try:
+                    with METRICS.stage("screen", "sync"):
+                        refreshed = self.sync_screen_features()
+                    logger.info(f"Screen feature sync recomputed {refreshed} symbols")
+                except Exception as e:
+                    logger.error(f"Screen feature sync failed: {str(e)}")
+        
+        thread = threading.Thread(target=run, name="screen-sync", daemon=True)
+        self._screen_sync = (stop, thread)
+        thread.start()
+        
+    def stop_screen_sync(self, timeout: Optional[float] = None):
+        if self._screen_sync is not None:
+            stop, thread = self._screen_sync
+            stop.set()
+            thread.join(timeout)
+            self._screen_sync = None
+        
+    def _fetch_screen_history(self, symbol: str, time_horizon: str) -> Dict[str, np.ndarray]:
+        """The horizon's closes plus recent daily volumes (views only carry closes)."""
+        view = self.history_views.get(symbol, time_horizon)
+        daily = self.price_store.get(symbol, self.lookbacks.base_days or 30)
+        return {"close": view["close"], "volume": daily["volume"].to_numpy()[-VOLUME_BARS:]}
+        
+    def _format_recommendations(
+        self,
+        recommendations: List[Dict[str, Any]],
+        stock_details: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> List[Dict[str, Any]]:
+        """Format recommender output for the API response, optionally reusing cached stock details."""
+        if stock_details is None:
+            stock_details = {}
+        self._lookup_details([rec["symbol"] for rec in recommendations], stock_details)
+            
         # Format recommendations for API response
         formatted_recommendations = []
         for rec in recommendations:
-            stock_data = self.stock_data_service.get_stock_details(rec["symbol"])
+            stock_data = stock_details[rec["symbol"]]
             
             formatted_recommendations.append({
                 "symbol": rec["symbol"],
@@ -65,92 +415,133 @@ class RecommendationService:
                 "price": stock_data["current_price"],
                 "target_price": rec.get("target_price"),
                 "rationale": rec["rationale"],
-                "suggested_allocation": rec["allocation"]
+                "suggested_allocation": rec["allocation"],
+                "shares": rec.get("shares")
             })
             
         return formatted_recommendations
         
+    @staticmethod
+    def cash_allocation(recommendations: List[Dict[str, Any]], budget: float) -> Optional[float]:
+        """
+        Percentage of the budget left uninvested by lot-sized recommendations.
+        
+        Returns:
+            100 minus what shares x price invests, in percent of budget, or
+            None if the recommendations are not sized in shares
+        """
+        if not recommendations or recommendations[0].get("shares") is None or budget <= 0:
+            return None
+        invested = sum(rec["shares"] * rec["price"] for rec in recommendations)
+        return round((budget - invested) / budget * 100, 2)
+        
+    def _quotes(self, stock_details: Dict[str, Dict[str, Any]]) -> Callable[[List[str]], Dict[str, float]]:
+        """A quotes lookup for the recommender that keeps the details it fetches in stock_details, for the response."""
+        def quotes(symbols: List[str]) -> Dict[str, float]:
+            self._lookup_details(symbols, stock_details)
+            return {symbol: stock_details[symbol]["current_price"] for symbol in symbols}
+        return quotes
+        
+    def _lookup_details(self, symbols: List[str], stock_details: Dict[str, Dict[str, Any]]):
+        """Add the details of symbols not in stock_details yet, in one bulk lookup."""
+        missing = [symbol for symbol in symbols if symbol not in stock_details]
+        if missing:
+            with METRICS.stage("recommend", "stock_details"):
+                stock_details.update(self.stock_details.get_stock_details_many(missing))
+        
     def _get_stock_universe(
         self, 
         risk_tolerance: str, 
         sector_preferences: Optional[List[str]],
         exclusions: Optional[List[str]]
     ) -> List[str]:
-        """Get appropriate stock universe based on user profile."""
-        # Default stock universes based on risk tolerance
-        stock_universes = {
-            "conservative": ["AAPL", "MSFT", "JNJ", "PG", "KO", "PEP", "VZ", "T", "PFE", "MRK"],
-            "moderate": ["AAPL", "MSFT", "GOOGL", "AMZN", "FB", "V", "MA", "PYPL", "DIS", "NFLX"],
-            "aggressive": ["TSLA", "NVDA", "AMD", "PLTR", "SQ", "SHOP", "ROKU", "CRWD", "NET", "DKNG"]
-        }
-        
-        # Start with default universe based on risk profile
-        universe = stock_universes.get(risk_tolerance, stock_universes["moderate"])
+        """
+        Get appropriate stock universe based on user profile.
         
-        # Apply sector preferences if provided
-        if sector_preferences:
-            # In a real implementation, this would filter stocks by sector
-            # For this example, we'll just keep the first 5 stocks
-            universe = universe[:5]
-            
-        # Apply exclusions if provided
-        if exclusions:
-            universe = [stock for stock in universe if stock not in exclusions]
-            
-        return universe
+        The risk level's bitmap is intersected with the preferred sectors'
+        bitmaps, and excluded symbols and sectors are masked out.
+        """
+        return self.universe_index.select(risk_tolerance, sector_preferences, exclusions)
         
-    def _fetch_historical_data(self, symbols: List[str]) -> pd.DataFrame:
-        """Fetch 30-day historical data for the given symbols."""
+    def _fetch_historical_data(self, symbols: List[str], time_horizon: str = "medium") -> Dict[str, PriceView]:
+        """Fetch the horizon's lookback of historical data for the given symbols from the shared history views."""
+        return {symbol: self.history_views.get(symbol, time_horizon) for symbol in symbols}
+
+    def _fetch_bars(self, symbol: str, start_date: datetime, end_date: datetime, interval: str = "1d") -> pd.DataFrame:
+        """Fetch daily (or intraday, e.g. "15min") bars for a symbol between start_date and end_date (inclusive)."""
         # In a real implementation, this would call an external data provider
         # For this example, we'll generate synthetic data
-        
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=30)
-        
-        historical_data = {}
-        
-        for symbol in symbols:
-            # Generate synthetic price data
+
+        # Generate synthetic price data
+        if interval == "1d":
             dates = pd.date_range(start=start_date, end=end_date)
-            base_price = np.random.randint(50, 500)
-            
-            # Create price series with some randomness and trend
-            prices = np.linspace(base_price, base_price * (1 + np.random.uniform(-0.2, 0.3)), len(dates))
-            prices = prices * (1 + np.random.normal(0, 0.01, len(dates)))
-            
-            # Create volume data
-            volumes = np.random.randint(1000000, 10000000, len(dates))
-            
-            # Create DataFrame
-            df = pd.DataFrame({
-                'date': dates,
-                'open': prices * 0.99,
-                'high': prices * 1.02,
-                'low': prices * 0.98,
-                'close': prices,
-                'volume': volumes
-            })
-            
-            historical_data[symbol] = df
-            
-        return historical_data
+        else:
+            # Intraday bars only during weekday 09:30-16:00 sessions
+            dates = pd.date_range(start=pd.Timestamp(start_date).ceil(interval), end=end_date, freq=interval)
+            dates = dates[dates.dayofweek < 5]
+            dates = dates[dates.indexer_between_time("09:30", "16:00", include_end=False)]
+        base_price = np.random.randint(50, 500)
+
+        # Create price series with some randomness and trend
+        prices = np.linspace(base_price, base_price * (1 + np.random.uniform(-0.2, 0.3)), len(dates))
+        prices = prices * (1 + np.random.normal(0, 0.01, len(dates)))
+
+        # Create volume data
+        volumes = np.random.randint(1000000, 10000000, len(dates))
+
+        # Create DataFrame
+        return pd.DataFrame({
+            'date': dates,
+            'open': prices * 0.99,
+            'high': prices * 1.02,
+            'low': prices * 0.98,
+            'close': prices,
+            'volume': volumes
+        })
 
 
 # api/sentiment.py
+import asyncio
 import logging
-from typing import List, Optional, Dict, Any
+import time
+from typing import AsyncIterator, Callable, List, Optional, Dict, Any, Tuple
 import pandas as pd
 from datetime import datetime, timedelta
 
 from models.sentiment.transformer_model import TransformerSentimentAnalyzer
 from services.news_service import NewsService
+from services.batcher import MicroBatcher
+from services.executor import BoundedExecutor
+from services.metrics import METRICS
+from services.sentiment_cache import SentimentCache
 
 logger = logging.getLogger(__name__)
 
 class SentimentAnalysisService:
-    def __init__(self, sentiment_analyzer):
+    def __init__(
+        self,
+        sentiment_analyzer,
+        news_service: Optional[NewsService] = None,
+        max_concurrency: int = 10,
+        symbol_timeout: float = 5.0,
+        executor: Optional[BoundedExecutor] = None,
+        result_cache: Optional[SentimentCache] = None,
+        batcher: Optional[MicroBatcher] = None,
+        analyze_batch: Optional[Callable[[List[str]], List[Dict[str, Any]]]] = None
+    ):
         self.sentiment_analyzer = sentiment_analyzer
-        self.news_service = NewsService()
+        # The analyzer call sent to the executor (e.g. analyze_batch_in_worker for process pools)
+        self.analyze_batch = analyze_batch or sentiment_analyzer.analyze_batch
+        self.news_service = news_service or NewsService()
+        # Bounds for the concurrent per-symbol fan-out
+        self.max_concurrency = max_concurrency
+        self.symbol_timeout = symbol_timeout
+        # Where the concurrent path runs analyzer calls (inline on the event loop if None)
+        self.executor = executor
+        # Content-hash keyed analyzer results shared across requests (no caching if None)
+        self.result_cache = result_cache
+        # Shares analyzer batches between concurrent requests on the async paths (per-request batches if None)
+        self.batcher = batcher
         logger.info("SentimentAnalysisService initialized")
         
     def analyze_sentiment(
@@ -177,34 +568,314 @@ class SentimentAnalysisService:
         results = []
         
         # If text is provided directly, analyze it
+        documents = 0
+        fetch_seconds = 0.0
+        analyze_seconds = 0.0
+        
         if text:
-            sentiment = self.sentiment_analyzer.analyze(text)
-            results.append({
-                "text": text[:100] + "..." if len(text) > 100 else text,  # Truncate for display
-                "sentiment_score": sentiment["score"],
-                "sentiment_label": sentiment["label"],
-                "key_terms": sentiment["key_terms"],
-                "confidence": sentiment["confidence"]
-            })
+            start = time.perf_counter()
+            sentiments, analyzed = self._analyze_texts(
+                [text], lambda texts: [self.sentiment_analyzer.analyze(item) for item in texts]
+            )
+            analyze_seconds += time.perf_counter() - start
+            documents += analyzed
+            results.append(self._format_text(text, sentiments[0]))
             
         # If symbols are provided, fetch and analyze news for each symbol
         if symbols:
             for symbol in symbols:
+                start = time.perf_counter()
                 news_items = self.news_service.get_news(
                     symbol=symbol,
                     sources=sources,
                     days=date_range
                 )
-                
-                for news in news_items[:5]:  # Limit to 5 news items per symbol
-                    sentiment = self.sentiment_analyzer.analyze(news["content"])
-                    results.append({
-                        "symbol": symbol,
-                        "text": news["title"],
-                        "sentiment_score": sentiment["score"],
-                        "sentiment_label": sentiment["label"],
-                        "key_terms": sentiment["key_terms"],
-                        "confidence": sentiment["confidence"]
-                    })
-        
-        return results
\ No newline at end of file
+                fetched_at = time.perf_counter()
+                news_items = news_items[:5]  # Limit to 5 news items per symbol
+                sentiments, analyzed = self._analyze_texts(
+                    [news["content"] for news in news_items], self.sentiment_analyzer.analyze_batch
+                )
+                fetch_seconds += fetched_at - start
+                analyze_seconds += time.perf_counter() - fetched_at
+                documents += analyzed
+                results.extend(self._format_news(symbol, news_items, sentiments))
+        
+        # Stages are summed over the symbol loop and recorded once per call
+        if symbols:
+            METRICS.record_stage("sentiment", "fetch_news", fetch_seconds)
+        if text or symbols:
+            METRICS.record_stage("sentiment", "analyze", analyze_seconds)
+        if documents:
+            METRICS.inc("ml_documents_analyzed_total", documents, pipeline="sentiment")
+        
+        return results
+        
+    async def analyze_sentiment_concurrent(
+        self,
+        text: Optional[str] = None,
+        symbols: Optional[List[str]] = None,
+        sources: Optional[List[str]] = None,
+        date_range: int = 7
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Analyze sentiment like analyze_sentiment, fetching news for all symbols concurrently.
+        
+        At most max_concurrency news fetches run at once and each symbol gets
+        symbol_timeout seconds. A symbol whose fetch fails is reported in
+        "errors" instead of failing the whole call. Results keep the order of
+        the symbols list. Articles already in the result cache are served from
+        it, duplicates are analyzed once, and the rest are analyzed in one
+        analyze_batch call, on self.executor when one is set (or in batches
+        shared with concurrent requests when a batcher is set).
+        
+        Returns:
+            Dictionary with "results" (sentiment analysis results) and
+            "errors" (one {"symbol", "error"} entry per failed symbol)
+            
+        Raises:
+            ExecutorSaturatedError: If the executor has no room for the analysis
+        """
+        logger.info(f"Analyzing sentiment concurrently for {symbols if symbols else 'provided text'}")
+        
+        errors = []
+        fetched = []
+        
+        if symbols:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            
+            async def fetch(symbol: str) -> List[Dict[str, Any]]:
+                async with semaphore:
+                    return await asyncio.wait_for(
+                        asyncio.to_thread(
+                            self.news_service.get_news,
+                            symbol=symbol,
+                            sources=sources,
+                            days=date_range
+                        ),
+                        timeout=self.symbol_timeout
+                    )
+            
+            # Wall time of the whole fan-out, not the sum of per-symbol fetches
+            with METRICS.stage("sentiment", "fetch_news"):
+                outcomes = await asyncio.gather(
+                    *(fetch(symbol) for symbol in symbols),
+                    return_exceptions=True
+                )
+            
+            for symbol, outcome in zip(symbols, outcomes):
+                if isinstance(outcome, asyncio.TimeoutError):
+                    logger.warning(f"News fetch for {symbol} timed out after {self.symbol_timeout}s")
+                    errors.append({"symbol": symbol, "error": f"Timed out after {self.symbol_timeout}s"})
+                elif isinstance(outcome, Exception):
+                    logger.warning(f"News fetch for {symbol} failed: {str(outcome)}")
+                    errors.append({"symbol": symbol, "error": str(outcome)})
+                else:
+                    fetched.append((symbol, outcome[:5]))  # Limit to 5 news items per symbol
+            if errors:
+                METRICS.inc("ml_symbol_errors_total", len(errors), pipeline="sentiment")
+        
+        # One analyzer call (and one executor job) for the whole request
+        texts = [text] if text else []
+        texts.extend(news["content"] for _, news_items in fetched for news in news_items)
+        if texts:
+            with METRICS.stage("sentiment", "analyze"):
+                sentiments = await self._analyze_texts_async(texts, "sentiment")
+        else:
+            sentiments = []
+        
+        results = []
+        position = 0
+        with METRICS.stage("sentiment", "format"):
+            if text:
+                results.append(self._format_text(text, sentiments[0]))
+                position = 1
+            for symbol, news_items in fetched:
+                results.extend(self._format_news(symbol, news_items, sentiments[position:position + len(news_items)]))
+                position += len(news_items)
+        
+        return {"results": results, "errors": errors}
+        
+    async def stream_sentiment(
+        self,
+        text: Optional[str] = None,
+        symbols: Optional[List[str]] = None,
+        sources: Optional[List[str]] = None,
+        date_range: int = 7
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Analyze sentiment like analyze_sentiment_concurrent, yielding records as soon as they are ready.
+        
+        Each symbol is fetched and analyzed on its own, so its results come
+        out in completion order instead of waiting for the slowest symbol.
+        At most max_concurrency symbols are in flight and finished symbols
+        wait in a queue of the same size, so memory stays constant however
+        many articles the request covers. Closing the iterator early cancels
+        the outstanding fetches.
+        
+        Yields:
+            {"type": "analysis", "analysis", "count", "overall_sentiment"} per result,
+                with the running count and mean score over every result so far;
+            {"type": "error", "symbol", "error"} per failed symbol (symbol is None for text);
+            {"type": "summary", "count", "overall_sentiment", "errors", "timestamp"} last
+        """
+        logger.info(f"Streaming sentiment for {symbols if symbols else 'provided text'}")
+        started = time.perf_counter()
+        count = 0
+        score_sum = 0.0
+        error_count = 0
+        
+        def analysis_record(result: Dict[str, Any]) -> Dict[str, Any]:
+            nonlocal count, score_sum
+            if count == 0:
+                METRICS.record_stage("sentiment_stream", "first_result", time.perf_counter() - started)
+            count += 1
+            score_sum += result["sentiment_score"]
+            return {"type": "analysis", "analysis": result, "count": count, "overall_sentiment": score_sum / count}
+        
+        symbols = symbols or []
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_concurrency)
+        pending = iter(symbols)
+        
+        async def worker():
+            # Workers share one iterator, so each symbol is handled exactly once
+            for symbol in pending:
+                try:
+                    start = time.perf_counter()
+                    news_items = await asyncio.wait_for(
+                        asyncio.to_thread(
+                            self.news_service.get_news,
+                            symbol=symbol,
+                            sources=sources,
+                            days=date_range
+                        ),
+                        timeout=self.symbol_timeout
+                    )
+                    METRICS.record_stage("sentiment_stream", "fetch_news", time.perf_counter() - start)
+                    news_items = news_items[:5]  # Limit to 5 news items per symbol
+                    if news_items:
+                        with METRICS.stage("sentiment_stream", "analyze"):
+                            sentiments = await self._analyze_texts_async(
+                                [news["content"] for news in news_items], "sentiment_stream"
+                            )
+                    else:
+                        sentiments = []
+                    await queue.put(("results", self._format_news(symbol, news_items, sentiments)))
+                except asyncio.TimeoutError:
+                    logger.warning(f"News fetch for {symbol} timed out after {self.symbol_timeout}s")
+                    await queue.put(("error", {"symbol": symbol, "error": f"Timed out after {self.symbol_timeout}s"}))
+                except Exception as e:
+                    logger.warning(f"Sentiment for {symbol} failed: {str(e)}")
+                    await queue.put(("error", {"symbol": symbol, "error": str(e)}))
+            await queue.put(("done", None))
+        
+        # Fetches start right away; provided text is analyzed while they run
+        workers = [asyncio.create_task(worker()) for _ in range(min(self.max_concurrency, len(symbols)))]
+        try:
+            if text:
+                try:
+                    sentiments = await self._analyze_texts_async([text], "sentiment_stream")
+                    yield analysis_record(self._format_text(text, sentiments[0]))
+                except Exception as e:
+                    logger.warning(f"Text analysis failed: {str(e)}")
+                    error_count += 1
+                    yield {"type": "error", "symbol": None, "error": str(e)}
+            
+            running = len(workers)
+            while running:
+                kind, payload = await queue.get()
+                if kind == "done":
+                    running -= 1
+                elif kind == "error":
+                    error_count += 1
+                    METRICS.inc("ml_symbol_errors_total", pipeline="sentiment_stream")
+                    yield {"type": "error", **payload}
+                else:
+                    for result in payload:
+                        yield analysis_record(result)
+        finally:
+            for task in workers:
+                task.cancel()
+        
+        yield {
+            "type": "summary",
+            "count": count,
+            "overall_sentiment": score_sum / count if count else 0.0,
+            "errors": error_count,
+            "timestamp": datetime.now()
+        }
+        
+    def _analyze_texts(self, texts: List[str], analyze) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Analyze texts through the result cache when one is configured.
+        
+        Returns:
+            Tuple of (one result per text, number of texts actually analyzed)
+        """
+        if self.result_cache is None:
+            return analyze(texts), len(texts)
+        lookup = self.result_cache.lookup(texts)
+        missing = lookup.missing_texts
+        return self.result_cache.fill(lookup, analyze(missing) if missing else []), len(missing)
+        
+    async def _analyze_texts_async(self, texts: List[str], pipeline: str) -> List[Dict[str, Any]]:
+        """Analyze texts through the result cache (if any), sending the misses through _analyze_batch_async."""
+        if self.result_cache is None:
+            sentiments = await self._analyze_batch_async(texts)
+            analyzed = len(texts)
+        else:
+            lookup = await self._run_cache(self.result_cache.lookup, texts)
+            missing = lookup.missing_texts
+            fresh = await self._analyze_batch_async(missing) if missing else []
+            sentiments = await self._run_cache(self.result_cache.fill, lookup, fresh)
+            analyzed = len(missing)
+        if analyzed:
+            METRICS.inc("ml_documents_analyzed_total", analyzed, pipeline=pipeline)
+        return sentiments
+        
+    async def _analyze_batch_async(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """Analyze texts in the batcher's shared batches, or as one analyze_batch job without a batcher."""
+        if self.batcher is not None:
+            return await self.batcher.submit(texts)
+        return await self._run_cpu(self.analyze_batch, texts)
+        
+    async def _run_cache(self, func, *args):
+        """Run a result cache call inline, or on a thread when it reads or writes its SQLite tier."""
+        if not self.result_cache.path:
+            return func(*args)
+        return await asyncio.to_thread(func, *args)
+        
+    async def _run_cpu(self, func, *args):
+        """Run an analyzer call on the executor, or inline without one."""
+        if self.executor is None:
+            return func(*args)
+        return await self.executor.run(func, *args)
+        
+    def _format_text(self, text: str, sentiment: Dict[str, Any]) -> Dict[str, Any]:
+        """Format the analysis of text provided directly in the request."""
+        return {
+            "symbol": None,
+            "text": text[:100] + "..." if len(text) > 100 else text,  # Truncate for display
+            "sentiment_score": sentiment["score"],
+            "sentiment_label": sentiment["label"],
+            "key_terms": sentiment["key_terms"],
+            "confidence": sentiment["confidence"]
+        }
+        
+    def _format_news(
+        self,
+        symbol: str,
+        news_items: List[Dict[str, Any]],
+        sentiments: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Format the analysis of the news items fetched for a symbol."""
+        return [
+            {
+                "symbol": symbol,
+                "text": news["title"],
+                "sentiment_score": sentiment["score"],
+                "sentiment_label": sentiment["label"],
+                "key_terms": sentiment["key_terms"],
+                "confidence": sentiment["confidence"]
+            }
+            for news, sentiment in zip(news_items, sentiments)
+        ]
@@ -1,18 +1,19 @@
 # app.py
-from fastapi import FastAPI, HTTPException, Depends
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
-import uvicorn
-import pandas as pd
-import numpy as np
 import logging
+import os
 from datetime import datetime, timedelta
 
-# Import service modules
-from api.recommend import RecommendationService
-from api.sentiment import SentimentAnalysisService
-from models.recommendation.rule_based import RuleBasedRecommender
-from models.sentiment.transformer_model import TransformerSentimentAnalyzer
+# Service modules (and pandas/NumPy behind them) are imported by the warmup steps below
+from services.executor import BoundedExecutor, ExecutorSaturatedError
+from services.metrics import METRICS, MetricsMiddleware
+from services import serialization
+from services.serialization import NotAcceptableError
+from services.warmup import Warmup
 
 # Configure logging
 logging.basicConfig(
@@ -28,14 +29,153 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# Initialize services
-recommendation_service = RecommendationService(RuleBasedRecommender())
-sentiment_service = SentimentAnalysisService(TransformerSentimentAnalyzer())
+# Request latency for /metrics; send `X-Trace-Stages: 1` to get a Server-Timing stage breakdown back
+app.add_middleware(MetricsMiddleware, registry=METRICS)
+
+# CPU-bound work runs here instead of on the event loop (see ML_EXECUTOR* env vars)
+cpu_executor = BoundedExecutor.from_env()
+METRICS.add_collector("executor", cpu_executor.stats)
+
+# Services are built by these steps, in the background after startup (ML_WARMUP=background),
+# on first use (lazy) or before the app is served (eager). /health answers right away;
+# /ready answers 200 once every step, including the model and cache warm-ups, has run.
+# Module attributes such as app.recommendation_service wait for their step.
+WARMUP_MODE = os.environ.get("ML_WARMUP", "background")
+# Service results are encoded as-is; ML_VALIDATE_RESPONSES=1 also validates them against the response models
+VALIDATE_RESPONSES = os.environ.get("ML_VALIDATE_RESPONSES", "0") == "1"
+warmup = Warmup(lazy=WARMUP_MODE == "lazy")
+
+@warmup.step("parallel_scorer")
+def _build_parallel_scorer():
+    # Optional process-pool scoring for very large universes (see ML_PARALLEL_* env vars)
+    from models.recommendation.parallel import ParallelScorer
+    return ParallelScorer.from_env()
+
+@warmup.step("recommendation_service")
+def _build_recommendation_service():
+    from api.recommend import RecommendationService
+    from models.recommendation.allocation import CovarianceAllocator
+    from models.recommendation.rule_based import RuleBasedRecommender
+    
+    service = RecommendationService(RuleBasedRecommender(
+        parallel_scorer=warmup.get("parallel_scorer"),
+        allocator=CovarianceAllocator.from_env()
+    ))
+    # Existing cache stats are exported as gauges when /metrics is scraped
+    METRICS.add_collector("price_store", service.price_store.stats)
+    METRICS.add_collector("history_views", service.history_views.stats)
+    METRICS.add_collector("score_cache", service.recommender.score_cache.stats)
+    METRICS.add_collector("stock_details", service.stock_details.stats)
+    return service
+
+@warmup.step("sentiment_analyzer")
+def _build_sentiment_analyzer():
+    # Local ONNX model if ML_SENTIMENT_MODEL_PATH is set, lexicon scorer otherwise (see ML_SENTIMENT_* env vars)
+    from models.sentiment.transformer_model import TransformerSentimentAnalyzer
+    
+    analyzer = TransformerSentimentAnalyzer.from_env()
+    if analyzer.backend is not None:
+        METRICS.add_collector("sentiment_model", analyzer.backend.stats)
+    return analyzer
+
+@warmup.step("sentiment_cache")
+def _build_sentiment_cache():
+    # Analyzer results keyed by text hash, namespaced per model (see ML_SENTIMENT_CACHE_* env vars)
+    from services.sentiment_cache import SentimentCache
+    
+    analyzer = warmup.get("sentiment_analyzer")
+    cache = SentimentCache.from_env(namespace=f"{type(analyzer).__name__}:{analyzer.model_id}")
+    METRICS.add_collector("sentiment_cache", cache.stats)
+    return cache
+
+@warmup.step("sentiment_service")
+def _build_sentiment_service():
+    from api.sentiment import SentimentAnalysisService
+    from models.sentiment.transformer_model import analyze_batch_in_worker
+    from services.batcher import MicroBatcher
+    
+    analyzer = warmup.get("sentiment_analyzer")
+    # The analyzer cannot be pickled, so process pool workers each build their own from ML_SENTIMENT_*
+    analyze_batch = analyze_batch_in_worker if cpu_executor.kind == "process" else analyzer.analyze_batch
+    # Documents from concurrent requests share analyzer batches (see ML_BATCHER* env vars)
+    batcher = MicroBatcher.from_env(analyze_batch, executor=cpu_executor)
+    if batcher is not None:
+        METRICS.add_collector("sentiment_batcher", batcher.stats)
+    return SentimentAnalysisService(
+        analyzer,
+        executor=cpu_executor,
+        result_cache=warmup.get("sentiment_cache"),
+        batcher=batcher,
+        analyze_batch=analyze_batch
+    )
+
+@warmup.step("sentiment_model_warm", required=False)
+def _warm_sentiment_model():
+    # The first inference pays for session/kernel initialization; pay it here instead
+    warmup.get("sentiment_analyzer").analyze_batch([
+        "Shares rallied after strong quarterly earnings beat guidance.",
+        "Analysts warn of a slowdown as revenue misses estimates and layoffs loom."
+    ])
+
+@warmup.step("price_store_warm", required=False)
+def _warm_price_store():
+    # Prefetch the universe's price history and build every horizon's views, so first
+    # recommendations hit the store (ML_WARMUP_PRICES=0 skips)
+    if os.environ.get("ML_WARMUP_PRICES", "1") == "0":
+        return
+    service = warmup.get("recommendation_service")
+    for time_horizon in service.lookbacks.horizons:
+        service._fetch_historical_data(service.universe_index.symbols.tolist(), time_horizon)
+
+@warmup.step("recommendation_snapshots", required=False)
+def _build_recommendation_snapshots():
+    # Common profiles ranked and allocated in the background after every market-data update and
+    # swapped in atomically, so /recommend only applies exclusions and budget (see ML_SNAPSHOT* env vars)
+    from services.snapshots import SnapshotRefresher
+    
+    service = warmup.get("recommendation_service")
+    refresher = SnapshotRefresher.from_env(service.build_snapshot, name="recommendations")
+    if refresher is None:
+        return None
+    service.use_snapshots(refresher, max_profiles=int(os.environ.get("ML_SNAPSHOT_MAX_PROFILES", "32")))
+    METRICS.add_collector("recommendation_snapshot", refresher.stats)
+    refresher.refresh()
+    refresher.start()
+    return refresher
+
+@warmup.step("screen_features_warm", required=False)
+def _warm_screen_features():
+    # Compute every symbol's screen features up front, so the first /screen only ranks
+    # (ML_WARMUP_SCREEN=0 skips; symbols are then computed by the first screen of each horizon)
+    if os.environ.get("ML_WARMUP_SCREEN", "1") == "0":
+        return
+    warmup.get("recommendation_service").sync_screen_features()
+
+@warmup.step("screen_features_sync", required=False)
+def _start_screen_features_sync():
+    # Re-read the whole universe's bars periodically, so screen features of symbols that no request
+    # touches follow the data provider too (ML_SCREEN_SYNC_SECONDS, 0 disables)
+    interval = float(os.environ.get("ML_SCREEN_SYNC_SECONDS", "300"))
+    if interval <= 0:
+        return None
+    service = warmup.get("recommendation_service")
+    service.start_screen_sync(interval)
+    return service
+
+def __getattr__(name: str) -> Any:
+    """Resolve service module attributes (e.g. app.sentiment_service) through warmup."""
+    if name in warmup:
+        return warmup.get(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+if WARMUP_MODE == "eager":
+    warmup.start()
+    warmup.wait()
 
 # Request/Response models
 class UserProfile(BaseModel):
     risk_tolerance: str  # "conservative", "moderate", "aggressive"
-    budget: float
+    budget: float = Field(gt=0)
     time_horizon: str  # "short", "medium", "long"
     sector_preferences: Optional[List[str]] = None
     exclusions: Optional[List[str]] = None
@@ -48,9 +188,50 @@ class StockRecommendation(BaseModel):
     target_price: Optional[float] = None
     rationale: str
     suggested_allocation: float  # percentage of budget
+    shares: Optional[int] = None  # whole shares to buy, when allocations are lot-sized
 
 class RecommendationResponse(BaseModel):
     recommendations: List[StockRecommendation]
+    cash_allocation: Optional[float] = None  # percentage of budget left uninvested, when allocations are lot-sized
+    timestamp: datetime
+
+class BatchRecommendationRequest(BaseModel):
+    profiles: List[UserProfile]
+
+class ScreenRequest(BaseModel):
+    risk_tolerance: str  # "conservative", "moderate", "aggressive"
+    time_horizon: str  # "short", "medium", "long"
+    sectors: Optional[List[str]] = None
+    exclusions: Optional[List[str]] = None
+    min_volume: Optional[float] = None  # average volume over the last 20 daily bars
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    min_rsi: Optional[float] = None
+    max_rsi: Optional[float] = None
+    macd: Optional[str] = None  # "bullish" (MACD above signal) or "bearish"
+    min_score: Optional[float] = None
+    limit: int = 20
+    offset: int = 0
+
+class ScreenResult(BaseModel):
+    symbol: str
+    sector: str
+    score: int
+    confidence_score: float
+    price: float
+    rationale: str
+    volume: Optional[float] = None
+    rsi: Optional[float] = None
+    macd: Optional[float] = None
+    macd_signal: Optional[float] = None
+    volatility: Optional[float] = None
+
+class ScreenResponse(BaseModel):
+    results: List[ScreenResult]
+    total: int  # matches across all pages
+    offset: int
+    limit: int
+    as_of: Optional[datetime] = None  # when the features were last updated
     timestamp: datetime
 
 class SentimentRequest(BaseModel):
@@ -67,10 +248,71 @@ class SentimentAnalysis(BaseModel):
     key_terms: List[str]
     confidence: float
 
+class SymbolError(BaseModel):
+    symbol: str
+    error: str
+
 class SentimentResponse(BaseModel):
     analysis: List[SentimentAnalysis]
     overall_sentiment: float
     timestamp: datetime
+    errors: List[SymbolError] = []  # symbols whose news could not be analyzed
+
+def _generate_recommendations(profile: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Executor job for /recommend; module-level so process pools can pickle it."""
+    return warmup.get("recommendation_service").generate_recommendations(**profile)
+
+def _screen(request: Dict[str, Any]) -> Dict[str, Any]:
+    """Executor job for /screen."""
+    return warmup.get("recommendation_service").screen(**request)
+
+def _negotiate(http_request: Request, table: Optional[str] = None) -> str:
+    """Response media type for the request's Accept header (JSON, MessagePack or, for tables, Arrow IPC)."""
+    try:
+        return serialization.negotiate(http_request.headers.get("accept"), table)
+    except NotAcceptableError as e:
+        raise HTTPException(status_code=406, detail=str(e))
+
+def _respond(payload: Dict[str, Any], media_type: str, table: str, model: type) -> Response:
+    """
+    Encode a response payload without building Pydantic models from it.
+    
+    The services already produce the response models' fields, so the rows
+    go straight to the encoder; the response_model declared on the route
+    still documents the JSON shape.
+    """
+    if VALIDATE_RESPONSES:
+        model(**payload)
+    with METRICS.stage("response", "serialize"):
+        content = serialization.encode(payload, media_type, table)
+    return Response(content=content, media_type=media_type, headers={"Vary": "Accept"})
+
+def _overloaded(e: ExecutorSaturatedError) -> HTTPException:
+    logger.warning(f"Rejecting request, executor saturated: {str(e)}")
+    return HTTPException(status_code=503, detail="Server busy, retry shortly", headers={"Retry-After": "1"})
+
+@app.on_event("startup")
+async def start_warmup():
+    if not warmup.lazy:
+        warmup.start()
+
+@app.on_event("shutdown")
+async def shutdown_executor():
+    # Only what was actually built needs shutting down
+    cpu_executor.shutdown()
+    snapshots = warmup.peek("recommendation_snapshots")
+    if snapshots is not None:
+        snapshots.stop(timeout=5)
+    recommendation_service = warmup.peek("recommendation_service")
+    if recommendation_service is not None:
+        recommendation_service.stock_details.shutdown()
+        recommendation_service.stop_screen_sync(timeout=5)
+    sentiment_cache = warmup.peek("sentiment_cache")
+    if sentiment_cache is not None:
+        sentiment_cache.close()
+    parallel_scorer = warmup.peek("parallel_scorer")
+    if parallel_scorer is not None:
+        parallel_scorer.shutdown()
 
 @app.get("/")
 async def root():
@@ -78,59 +320,225 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {
+    """Liveness: answers immediately, with stats for whichever services are already built."""
+    health = {
         "status": "healthy",
         "timestamp": datetime.now(),
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "ready": warmup.is_ready(),
+        "executor": cpu_executor.stats()
     }
+    recommendation_service = warmup.peek("recommendation_service")
+    if recommendation_service is not None:
+        health["price_store"] = recommendation_service.price_store.stats()
+        health["history_views"] = recommendation_service.history_views.stats()
+        health["score_cache"] = recommendation_service.recommender.score_cache.stats()
+        health["stock_details"] = recommendation_service.stock_details.stats()
+        if recommendation_service.snapshots is not None:
+            health["recommendation_snapshot"] = recommendation_service.snapshots.stats()
+        health["screen_features"] = {
+            time_horizon: features.stats()
+            for time_horizon, features in recommendation_service.screener.features.items()
+        }
+    sentiment_cache = warmup.peek("sentiment_cache")
+    if sentiment_cache is not None:
+        health["sentiment_cache"] = sentiment_cache.stats()
+    return health
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: 200 once services are built and models/caches are warm, 503 (with per-step state) until then."""
+    status = warmup.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=jsonable_encoder(status))
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text-format metrics: per-stage and request latency histograms, counters, cache stats."""
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
 
 @app.post("/recommend", response_model=RecommendationResponse)
-async def get_recommendations(profile: UserProfile):
+async def get_recommendations(profile: UserProfile, http_request: Request):
+    media_type = _negotiate(http_request, "recommendations")
     try:
         logger.info(f"Processing recommendation request for {profile.risk_tolerance} profile")
-        recommendations = recommendation_service.generate_recommendations(
-            risk_tolerance=profile.risk_tolerance,
-            budget=profile.budget,
-            time_horizon=profile.time_horizon,
-            sector_preferences=profile.sector_preferences,
-            exclusions=profile.exclusions
-        )
+        recommendation_service = await warmup.aget("recommendation_service")
+        recommendations = await cpu_executor.run(_generate_recommendations, {
+            "risk_tolerance": profile.risk_tolerance,
+            "budget": profile.budget,
+            "time_horizon": profile.time_horizon,
+            "sector_preferences": profile.sector_preferences,
+            "exclusions": profile.exclusions
+        })
         
-        return RecommendationResponse(
-            recommendations=recommendations,
-            timestamp=datetime.now()
+        return _respond(
+            {
+                "recommendations": recommendations,
+                "cash_allocation": recommendation_service.cash_allocation(recommendations, profile.budget),
+                "timestamp": datetime.now()
+            },
+            media_type, "recommendations", RecommendationResponse
         )
+    except ExecutorSaturatedError as e:
+        raise _overloaded(e)
     except Exception as e:
         logger.error(f"Error generating recommendations: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to generate recommendations: {str(e)}")
 
+@app.post("/recommend/batch")
+async def get_batch_recommendations(request: BatchRecommendationRequest):
+    """
+    Generate recommendations for many profiles, streamed back as NDJSON.
+    
+    Each line is {"index", "recommendations", "cash_allocation"} (or {"index", "error"}) for the
+    profile at that position in the request, so responses are never held in
+    memory as a whole.
+    """
+    logger.info(f"Processing batch recommendation request for {len(request.profiles)} profiles")
+    
+    profiles = (
+        {
+            "risk_tolerance": profile.risk_tolerance,
+            "budget": profile.budget,
+            "time_horizon": profile.time_horizon,
+            "sector_preferences": profile.sector_preferences,
+            "exclusions": profile.exclusions
+        }
+        for profile in request.profiles
+    )
+    
+    recommendation_service = await warmup.aget("recommendation_service")
+    # The whole stream holds one executor slot, so a large batch is refused with 503 like any other job
+    try:
+        slot = cpu_executor.reserve()
+    except ExecutorSaturatedError as e:
+        raise _overloaded(e)
+    records = recommendation_service.generate_batch_recommendations(profiles)
+    
+    async def stream_lines():
+        try:
+            while True:
+                record = await slot.run(next, records, None)
+                if record is None:
+                    break
+                yield serialization.dumps_json(record) + b"\n"
+        finally:
+            slot.release()
+    
+    return StreamingResponse(stream_lines(), media_type=serialization.NDJSON)
+
+@app.post("/screen", response_model=ScreenResponse)
+async def screen_universe(request: ScreenRequest, http_request: Request):
+    """
+    Rank the whole universe for a risk/horizon profile and return one page of the best matches.
+    
+    Answered from per-symbol feature columns that are recomputed only for
+    symbols whose bars changed; sector, volume, price, RSI and MACD filters
+    and the score floor apply before ranking, and "total" counts every match.
+    """
+    media_type = _negotiate(http_request, "results")
+    try:
+        logger.info(f"Processing screen request for {request.risk_tolerance} profile")
+        await warmup.aget("recommendation_service")
+        screen = await cpu_executor.run(_screen, {
+            "risk_tolerance": request.risk_tolerance,
+            "time_horizon": request.time_horizon,
+            "sectors": request.sectors,
+            "exclusions": request.exclusions,
+            "min_volume": request.min_volume,
+            "min_price": request.min_price,
+            "max_price": request.max_price,
+            "min_rsi": request.min_rsi,
+            "max_rsi": request.max_rsi,
+            "macd": request.macd,
+            "min_score": request.min_score,
+            "limit": request.limit,
+            "offset": request.offset
+        })
+        
+        screen["timestamp"] = datetime.now()
+        return _respond(screen, media_type, "results", ScreenResponse)
+    except ExecutorSaturatedError as e:
+        raise _overloaded(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error screening universe: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to screen universe: {str(e)}")
+
 @app.post("/news-sentiment", response_model=SentimentResponse)
-async def analyze_sentiment(request: SentimentRequest):
+async def analyze_sentiment(request: SentimentRequest, http_request: Request):
+    media_type = _negotiate(http_request, "analysis")
     try:
         logger.info(f"Processing sentiment analysis request")
         
-        analysis_results = sentiment_service.analyze_sentiment(
+        # Symbols are fetched concurrently; failed symbols come back in "errors"
+        sentiment_service = await warmup.aget("sentiment_service")
+        outcome = await sentiment_service.analyze_sentiment_concurrent(
             text=request.text,
             symbols=request.symbols,
             sources=request.sources,
             date_range=request.date_range
         )
+        analysis_results = outcome["results"]
         
         # Calculate overall sentiment
         if analysis_results:
-            overall_sentiment = sum(result.sentiment_score for result in analysis_results) / len(analysis_results)
+            overall_sentiment = sum(result["sentiment_score"] for result in analysis_results) / len(analysis_results)
         else:
             overall_sentiment = 0.0
             
-        return SentimentResponse(
-            analysis=analysis_results,
-            overall_sentiment=overall_sentiment,
-            timestamp=datetime.now()
+        return _respond(
+            {
+                "analysis": analysis_results,
+                "overall_sentiment": overall_sentiment,
+                "timestamp": datetime.now(),
+                "errors": outcome["errors"]
+            },
+            media_type, "analysis", SentimentResponse
         )
+    except ExecutorSaturatedError as e:
+        raise _overloaded(e)
     except Exception as e:
         logger.error(f"Error analyzing sentiment: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to analyze sentiment: {str(e)}")
 
+@app.post("/news-sentiment/stream")
+async def stream_sentiment(request: SentimentRequest, http_request: Request):
+    """
+    Analyze sentiment like /news-sentiment, streaming each result as soon as it is ready.
+    
+    Records are "analysis" (one SentimentAnalysis plus the running "count"
+    and "overall_sentiment"), "error" (a failed symbol) and a final
+    "summary". They are sent as NDJSON lines with a "type" field, or as
+    server-sent events named after the type when the client accepts
+    text/event-stream.
+    """
+    logger.info(f"Processing streaming sentiment analysis request")
+    event_stream = "text/event-stream" in http_request.headers.get("accept", "")
+    
+    sentiment_service = await warmup.aget("sentiment_service")
+    records = sentiment_service.stream_sentiment(
+        text=request.text,
+        symbols=request.symbols,
+        sources=request.sources,
+        date_range=request.date_range
+    )
+    
+    async def stream_lines():
+        async for record in records:
+            payload = serialization.dumps_json(record).decode()
+            yield f"event: {record['type']}\ndata: {payload}\n\n" if event_stream else payload + "\n"
+    
+    if event_stream:
+        return StreamingResponse(
+            stream_lines(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    return StreamingResponse(stream_lines(), media_type=serialization.NDJSON)
+
 if __name__ == "__main__":
+    import uvicorn
+    
     logger.info("Starting InvestIQ ML API")
     uvicorn.run("app:app", host="0.0.0.0", port=5000, reload=True)
\ No newline at end of file
@@ -0,0 +1,95 @@
+# benchmarks/bench_allocation.py
+"""
+Latency of the covariance-aware allocator (CovarianceAllocator) against the
+score-proportional allocation, on one shared ranking per profile.
+
+Returns are synthetic market + sector factor paths, and one sector gets a
+common uptrend, so the best-scored stocks are highly correlated names of
+the same sector. Next to the p50 allocation time, each allocator's picks
+are described by their largest sector weight, mean pairwise return
+correlation and annualized portfolio volatility (sample covariance).
+
+Run from code/ml-service:
+    python -m benchmarks.bench_allocation --candidates 50 500 1000 2000 --bars 252
+"""
+import argparse
+
+import numpy as np
+
+from benchmarks.bench_universe import SECTORS
+from benchmarks.common import percentile, time_call
+from models.recommendation.allocation import CovarianceAllocator
+from models.recommendation.rule_based import RuleBasedRecommender
+
+PROFILES = ("conservative", "moderate", "aggressive")
+
+
+def synthetic_market(num_symbols, num_bars, seed):
+    """Close arrays driven by market and sector factors, plus each symbol's sector."""
+    rng = np.random.default_rng(seed)
+    sector_of = rng.integers(len(SECTORS), size=num_symbols)
+    market = rng.normal(0.0003, 0.008, (num_bars, 1))
+    factors = rng.normal(0.0, 0.01, (num_bars, len(SECTORS)))
+    factors[:, 0] += 0.002  # one hot sector
+    returns = market + factors[:, sector_of] + rng.normal(0.0, 0.012, (num_bars, num_symbols))
+    paths = rng.uniform(20, 500, num_symbols) * np.cumprod(1 + returns, axis=0)
+
+    symbols = [f"SYM{index:05d}" for index in range(num_symbols)]
+    historical_data = {symbol: {"close": paths[:, index]} for index, symbol in enumerate(symbols)}
+    sectors = {symbol: SECTORS[sector_of[index]] for index, symbol in enumerate(symbols)}
+    return historical_data, sectors
+
+
+def describe(recommendations, historical_data, sectors, budget):
+    """(largest sector weight, mean pairwise correlation, annualized volatility) of a portfolio."""
+    symbols = [rec["symbol"] for rec in recommendations]
+    weights = np.array([rec["allocation"] for rec in recommendations]) / 100
+    closes = np.column_stack([historical_data[symbol]["close"] for symbol in symbols])
+    returns = closes[1:] / closes[:-1] - 1
+
+    by_sector = {}
+    for symbol, weight in zip(symbols, weights):
+        by_sector[sectors[symbol]] = by_sector.get(sectors[symbol], 0.0) + weight
+    correlation = np.corrcoef(returns, rowvar=False)
+    pairs = correlation[np.triu_indices(len(symbols), 1)]
+    volatility = np.sqrt(weights @ np.cov(returns, rowvar=False) @ weights * 252)
+    return max(by_sector.values()), float(pairs.mean()) if len(pairs) else 1.0, volatility
+
+
+def run(candidates_list, num_bars, lot_size, repeat, seed):
+    budget = 100000
+    score_based = RuleBasedRecommender()
+    covariance = RuleBasedRecommender(allocator=CovarianceAllocator(
+        lookback_bars=num_bars, max_candidates=max(candidates_list), lot_size=lot_size
+    ))
+
+    print(f"allocation p50 over {repeat} calls, {num_bars} bars, budget {budget}")
+    print(f"{'candidates':>10} {'profile':>13} {'allocator':>10} {'ms':>8} "
+          f"{'picks':>6} {'max sector':>11} {'mean corr':>10} {'volatility':>11}")
+    for num_candidates in candidates_list:
+        historical_data, sectors = synthetic_market(num_candidates, num_bars, seed)
+        for risk_tolerance in PROFILES:
+            ranking = score_based.rank_stocks(historical_data, risk_tolerance, "medium")
+            calls = {
+                "score": lambda: score_based.allocate(ranking, risk_tolerance, budget),
+                "covariance": lambda: covariance.allocate(
+                    ranking, risk_tolerance, budget, historical_data, sectors
+                ),
+            }
+            for name, call in calls.items():
+                elapsed = percentile(time_call(call, repeat), 50)
+                recommendations = call()
+                sector_weight, correlation, volatility = describe(recommendations, historical_data, sectors, budget)
+                print(f"{num_candidates:>10} {risk_tolerance:>13} {name:>10} {elapsed * 1000:>8.2f} "
+                      f"{len(recommendations):>6} {sector_weight:>11.0%} {correlation:>10.2f} {volatility:>11.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--candidates", type=int, nargs="+", default=[50, 500, 1000, 2000])
+    parser.add_argument("--bars", type=int, default=252)
+    parser.add_argument("--lot-size", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run(args.candidates, args.bars, args.lot_size, args.repeat, args.seed)
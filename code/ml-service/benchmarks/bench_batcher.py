@@ -0,0 +1,111 @@
+# benchmarks/bench_batcher.py
+"""
+Load test for the sentiment request batcher: closed-loop clients each send
+small requests (1-5 documents) concurrently, first as one executor job per
+request, then through MicroBatcher with several max_wait settings.
+Reports throughput, request p50/p99 latency and the mean batch size.
+
+The analyzer models inference cost as a fixed per-call overhead plus a
+per-document cost (a blocking sleep, which like ONNX Runtime releases the
+GIL), on top of the lexicon scorer. Pass --model-path to use a real ONNX
+model instead.
+
+Run from code/ml-service:
+    python -m benchmarks.bench_batcher --clients 32 --waits 0 1 2 5 10
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from benchmarks.common import percentile, synthetic_headlines
+from models.sentiment.transformer_model import TransformerSentimentAnalyzer
+from services.batcher import MicroBatcher
+from services.executor import BoundedExecutor
+
+
+class CostModelAnalyzer(TransformerSentimentAnalyzer):
+    """Lexicon analyzer whose analyze_batch also costs call_seconds + len(texts) * document_seconds."""
+
+    def __init__(self, call_seconds, document_seconds):
+        super().__init__()
+        self.call_seconds = call_seconds
+        self.document_seconds = document_seconds
+
+    def analyze_batch(self, texts):
+        time.sleep(self.call_seconds + self.document_seconds * len(texts))
+        return super().analyze_batch(texts)
+
+
+async def load(analyze, texts, clients, duration, seed):
+    """Run closed-loop clients for `duration` seconds; return (request latencies, documents analyzed)."""
+    latencies = []
+    documents = 0
+    deadline = time.perf_counter() + duration
+
+    async def client(index):
+        nonlocal documents
+        rng = np.random.default_rng(seed + index)
+        while time.perf_counter() < deadline:
+            request = [texts[position] for position in rng.integers(0, len(texts), rng.integers(1, 6))]
+            start = time.perf_counter()
+            results = await analyze(request)
+            latencies.append(time.perf_counter() - start)
+            assert len(results) == len(request)
+            documents += len(request)
+
+    await asyncio.gather(*(client(index) for index in range(clients)))
+    return latencies, documents
+
+
+def report(label, latencies, documents, duration, batcher=None):
+    batch = f"{batcher.stats()['mean_batch_size']:>6.1f}" if batcher is not None else f"{'-':>6}"
+    print(f"{label:>20} {documents / duration:>10.0f} docs/s {len(latencies) / duration:>8.0f} req/s"
+          f"   p50 {percentile(latencies, 50) * 1000:>7.2f} ms   p99 {percentile(latencies, 99) * 1000:>7.2f} ms"
+          f"   mean batch {batch}")
+
+
+def run(clients, waits, max_batch_size, duration, workers, call_ms, document_ms, model_path, seed):
+    texts = synthetic_headlines(5000, seed=seed)
+    if model_path:
+        analyzer = TransformerSentimentAnalyzer(model_path=model_path)
+        print(f"{clients} clients, 1-5 documents per request, model {analyzer.model_id}, {workers} workers")
+    else:
+        analyzer = CostModelAnalyzer(call_ms / 1000.0, document_ms / 1000.0)
+        print(f"{clients} clients, 1-5 documents per request, {call_ms} ms per call + {document_ms} ms per document,"
+              f" {workers} workers")
+
+    executor = BoundedExecutor("thread", max_workers=workers, max_queue=clients)
+
+    async def per_request(request):
+        return await executor.run(analyzer.analyze_batch, request)
+
+    latencies, documents = asyncio.run(load(per_request, texts, clients, duration, seed))
+    report("per-request jobs", latencies, documents, duration)
+
+    for wait_ms in waits:
+        batcher = MicroBatcher(
+            analyzer.analyze_batch, max_batch_size=max_batch_size, max_wait=wait_ms / 1000.0,
+            executor=executor, max_concurrent_batches=workers
+        )
+        latencies, documents = asyncio.run(load(batcher.submit, texts, clients, duration, seed))
+        report(f"batched, wait {wait_ms:g} ms", latencies, documents, duration, batcher)
+
+    executor.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--waits", type=float, nargs="+", default=[0, 1, 2, 5, 10])
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--call-ms", type=float, default=2.0)
+    parser.add_argument("--document-ms", type=float, default=0.1)
+    parser.add_argument("--model-path", default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run(args.clients, args.waits, args.max_batch_size, args.duration, args.workers,
+        args.call_ms, args.document_ms, args.model_path, args.seed)
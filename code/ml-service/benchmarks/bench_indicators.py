@@ -0,0 +1,43 @@
+# benchmarks/bench_indicators.py
+"""
+Compare the per-symbol pandas path of RuleBasedRecommender with the
+vectorized cross-sectional engine.
+
+Run from code/ml-service:
+    python -m benchmarks.bench_indicators --sizes 10 500 5000
+"""
+import argparse
+
+from benchmarks.common import synthetic_history, time_call, percentile
+from models.recommendation.rule_based import RuleBasedRecommender
+
+
+def run(sizes, repeat):
+    per_symbol = RuleBasedRecommender(vectorized=False)
+    vectorized = RuleBasedRecommender(vectorized=True)
+
+    print(f"{'symbols':>8} {'per-symbol ms':>14} {'vectorized ms':>14} {'speedup':>8}")
+    for size in sizes:
+        historical_data = synthetic_history(size)
+
+        def run_per_symbol():
+            per_symbol.generate_recommendations(historical_data, "moderate", "medium", 10000)
+
+        def run_vectorized():
+            vectorized.generate_recommendations(historical_data, "moderate", "medium", 10000)
+
+        expected = per_symbol.generate_recommendations(historical_data, "moderate", "medium", 10000)
+        actual = vectorized.generate_recommendations(historical_data, "moderate", "medium", 10000)
+        assert expected == actual, f"vectorized results differ at {size} symbols"
+
+        slow = percentile(time_call(run_per_symbol, repeat), 50) * 1000
+        fast = percentile(time_call(run_vectorized, repeat), 50) * 1000
+        print(f"{size:>8} {slow:>14.2f} {fast:>14.2f} {slow / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 500, 5000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.sizes, args.repeat)
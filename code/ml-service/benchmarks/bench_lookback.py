@@ -0,0 +1,134 @@
+# benchmarks/bench_lookback.py
+"""
+/recommend latency as each symbol's history grows from 30 to 2,500 daily
+bars. Every window size runs in a fresh app process whose lookbacks
+(ML_LOOKBACK_*) span that many bars, and requests go through the ASGI app.
+
+Per window, p50/p99 request latency is reported for:
+    steady     prices unchanged: views and scores are served from cache
+    rescored   score cache cleared before each request (as after a price update)
+    rebuilt    history views and score cache cleared (views re-sliced, then scored)
+    no views   rescored, but fed DataFrames straight from the price store,
+               fingerprinted and packed on every request (the old data path)
+
+Run from code/ml-service:
+    python -m benchmarks.bench_lookback --bars 30 250 1000 2500 --universe 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+MODES = ("steady", "rescored", "rebuilt", "no views")
+
+RECOMMEND_BODY = {"risk_tolerance": "moderate", "budget": 10000, "time_horizon": "medium"}
+
+
+def child(repeat):
+    """Runs in the fresh interpreter: print per-mode request latencies (seconds) as JSON."""
+    import httpx
+
+    import app as app_module
+    from benchmarks.common import FakeStockDataService
+
+    service = app_module.recommendation_service
+    service.stock_details.stock_data_service = FakeStockDataService()
+    results = {}
+
+    async def measure(client, prepare):
+        latencies = []
+        for _ in range(repeat):
+            prepare()
+            start = time.perf_counter()
+            response = await client.post("/recommend", json=RECOMMEND_BODY)
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.text
+        return latencies
+
+    def rescore():
+        service.recommender.score_cache.invalidate()
+
+    def rebuild():
+        service.history_views.invalidate()
+        service.recommender.score_cache.invalidate()
+
+    async def run():
+        async with app_module.app.router.lifespan_context(app_module.app):
+            transport = httpx.ASGITransport(app=app_module.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                await measure(client, lambda: None)  # fill the price store
+                results["bars"] = len(next(iter(service._fetch_historical_data(
+                    service.universe_index.symbols.tolist()[:1]).values())))
+                results["symbols"] = len(service._get_stock_universe("moderate", None, None))
+                results["steady"] = await measure(client, lambda: None)
+                results["rescored"] = await measure(client, rescore)
+                results["rebuilt"] = await measure(client, rebuild)
+
+                # The old data path: shared DataFrames from the store, no views
+                service._fetch_historical_data = lambda symbols, time_horizon="medium": {
+                    symbol: service.price_store.get(symbol, service.lookbacks.base_days) for symbol in symbols
+                }
+                results["no views"] = await measure(client, rescore)
+
+    asyncio.run(run())
+    print(json.dumps(results))
+
+
+def launch(bars, universe_path, repeat):
+    days = f"{bars - 1}d"  # the synthetic feed has a bar for every calendar day, both ends included
+    env = dict(
+        os.environ, ML_WARMUP="eager", ML_EXECUTOR="inline", ML_WARMUP_PRICES="0",
+        ML_LOOKBACK_SHORT=days, ML_LOOKBACK_MEDIUM=days, ML_LOOKBACK_LONG=days
+    )
+    if universe_path:
+        env["ML_UNIVERSE_PATH"] = universe_path
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_lookback", "--child", "--repeat", str(repeat)],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(bars_list, universe, repeat, seed):
+    from benchmarks.bench_universe import synthetic_universe
+    from benchmarks.common import percentile
+
+    with tempfile.TemporaryDirectory() as directory:
+        universe_path = None
+        if universe:
+            universe_path = os.path.join(directory, "universe.csv")
+            pd.DataFrame(
+                synthetic_universe(universe, seed),
+                columns=["symbol", "sector", "market_cap", "volatility_bucket", "liquidity"]
+            ).to_csv(universe_path, index=False)
+
+        print(f"/recommend p50 / p99 ms over {repeat} requests")
+        print(f"{'bars':>6} {'symbols':>8} " + " ".join(f"{mode:>18}" for mode in MODES))
+        for bars in bars_list:
+            results = launch(bars, universe_path, repeat)
+            cells = [
+                f"{percentile(results[mode], 50) * 1000:>8.2f} / {percentile(results[mode], 99) * 1000:>7.2f}"
+                for mode in MODES
+            ]
+            print(f"{results['bars']:>6} {results['symbols']:>8} " + " ".join(f"{cell:>18}" for cell in cells))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bars", type=int, nargs="+", default=[30, 250, 1000, 2500])
+    parser.add_argument("--universe", type=int, default=0,
+                        help="synthetic universe size (the built-in universe if 0)")
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.repeat)
+    else:
+        run(args.bars, args.universe, args.repeat, args.seed)
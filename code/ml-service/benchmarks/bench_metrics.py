@@ -0,0 +1,118 @@
+# benchmarks/bench_metrics.py
+"""
+Overhead of the per-stage metrics on the recommendation and sentiment
+pipelines: the same calls are timed with METRICS enabled and disabled,
+in interleaved rounds so drift affects both equally.
+
+Run from code/ml-service:
+    python -m benchmarks.bench_metrics --rounds 20 --calls 50
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import httpx
+
+from benchmarks.common import FakeNewsService, FakeStockDataService
+from api.recommend import RecommendationService
+from api.sentiment import SentimentAnalysisService
+from models.recommendation.rule_based import RuleBasedRecommender
+from models.sentiment.transformer_model import TransformerSentimentAnalyzer
+from services.metrics import METRICS
+from services.stock_details import StockDetailsClient
+
+
+def per_call(func, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - start) / calls
+
+
+def observations():
+    return sum(histogram["count"] for histogram in METRICS.snapshot()["histograms"].values())
+
+
+def timer_cost(count=100000):
+    """Seconds per stage timer (enter, exit, histogram update)."""
+    start = time.perf_counter()
+    for _ in range(count):
+        with METRICS.stage("bench", "noop"):
+            pass
+    return (time.perf_counter() - start) / count
+
+
+def compare(label, func, rounds, calls, cost):
+    """
+    Print the measured on/off difference (noisy on a shared machine) next to
+    an estimate from the number of timers each call records times their cost.
+    """
+    func()  # warm caches
+    enabled, disabled = [], []
+    for _ in range(rounds):
+        METRICS.enabled = True
+        before = observations()
+        enabled.append(per_call(func, calls))
+        timers = (observations() - before) / calls
+        METRICS.enabled = False
+        disabled.append(per_call(func, calls))
+    METRICS.enabled = True
+
+    on, off = statistics.median(enabled), statistics.median(disabled)
+    print(f"{label:>28} off {off * 1e6:>9.1f} us   on {on * 1e6:>9.1f} us   measured {(on - off) / off:>+7.2%}"
+          f"   estimated {timers:.0f} timers = {timers * cost / off:>6.2%}")
+
+
+def endpoint(rounds, calls, cost):
+    """End to end through the ASGI app, middleware included, as a client sees it."""
+    os.environ.setdefault("ML_EXECUTOR", "inline")
+    import app as app_module
+
+    app_module.recommendation_service.stock_details.stock_data_service = FakeStockDataService()
+    app_module.sentiment_service.news_service = FakeNewsService(latency=0.0)
+
+    loop = asyncio.new_event_loop()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app_module.app), base_url="http://bench")
+    recommend_body = {"risk_tolerance": "moderate", "budget": 10000, "time_horizon": "medium"}
+    sentiment_body = {"symbols": ["AAPL", "MSFT", "NVDA", "TSLA", "AMZN"]}
+
+    compare("POST /recommend", lambda: loop.run_until_complete(client.post("/recommend", json=recommend_body)),
+            rounds, calls, cost)
+    compare("POST /news-sentiment",
+            lambda: loop.run_until_complete(client.post("/news-sentiment", json=sentiment_body)), rounds, calls, cost)
+
+
+def run(rounds, calls, universe):
+    recommendation_service = RecommendationService(RuleBasedRecommender())
+    recommendation_service.stock_details = StockDetailsClient(FakeStockDataService())
+    # Price store and quote cache hits, so scoring and the stage timers dominate
+    recommendation_service._get_stock_universe = lambda *args: [f"SYM{index:03d}" for index in range(universe)]
+
+    def recommend():
+        recommendation_service.recommender.score_cache.invalidate()
+        return recommendation_service.generate_recommendations("moderate", 10000, "medium")
+
+    sentiment_service = SentimentAnalysisService(
+        TransformerSentimentAnalyzer(),
+        news_service=FakeNewsService(latency=0.0)
+    )
+    symbols = ["AAPL", "MSFT", "NVDA", "TSLA", "AMZN"]
+
+    cost = timer_cost()
+    print(f"{rounds} rounds x {calls} calls, medians per call; one stage timer costs {cost * 1e9:.0f} ns")
+    compare("recommend (scored)", recommend, rounds, calls, cost)
+    compare("recommend (score cache hit)",
+            lambda: recommendation_service.generate_recommendations("moderate", 10000, "medium"), rounds, calls, cost)
+    compare("analyze_sentiment", lambda: sentiment_service.analyze_sentiment(symbols=symbols), rounds, calls, cost)
+    endpoint(rounds, calls, cost)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--universe", type=int, default=10)
+    args = parser.parse_args()
+    run(args.rounds, args.calls, args.universe)
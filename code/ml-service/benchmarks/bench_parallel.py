@@ -0,0 +1,68 @@
+# benchmarks/bench_parallel.py
+"""
+Scaling of process-pool scoring (ParallelScorer) against the serial
+vectorized recommender, checking that recommendations are identical.
+
+Run from code/ml-service:
+    python -m benchmarks.bench_parallel --symbols 20000 --bars 250 --workers 1 2 4 8
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.common import percentile, time_call
+from models.recommendation.parallel import ParallelScorer
+from models.recommendation.rule_based import RuleBasedRecommender
+
+PROFILES = [("conservative", "long"), ("moderate", "medium"), ("aggressive", "short")]
+
+
+def synthetic_closes(num_symbols, num_bars, seed):
+    """Close arrays shaped like OHLCVStore.load_historical_data output (varying lengths)."""
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0004, 0.02, (num_bars, num_symbols))
+    paths = rng.uniform(20, 500, num_symbols) * np.cumprod(1 + returns, axis=0)
+    lengths = rng.integers(num_bars // 2, num_bars + 1, num_symbols)
+    return {
+        f"SYM{index:05d}": {"close": paths[num_bars - lengths[index]:, index]}
+        for index in range(num_symbols)
+    }
+
+
+def run(num_symbols, num_bars, workers_list, repeat, seed):
+    historical_data = synthetic_closes(num_symbols, num_bars, seed)
+    serial = RuleBasedRecommender()
+
+    def serial_call(risk_tolerance, time_horizon):
+        serial.score_cache.invalidate()
+        return serial.generate_recommendations(historical_data, risk_tolerance, time_horizon, 10000)
+
+    print(f"{num_symbols} symbols x up to {num_bars} bars, {len(PROFILES)} profiles per call")
+    baseline = percentile(time_call(lambda: [serial_call(*profile) for profile in PROFILES], repeat), 50)
+    print(f"{'serial':>10} {baseline * 1000:>9.1f} ms")
+
+    for workers in workers_list:
+        scorer = ParallelScorer(workers=workers, min_symbols=0)
+        recommender = RuleBasedRecommender(parallel_scorer=scorer)
+        for risk_tolerance, time_horizon in PROFILES:
+            assert (recommender.generate_recommendations(historical_data, risk_tolerance, time_horizon, 10000)
+                    == serial_call(risk_tolerance, time_horizon)), (workers, risk_tolerance)
+
+        elapsed = percentile(time_call(lambda: [
+            recommender.generate_recommendations(historical_data, risk_tolerance, time_horizon, 10000)
+            for risk_tolerance, time_horizon in PROFILES
+        ], repeat), 50)
+        print(f"{str(workers) + ' workers':>10} {elapsed * 1000:>9.1f} ms   speedup {baseline / elapsed:>5.2f}x")
+        scorer.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--symbols", type=int, default=20000)
+    parser.add_argument("--bars", type=int, default=250)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run(args.symbols, args.bars, args.workers, args.repeat, args.seed)
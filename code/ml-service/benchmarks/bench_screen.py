@@ -0,0 +1,100 @@
+# benchmarks/bench_screen.py
+"""
+Latency of /screen-style screens (Screener over FeatureColumns) on a
+synthetic universe, against ranking by fully sorting per-stock analyses as
+rank_stocks does.
+
+Reports the time to compute every symbol's features once, to recompute
+the 1% whose bars changed, and p50/p95 screen latency for several filter
+sets, both right after a feature update (scores recomputed) and warm.
+
+Run from code/ml-service:
+    python -m benchmarks.bench_screen --symbols 8000 --bars 252
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.bench_universe import synthetic_universe
+from benchmarks.common import percentile, time_call
+from models.recommendation.rule_based import RuleBasedRecommender
+from models.recommendation.screener import Screener
+from services.universe_index import UniverseIndex
+
+SCREENS = {
+    "top 20": {},
+    "sectors+volume+price": {
+        "sectors": ["Technology", "Healthcare", "Financials"],
+        "min_volume": 3e6, "min_price": 20, "max_price": 300,
+    },
+    "rsi+macd bullish": {"min_rsi": 40, "max_rsi": 70, "macd": "bullish"},
+    "page 50 of 50": {"offset": 980},
+}
+
+
+def synthetic_histories(symbols, num_bars, seed):
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0003, rng.uniform(0.005, 0.03, len(symbols)), (num_bars, len(symbols)))
+    closes = rng.uniform(5, 500, len(symbols)) * np.cumprod(1 + returns, axis=0)
+    volumes = rng.lognormal(14, 1.5, (num_bars, len(symbols)))
+    return {
+        symbol: {"close": closes[:, column], "volume": volumes[:, column]}
+        for column, symbol in enumerate(symbols)
+    }
+
+
+def full_sort(analyses):
+    """Baseline: sort every analysis, as rank_stocks does, and take the page."""
+    ranked = sorted(analyses, key=lambda analysis: analysis["score"], reverse=True)
+    return ranked[:20]
+
+
+def run(num_symbols, num_bars, repeat, seed):
+    index = UniverseIndex(synthetic_universe(num_symbols, seed))
+    histories = synthetic_histories(index.symbols.tolist(), num_bars, seed)
+    screener = Screener(RuleBasedRecommender(), index, {"medium": "1d"})
+    features = screener.features_for("medium")
+    print(f"{num_symbols} symbols, {num_bars} daily bars")
+
+    start = time.perf_counter()
+    features.refresh(histories.get)
+    print(f"{'all features':>36} {(time.perf_counter() - start) * 1000:>10.1f} ms")
+
+    changed = np.random.default_rng(seed + 1).choice(num_symbols, max(num_symbols // 100, 1), replace=False)
+    for column in changed:
+        symbol = index.symbols[column]
+        history = histories[symbol]
+        histories[symbol] = {"close": history["close"] * 1.01, "volume": history["volume"]}
+        screener.invalidate(symbol)
+    start = time.perf_counter()
+    features.refresh(histories.get)
+    print(f"{'1% changed features':>36} {(time.perf_counter() - start) * 1000:>10.1f} ms")
+
+    print(f"{'screen':>36} {'matches':>8} {'cold ms':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for name, filters in SCREENS.items():
+        for risk_tolerance in ("conservative", "moderate", "aggressive"):
+            # Scores are recomputed once per feature version
+            features.update({index.symbols[changed[0]]: histories[index.symbols[changed[0]]]})
+            start = time.perf_counter()
+            screen = screener.screen(risk_tolerance, "medium", **filters)
+            cold = time.perf_counter() - start
+            durations = time_call(lambda: screener.screen(risk_tolerance, "medium", **filters), repeat)
+            label = f"{name} / {risk_tolerance}"
+            print(f"{label:>36} {screen['total']:>8} {cold * 1000:>8.2f} "
+                  f"{percentile(durations, 50) * 1000:>8.2f} {percentile(durations, 95) * 1000:>8.2f}")
+
+    analyses = RuleBasedRecommender().rank_stocks(histories, "moderate", "medium")
+    durations = time_call(lambda: full_sort(analyses), repeat)
+    print(f"{'full sort of analyses':>36} {num_symbols:>8} {'':>8} "
+          f"{percentile(durations, 50) * 1000:>8.2f} {percentile(durations, 95) * 1000:>8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--symbols", type=int, default=8000)
+    parser.add_argument("--bars", type=int, default=252)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run(args.symbols, args.bars, args.repeat, args.seed)
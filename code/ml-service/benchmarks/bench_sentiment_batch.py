@@ -0,0 +1,49 @@
+# benchmarks/bench_sentiment_batch.py
+"""
+Compare TransformerSentimentAnalyzer.analyze called per headline with
+analyze_batch over the same corpus, and check that results are identical.
+
+Run from code/ml-service:
+    python -m benchmarks.bench_sentiment_batch --count 100000
+"""
+import argparse
+import gc
+import time
+
+from benchmarks.common import synthetic_headlines
+from models.sentiment.transformer_model import TransformerSentimentAnalyzer
+
+
+def run(count, batch_size):
+    analyzer = TransformerSentimentAnalyzer()
+    headlines = synthetic_headlines(count)
+
+    # Keep the first run's results out of the second run's GC traversals
+    gc.collect()
+    gc.freeze()
+    start = time.perf_counter()
+    expected = [analyzer.analyze(text) for text in headlines]
+    per_text = time.perf_counter() - start
+
+    gc.collect()
+    gc.freeze()
+    start = time.perf_counter()
+    actual = []
+    for offset in range(0, count, batch_size):
+        actual.extend(analyzer.analyze_batch(headlines[offset:offset + batch_size]))
+    batched = time.perf_counter() - start
+
+    assert expected == actual, "analyze_batch results differ from analyze"
+
+    print(f"{'mode':>10} {'seconds':>9} {'docs/s':>12}")
+    print(f"{'analyze':>10} {per_text:>9.2f} {count / per_text:>12.0f}")
+    print(f"{'batch':>10} {batched:>9.2f} {count / batched:>12.0f}")
+    print(f"speedup: {per_text / batched:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    run(args.count, args.batch_size)
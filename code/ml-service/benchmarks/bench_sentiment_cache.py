@@ -0,0 +1,125 @@
+# benchmarks/bench_sentiment_cache.py
+"""
+Sentiment result cache on a realistic request stream: popular tickers are
+requested far more often (Zipf), and the same syndicated headlines appear
+under several tickers, so texts repeat both within and across requests.
+
+Compares no cache, the in-memory cache, and the on-disk store reopened by a
+"restarted" process. --inference-ms adds a simulated per-text model cost on
+top of the lexicon analyzer, to model a transformer backend.
+
+Run from code/ml-service:
+    python -m benchmarks.bench_sentiment_cache --requests 300 --symbols 200 --inference-ms 2
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.common import percentile, synthetic_headlines
+from api.sentiment import SentimentAnalysisService
+from models.sentiment.transformer_model import TransformerSentimentAnalyzer
+from services.sentiment_cache import SentimentCache
+
+
+class StreamNewsService:
+    """
+    News for a fixed universe: each symbol's articles mix its own headlines
+    with wire stories shared by every symbol in its sector group.
+    """
+
+    def __init__(self, num_symbols, articles, seed):
+        rng = np.random.default_rng(seed)
+        self.articles = articles
+        self.own = synthetic_headlines(num_symbols * articles, seed=seed)
+        self.wire = synthetic_headlines(64, seed=seed + 1)
+        self.groups = rng.integers(0, 8, num_symbols)
+
+    def get_news(self, symbol, sources=None, days=7):
+        index = int(symbol[3:])
+        shared = self.articles // 2
+        own = self.own[index * self.articles:index * self.articles + self.articles - shared]
+        wire = [self.wire[(self.groups[index] * 8 + i) % len(self.wire)] for i in range(shared)]
+        return [{"title": f"{symbol} headline {i}", "content": text} for i, text in enumerate(own + wire)]
+
+
+class SlowAnalyzer(TransformerSentimentAnalyzer):
+    """Lexicon analyzer plus a fixed per-text cost standing in for model inference."""
+
+    def __init__(self, inference_seconds):
+        super().__init__()
+        self.inference_seconds = inference_seconds
+        self.analyzed = 0
+
+    def analyze_batch(self, texts):
+        self.analyzed += len(texts)
+        if self.inference_seconds:
+            time.sleep(self.inference_seconds * len(texts))
+        return super().analyze_batch(texts)
+
+
+def request_stream(num_requests, num_symbols, per_request, seed):
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, num_symbols + 1) ** 1.1
+    weights /= weights.sum()
+    return [
+        [f"SYM{index:05d}" for index in rng.choice(num_symbols, per_request, replace=False, p=weights)]
+        for _ in range(num_requests)
+    ]
+
+
+def replay(label, service, analyzer, stream):
+    durations, outputs = [], []
+    analyzer.analyzed = 0
+    for symbols in stream:
+        start = time.perf_counter()
+        outputs.append(service.analyze_sentiment(symbols=symbols))
+        durations.append(time.perf_counter() - start)
+    cache = service.result_cache
+    ratio = f"{cache.stats()['hit_ratio']:>7.2%}" if cache is not None else f"{'-':>7}"
+    print(f"{label:>24} total {sum(durations):>8.3f} s   p50 {percentile(durations, 50) * 1000:>8.2f} ms"
+          f"   p95 {percentile(durations, 95) * 1000:>8.2f} ms   analyzed {analyzer.analyzed:>6}   hit ratio {ratio}")
+    return outputs
+
+
+def run(num_requests, num_symbols, per_request, articles, inference_ms, seed):
+    news_service = StreamNewsService(num_symbols, articles, seed)
+    stream = request_stream(num_requests, num_symbols, per_request, seed)
+    analyzer = SlowAnalyzer(inference_ms / 1000.0)
+    print(f"{num_requests} requests x {per_request} symbols ({articles} articles each) from {num_symbols} symbols, "
+          f"{inference_ms} ms simulated inference per text")
+
+    uncached = SentimentAnalysisService(analyzer, news_service=news_service)
+    expected = replay("no cache", uncached, analyzer, stream)
+
+    memory = SentimentAnalysisService(analyzer, news_service=news_service, result_cache=SentimentCache())
+    assert replay("memory cache", memory, analyzer, stream) == expected
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "sentiment.db")
+        first = SentimentCache(path=path)
+        disk = SentimentAnalysisService(analyzer, news_service=news_service, result_cache=first)
+        assert replay("disk cache (cold)", disk, analyzer, stream) == expected
+        first.close()
+
+        # A new process: empty memory, warm store
+        second = SentimentCache(path=path)
+        restarted = SentimentAnalysisService(analyzer, news_service=news_service, result_cache=second)
+        assert replay("disk cache (restarted)", restarted, analyzer, stream) == expected
+        second.close()
+
+    print("cached results identical to uncached results")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--symbols", type=int, default=200)
+    parser.add_argument("--per-request", type=int, default=5)
+    parser.add_argument("--articles", type=int, default=6)
+    parser.add_argument("--inference-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run(args.requests, args.symbols, args.per_request, args.articles, args.inference_ms, args.seed)
@@ -0,0 +1,57 @@
+# benchmarks/bench_sentiment_fanout.py
+"""
+Compare serial SentimentAnalysisService.analyze_sentiment with the
+concurrent fan-out over a watchlist, using a fake NewsService with
+injected latency.
+
+Run from code/ml-service:
+    python -m benchmarks.bench_sentiment_fanout --symbols 50 --latency 0.05
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import FakeNewsService
+from api.sentiment import SentimentAnalysisService
+from models.sentiment.transformer_model import TransformerSentimentAnalyzer
+
+
+def run(num_symbols, latency, max_concurrency):
+    symbols = [f"SYM{index:03d}" for index in range(num_symbols)]
+    service = SentimentAnalysisService(
+        TransformerSentimentAnalyzer(),
+        news_service=FakeNewsService(latency=latency),
+        max_concurrency=max_concurrency,
+        symbol_timeout=max(1.0, latency * 10)
+    )
+
+    start = time.perf_counter()
+    serial = service.analyze_sentiment(symbols=symbols)
+    serial_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    concurrent = asyncio.run(service.analyze_sentiment_concurrent(symbols=symbols))
+    concurrent_seconds = time.perf_counter() - start
+
+    assert concurrent["results"] == serial, "concurrent results differ from serial results"
+    assert not concurrent["errors"]
+
+    print(f"{num_symbols} symbols, {latency * 1000:.0f} ms fetch latency, concurrency {max_concurrency}")
+    print(f"{'serial':>12} {serial_seconds * 1000:>9.1f} ms")
+    print(f"{'concurrent':>12} {concurrent_seconds * 1000:>9.1f} ms")
+    print(f"speedup: {serial_seconds / concurrent_seconds:.1f}x")
+
+    # Partial results: failing and slow symbols are reported, not raised
+    service.news_service = FakeNewsService(latency=latency, failing=symbols[:1], slow=symbols[1:2])
+    service.symbol_timeout = latency * 5
+    partial = asyncio.run(service.analyze_sentiment_concurrent(symbols=symbols[:5]))
+    print(f"with failures: {len(partial['results'])} results, {len(partial['errors'])} errors")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    run(args.symbols, args.latency, args.concurrency)
@@ -0,0 +1,148 @@
+# benchmarks/bench_sentiment_model.py
+"""
+Throughput (documents/second) and per-call p50/p99 latency of the sentiment
+backends for analyze_batch batch sizes 1-64: the lexicon scorer, and the
+ONNX backend with length-bucketed padding, padding to max_length, and int8
+quantization.
+
+Pass --model-path with a local export (model.onnx, tokenizer.json and
+optionally config.json). Without one, a small toy classifier is generated in
+a temporary directory so the batching/padding/tokenizer machinery can be
+measured; its absolute numbers are far below a real transformer's cost.
+Needs onnxruntime and tokenizers (and onnx for the toy model).
+
+Run from code/ml-service:
+    python -m benchmarks.bench_sentiment_model --model-path /models/finbert-onnx
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.common import HEADLINE_WORDS, percentile, synthetic_headlines
+from models.sentiment import onnx_backend
+from models.sentiment.onnx_backend import OnnxSentimentBackend, quantize_int8
+from models.sentiment.transformer_model import TransformerSentimentAnalyzer
+
+BATCH_SIZES = (1, 2, 4, 8, 16, 32, 64)
+
+
+def build_toy_model(directory, hidden=256, layers=4, seed=42):
+    """Write a word-level tokenizer and an embedding + MLP + masked-sum classifier as model.onnx."""
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+    from tokenizers import Tokenizer, models, normalizers, pre_tokenizers
+
+    words = sorted({word for phrase in HEADLINE_WORDS for word in phrase.lower().split()})
+    vocab = {"[PAD]": 0, "[UNK]": 1, **{word: index + 2 for index, word in enumerate(words)}}
+    tokenizer = Tokenizer(models.WordLevel(vocab, unk_token="[UNK]"))
+    tokenizer.normalizer = normalizers.Lowercase()
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer.save(os.path.join(directory, "tokenizer.json"))
+
+    rng = np.random.default_rng(seed)
+    initializers = [numpy_helper.from_array(rng.normal(0, 0.1, (len(vocab), hidden)).astype(np.float32), "embeddings")]
+    nodes = [helper.make_node("Gather", ["embeddings", "input_ids"], ["hidden0"])]
+    for layer in range(layers):
+        initializers.append(numpy_helper.from_array(
+            rng.normal(0, hidden ** -0.5, (hidden, hidden)).astype(np.float32), f"weight{layer}"))
+        nodes.append(helper.make_node("MatMul", [f"hidden{layer}", f"weight{layer}"], [f"linear{layer}"]))
+        nodes.append(helper.make_node("Relu", [f"linear{layer}"], [f"hidden{layer + 1}"]))
+    initializers.append(numpy_helper.from_array(rng.normal(0, 0.1, (hidden, 3)).astype(np.float32), "classifier"))
+    initializers.append(numpy_helper.from_array(np.array([2], dtype=np.int64), "token_axis"))
+    initializers.append(numpy_helper.from_array(np.array([1], dtype=np.int64), "sum_axis"))
+    nodes += [
+        helper.make_node("Cast", ["attention_mask"], ["mask"], to=TensorProto.FLOAT),
+        helper.make_node("Unsqueeze", ["mask", "token_axis"], ["mask3"]),
+        helper.make_node("Mul", [f"hidden{layers}", "mask3"], ["masked"]),
+        helper.make_node("ReduceSum", ["masked", "sum_axis"], ["pooled"], keepdims=0),
+        helper.make_node("MatMul", ["pooled", "classifier"], ["logits"]),
+    ]
+    graph = helper.make_graph(
+        nodes, "toy_sentiment",
+        [helper.make_tensor_value_info("input_ids", TensorProto.INT64, ["batch", "sequence"]),
+         helper.make_tensor_value_info("attention_mask", TensorProto.INT64, ["batch", "sequence"])],
+        [helper.make_tensor_value_info("logits", TensorProto.FLOAT, ["batch", 3])],
+        initializers
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)])
+    model.ir_version = 8
+    onnx.save(model, os.path.join(directory, "model.onnx"))
+    return directory
+
+
+def corpus(count, seed):
+    """Mostly headlines, with some longer article-style texts."""
+    short = synthetic_headlines(count, seed=seed)
+    long = synthetic_headlines(count // 10, min_words=60, max_words=120, seed=seed + 1)
+    texts = short + long
+    np.random.default_rng(seed).shuffle(texts)
+    return texts
+
+
+def measure(label, analyze_batch, texts, repeat):
+    print(f"{label}")
+    rng = np.random.default_rng(0)
+    analyze_batch(texts[:64])  # warm-up
+    for batch_size in BATCH_SIZES:
+        durations = []
+        for _ in range(repeat):
+            batch = [texts[index] for index in rng.integers(0, len(texts), batch_size)]
+            start = time.perf_counter()
+            analyze_batch(batch)
+            durations.append(time.perf_counter() - start)
+        print(f"  batch {batch_size:>3}   {batch_size * len(durations) / sum(durations):>10.0f} docs/s"
+              f"   p50 {percentile(durations, 50) * 1000:>8.3f} ms   p99 {percentile(durations, 99) * 1000:>8.3f} ms")
+
+
+def run(model_path, repeat, max_length, threads, seed):
+    texts = corpus(2000, seed)
+    measure("lexicon", TransformerSentimentAnalyzer().analyze_batch, texts, repeat)
+
+    if not onnx_backend.is_available():
+        print("onnxruntime/tokenizers not installed; skipping the ONNX backend")
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        if model_path is None:
+            model_path = build_toy_model(directory)
+            print(f"(toy model generated in {directory})")
+        model_file = onnx_backend.find_model_file(model_path)
+
+        variants = [
+            ("onnx, bucketed padding", dict(model_path=model_file)),
+            ("onnx, padded to max_length", dict(model_path=model_file, buckets=None)),
+        ]
+        # Quantize into a directory of its own, next to a copy of the tokenizer and config
+        quantized = os.path.join(directory, "int8")
+        os.makedirs(quantized)
+        for name in ("tokenizer.json", "config.json"):
+            source = os.path.join(os.path.dirname(model_file), name)
+            if os.path.exists(source):
+                shutil.copy(source, quantized)
+        quantize_int8(model_file, os.path.join(quantized, "model.int8.onnx"))
+        variants.append(("onnx int8, bucketed padding", dict(model_path=quantized)))
+
+        for label, options in variants:
+            backend = OnnxSentimentBackend(max_length=max_length, threads=threads, **options)
+            measure(label, backend.predict, texts, repeat)
+            stats = backend.stats()
+            print(f"  tokenizer cache hit ratio {stats['tokenizer_hit_ratio']:.2%},"
+                  f" padding {stats['padding_ratio']:.2%} of tokens")
+
+        analyzer = TransformerSentimentAnalyzer(model_path=quantized, max_length=max_length, threads=threads)
+        measure("analyzer (onnx int8 + key terms)", analyzer.analyze_batch, texts, repeat)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model-path", default=None)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--max-length", type=int, default=128)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run(args.model_path, args.repeat, args.max_length, args.threads, args.seed)
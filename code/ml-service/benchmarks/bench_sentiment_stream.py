@@ -0,0 +1,117 @@
+# benchmarks/bench_sentiment_stream.py
+"""
+Buffered /news-sentiment versus the streaming /news-sentiment/stream:
+time to first result, total time, and server memory as the number of
+symbols (and so articles) grows.
+
+The app is driven directly over ASGI so the time of every response body
+chunk is observed (httpx's ASGI transport buffers the whole body). Peak
+memory is tracemalloc's peak while the service produces the response.
+
+Run from code/ml-service:
+    python -m benchmarks.bench_sentiment_stream --symbols 20 100 400 --latency 0.02
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import tracemalloc
+
+from benchmarks.common import FakeNewsService
+
+
+async def asgi_post(app, path, body, accept="application/json", keep_body=True):
+    """POST body to app; return (seconds to first non-empty body chunk, total seconds, body bytes)."""
+    payload = json.dumps(body).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"accept", accept.encode())],
+        "client": ("bench", 0), "server": ("bench", 80),
+    }
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        await asyncio.Event().wait()  # no disconnect while the response is being sent
+
+    first = None
+    chunks = []
+
+    async def send(message):
+        nonlocal first
+        if message["type"] == "http.response.body" and message.get("body"):
+            if first is None:
+                first = time.perf_counter()
+            if keep_body:
+                chunks.append(message["body"])
+
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    end = time.perf_counter()
+    return (first or end) - start, end - start, b"".join(chunks)
+
+
+def peak_memory(coroutine_factory):
+    tracemalloc.start()
+    try:
+        asyncio.run(coroutine_factory())
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def check(buffered_body, streamed_body):
+    buffered = json.loads(buffered_body)
+    records = [json.loads(line) for line in streamed_body.splitlines()]
+    streamed = [record["analysis"] for record in records if record["type"] == "analysis"]
+    summary = records[-1]
+    key = lambda result: json.dumps(result, sort_keys=True)
+    assert summary["type"] == "summary"
+    assert sorted(map(key, streamed)) == sorted(map(key, buffered["analysis"]))
+    assert abs(summary["overall_sentiment"] - buffered["overall_sentiment"]) < 1e-9
+    assert summary["count"] == len(buffered["analysis"])
+
+
+def run(symbol_counts, latency, concurrency):
+    os.environ.setdefault("ML_EXECUTOR", "inline")
+    import app as app_module
+
+    service = app_module.sentiment_service
+    service.max_concurrency = concurrency
+    print(f"{latency * 1000:.0f} ms news latency, concurrency {concurrency}, 5 articles per symbol")
+    print(f"{'symbols':>8} {'endpoint':>24} {'first result':>14} {'total':>10} {'peak memory':>12}")
+
+    for num_symbols in symbol_counts:
+        body = {"symbols": [f"SYM{index:05d}" for index in range(num_symbols)]}
+        # Fresh results for every run, so the result cache does not favour the second endpoint
+        service.news_service = FakeNewsService(latency=latency)
+
+        outcomes = {}
+        for path in ("/news-sentiment", "/news-sentiment/stream"):
+            if service.result_cache is not None:
+                service.result_cache.invalidate()
+            first, total, payload = asyncio.run(asgi_post(app_module.app, path, body))
+            if service.result_cache is not None:
+                service.result_cache.invalidate()
+            # The client side discards chunks, so only server-side memory counts
+            peak = peak_memory(lambda: asgi_post(app_module.app, path, body, keep_body=False))
+            outcomes[path] = payload
+            print(f"{num_symbols:>8} {path:>24} {first * 1000:>11.1f} ms {total * 1000:>7.1f} ms"
+                  f" {peak / 1e6:>9.2f} MB")
+        check(outcomes["/news-sentiment"], outcomes["/news-sentiment/stream"])
+
+    print("streamed results match the buffered response")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--symbols", type=int, nargs="+", default=[20, 100, 400])
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    run(args.symbols, args.latency, args.concurrency)
@@ -0,0 +1,116 @@
+# benchmarks/bench_serialization.py
+"""
+Response serialization cost at 10, 1k and 100k rows: the previous path
+(validate the service's dicts into the Pydantic response model, dump it
+and encode with json.dumps, as FastAPI does for a response_model) against
+the direct encoders of services.serialization, for /recommend-shaped and
+/screen-shaped rows.
+
+MessagePack and Arrow IPC are measured when msgpack / pyarrow are
+installed. Sizes are of the encoded body.
+
+Run from code/ml-service:
+    python -m benchmarks.bench_serialization --rows 10 1000 100000
+"""
+import argparse
+import json
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks.common import percentile, time_call
+from services import serialization
+
+
+def recommendation_rows(num_rows, rng):
+    return [
+        {
+            "symbol": f"SYM{index:05d}",
+            "name": f"SYM{index:05d} Inc.",
+            "confidence_score": round(float(rng.uniform(0.3, 1.0)), 2),
+            "price": round(float(rng.uniform(5, 500)), 2),
+            "target_price": round(float(rng.uniform(5, 600)), 2),
+            "rationale": "Price above 20-day MA and 5-day MA crossed above 20-day MA",
+            "suggested_allocation": round(float(rng.uniform(1, 40)), 2),
+            "shares": int(rng.integers(1, 500)),
+        }
+        for index in range(num_rows)
+    ]
+
+
+def screen_rows(num_rows, rng):
+    return [
+        {
+            "symbol": f"SYM{index:05d}",
+            "sector": "Technology",
+            "score": int(rng.integers(0, 100)),
+            "rationale": "Price above 20-day MA and RSI shows strong momentum",
+            "price": round(float(rng.uniform(5, 500)), 2),
+            "volume": round(float(rng.lognormal(14, 1.5)), 4),
+            "rsi": round(float(rng.uniform(0, 100)), 4),
+            "macd": round(float(rng.normal()), 4),
+            "macd_signal": round(float(rng.normal()), 4),
+            "volatility": round(float(rng.uniform(0.05, 0.8)), 4),
+            "confidence_score": round(float(rng.uniform(0, 1)), 2),
+        }
+        for index in range(num_rows)
+    ]
+
+
+def pydantic_json(model, payload):
+    """What a response_model route did: validate, dump to JSON types, json.dumps like JSONResponse."""
+    return json.dumps(
+        model(**payload).model_dump(mode="json"),
+        ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode()
+
+
+def run(rows_list, repeat, seed):
+    from app import RecommendationResponse, ScreenResponse
+
+    rng = np.random.default_rng(seed)
+    shapes = {
+        "recommend": (RecommendationResponse, "recommendations", recommendation_rows),
+        "screen": (ScreenResponse, "results", screen_rows),
+    }
+    encoders = {
+        "pydantic + json": lambda model, payload, table: pydantic_json(model, payload),
+        "stdlib json": lambda model, payload, table: json.dumps(
+            payload, default=serialization.json_default, separators=(",", ":")
+        ).encode(),
+    }
+    if serialization.orjson is not None:
+        encoders["orjson"] = lambda model, payload, table: serialization.encode(payload, serialization.JSON, table)
+    if serialization.msgpack is not None:
+        encoders["msgpack"] = lambda model, payload, table: serialization.encode(payload, serialization.MSGPACK, table)
+    if serialization.ARROW_AVAILABLE:
+        encoders["arrow ipc"] = lambda model, payload, table: serialization.encode(payload, serialization.ARROW, table)
+    missing = [name for name, module in (("orjson", serialization.orjson), ("msgpack", serialization.msgpack))
+               if module is None] + ([] if serialization.ARROW_AVAILABLE else ["pyarrow"])
+    if missing:
+        print(f"not installed (skipped): {', '.join(missing)}")
+
+    print(f"{'shape':>10} {'rows':>8} {'encoder':>16} {'p50 ms':>10} {'p95 ms':>10} {'speedup':>8} {'bytes':>12}")
+    for shape, (model, table, make_rows) in shapes.items():
+        for num_rows in rows_list:
+            payload = {table: make_rows(num_rows, rng), "timestamp": datetime.now()}
+            if shape == "screen":
+                payload.update(total=num_rows, offset=0, limit=num_rows, as_of=datetime.now())
+            calls = max(3, min(repeat, repeat * 1000 // max(num_rows, 1)))
+            baseline = None
+            for name, encoder in encoders.items():
+                durations = time_call(lambda: encoder(model, payload, table), calls)
+                p50 = percentile(durations, 50)
+                baseline = baseline or p50
+                size = len(encoder(model, payload, table))
+                print(f"{shape:>10} {num_rows:>8} {name:>16} {p50 * 1000:>10.3f} "
+                      f"{percentile(durations, 95) * 1000:>10.3f} {baseline / p50:>7.1f}x {size:>12}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 1000, 100000])
+    parser.add_argument("--repeat", type=int, default=50, help="calls per measurement (fewer for large payloads)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run(args.rows, args.repeat, args.seed)
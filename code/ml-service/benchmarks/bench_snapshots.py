@@ -0,0 +1,98 @@
+# benchmarks/bench_snapshots.py
+"""
+/recommend latency served from materialized recommendation snapshots
+(SnapshotRefresher + RecommendationService.build_snapshot) against running
+the full pipeline per request, on a synthetic universe with warm price
+caches and a local stock-details stub.
+
+Requests cycle through the risk/horizon profiles; "exclusions" requests
+drop a top-ranked symbol, so the snapshot path re-allocates the filtered
+ranking instead of only sizing the base allocation. Responses of both
+paths are checked to be identical.
+
+Run from code/ml-service:
+    python -m benchmarks.bench_snapshots --symbols 500 --requests 90 --allocator covariance
+"""
+import argparse
+import time
+
+from api.recommend import RISK_TOLERANCES, RecommendationService
+from benchmarks.bench_universe import synthetic_universe
+from benchmarks.common import FakeBulkStockDataService, percentile
+from models.recommendation.allocation import CovarianceAllocator
+from models.recommendation.rule_based import RuleBasedRecommender
+from services.lookback import Lookbacks
+from services.snapshots import SnapshotRefresher
+from services.stock_details import StockDetailsClient
+from services.universe_index import UniverseIndex
+
+HORIZONS = ("short", "medium", "long")
+
+
+def measure(service, profiles):
+    latencies, responses = [], []
+    for profile in profiles:
+        start = time.perf_counter()
+        responses.append(service.generate_recommendations(**profile))
+        latencies.append(time.perf_counter() - start)
+    return latencies, responses
+
+
+def run(num_symbols, num_requests, allocator, lookback, seed):
+    recommender = RuleBasedRecommender(allocator=CovarianceAllocator() if allocator == "covariance" else None)
+    service = RecommendationService(
+        recommender,
+        universe_index=UniverseIndex(synthetic_universe(num_symbols, seed)),
+        lookbacks=Lookbacks({horizon: lookback for horizon in HORIZONS})
+    )
+    service.stock_details = StockDetailsClient(FakeBulkStockDataService())
+    for horizon in HORIZONS:
+        service._fetch_historical_data(service.universe_index.symbols.tolist(), horizon)
+
+    profiles = [
+        {
+            "risk_tolerance": RISK_TOLERANCES[index % 3],
+            "time_horizon": HORIZONS[index // 3 % 3],
+            "budget": 10000 + 1000 * index,
+        }
+        for index in range(num_requests)
+    ]
+    # Exclude each profile's best-ranked stock
+    excluded = [
+        dict(profile, exclusions=[recommender.rank_stocks(
+            service._fetch_historical_data(service._get_stock_universe(profile["risk_tolerance"], None, None),
+                                           profile["time_horizon"]),
+            profile["risk_tolerance"], profile["time_horizon"]
+        )[0]["symbol"]])
+        for profile in profiles
+    ]
+    print(f"{num_symbols} symbols, {num_requests} requests, {allocator} allocator, {lookback} lookback")
+
+    results = {}
+    for label, requests in (("no exclusions", profiles), ("exclusions", excluded)):
+        results[("full pipeline", label)] = measure(service, requests)
+
+    refresher = SnapshotRefresher(service.build_snapshot)
+    service.use_snapshots(refresher)
+    snapshot = refresher.refresh()
+    print(f"{'snapshot build':>30} {snapshot.build_seconds * 1000:>8.1f} ms for {len(snapshot.entries)} profiles")
+
+    for label, requests in (("no exclusions", profiles), ("exclusions", excluded)):
+        results[("snapshot", label)] = measure(service, requests)
+        assert results[("snapshot", label)][1] == results[("full pipeline", label)][1]
+
+    for (path, label), (latencies, _) in results.items():
+        name = f"{path} / {label}"
+        print(f"{name:>30} p50 {percentile(latencies, 50) * 1000:>8.2f} ms   p95 {percentile(latencies, 95) * 1000:>8.2f} ms")
+    print(f"snapshot stats: {refresher.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=90)
+    parser.add_argument("--allocator", choices=("score", "covariance"), default="covariance")
+    parser.add_argument("--lookback", default="1y", help="lookback of every horizon (e.g. 1y, 3y)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run(args.symbols, args.requests, args.allocator, args.lookback, args.seed)
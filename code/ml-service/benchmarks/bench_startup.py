@@ -0,0 +1,124 @@
+# benchmarks/bench_startup.py
+"""
+Cold-start benchmark: time from process launch to importing app, to the
+first /health response, to /ready, and to the first /recommend and
+/news-sentiment responses, for each ML_WARMUP mode. Every run is a fresh
+interpreter, so import and model/cache initialization costs are included.
+
+Run from code/ml-service:
+    python -m benchmarks.bench_startup --runs 5 --output startup.json
+    python -m benchmarks.bench_startup --importtime   # slowest imports of app
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+MODES = ("eager", "background", "lazy")
+MILESTONES = ("import", "health", "ready", "first_recommend", "first_sentiment")
+
+RECOMMEND_BODY = {"risk_tolerance": "moderate", "budget": 10000, "time_horizon": "medium"}
+SENTIMENT_BODY = {"text": "Shares rallied after strong quarterly earnings beat guidance."}
+
+
+def child():
+    """
+    Runs in the fresh interpreter: print seconds since launch at each milestone as JSON.
+
+    The readiness and first-request milestones are taken in separate
+    processes, so polling /ready does not delay the first requests.
+    """
+    launched = float(os.environ["BENCH_LAUNCHED"])
+    since_launch = lambda: time.time() - launched
+    milestones = {}
+
+    import app as app_module
+    milestones["import"] = since_launch()
+
+    import httpx
+
+    async def run(phase):
+        async with app_module.app.router.lifespan_context(app_module.app):
+            transport = httpx.ASGITransport(app=app_module.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                if phase == "readiness":
+                    assert (await client.get("/health")).status_code == 200
+                    milestones["health"] = since_launch()
+                    while (await client.get("/ready")).status_code != 200:
+                        await asyncio.sleep(0.005)
+                    milestones["ready"] = since_launch()
+                else:
+                    # Sent right after startup, without waiting for /ready
+                    response = await client.post("/recommend", json=RECOMMEND_BODY)
+                    assert response.status_code == 200, response.text
+                    milestones["first_recommend"] = since_launch()
+                    response = await client.post("/news-sentiment", json=SENTIMENT_BODY)
+                    assert response.status_code == 200, response.text
+                    milestones["first_sentiment"] = since_launch()
+
+    asyncio.run(run(os.environ["BENCH_PHASE"]))
+    print(json.dumps(milestones))
+
+
+def launch(mode, phase):
+    env = dict(os.environ, ML_WARMUP=mode, ML_EXECUTOR="inline", BENCH_PHASE=phase, BENCH_LAUNCHED=repr(time.time()))
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_startup", "--child"],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def importtime(top):
+    """Print the slowest (cumulative) imports of app."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        env=dict(os.environ, ML_WARMUP="lazy"), capture_output=True, text=True, check=True
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "|" in line and "cumulative" not in line:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            rows.append((int(cumulative), name.rstrip()))
+    for cumulative, name in sorted(rows, reverse=True)[:top]:
+        print(f"{cumulative / 1000:>9.1f} ms  {name}")
+
+
+def run(runs, modes, output):
+    results = {}
+    print(f"median of {runs} fresh processes, seconds since launch")
+    print(f"{'mode':>12} " + " ".join(f"{name:>16}" for name in MILESTONES))
+    for mode in modes:
+        samples = {name: [] for name in MILESTONES}
+        for _ in range(runs):
+            for phase in ("readiness", "requests"):
+                for name, seconds in launch(mode, phase).items():
+                    samples[name].append(seconds)
+        results[mode] = {name: statistics.median(values) for name, values in samples.items() if values}
+        print(f"{mode:>12} " + " ".join(f"{results[mode].get(name, float('nan')):>16.3f}" for name in MILESTONES))
+
+    if output:
+        with open(output, "w") as handle:
+            json.dump({"runs": runs, "python": sys.version.split()[0], "results": results}, handle, indent=2)
+        print(f"wrote {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=MODES)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--importtime", type=int, nargs="?", const=15, default=None,
+                        help="print the N slowest imports of app instead")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child()
+    elif args.importtime:
+        importtime(args.importtime)
+    else:
+        run(args.runs, args.modes, args.output)
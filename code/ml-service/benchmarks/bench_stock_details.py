@@ -0,0 +1,102 @@
+# benchmarks/bench_stock_details.py
+"""
+Compare per-recommendation get_stock_details calls with the bulk, cached
+StockDetailsClient path, against local stub data services with simulated
+round-trip latency.
+
+Run from code/ml-service:
+    python -m benchmarks.bench_stock_details --requests 50 --latency 0.02
+"""
+import argparse
+import time
+
+from benchmarks.common import FakeBulkStockDataService, FakeStockDataService, percentile, synthetic_history
+from api.recommend import RecommendationService
+from models.recommendation.rule_based import RuleBasedRecommender
+from services.stock_details import StockDetailsClient
+
+RISK_TOLERANCES = ("conservative", "moderate", "aggressive")
+
+
+def per_symbol(stock_data_service, recommendations):
+    """The old path: one round-trip per recommended symbol."""
+    return {rec["symbol"]: stock_data_service.get_stock_details(rec["symbol"]) for rec in recommendations}
+
+
+def measure(label, num_requests, lookup):
+    latencies = []
+    for index in range(num_requests):
+        start = time.perf_counter()
+        lookup(index)
+        latencies.append(time.perf_counter() - start)
+    print(f"{label:>24} p50 {percentile(latencies, 50) * 1000:>7.2f} ms"
+          f"   p95 {percentile(latencies, 95) * 1000:>7.2f} ms")
+    return latencies
+
+
+def run(num_requests, latency, universe_size, ttl):
+    recommender = RuleBasedRecommender()
+    historical_data = synthetic_history(universe_size)
+    # Each request recommends a different slice of the universe, as different profiles would
+    requests = []
+    for index in range(num_requests):
+        risk_tolerance = RISK_TOLERANCES[index % len(RISK_TOLERANCES)]
+        ranking = recommender.rank_stocks(historical_data, risk_tolerance, "medium")
+        offset = (index * 3) % max(universe_size - 7, 1)
+        requests.append(recommender.allocate(ranking[offset:], risk_tolerance, 10000))
+    rows = sum(len(recommendations) for recommendations in requests)
+
+    print(f"{num_requests} requests, {rows} recommendation rows, {latency * 1000:.0f} ms per round-trip")
+
+    stub = FakeStockDataService(latency=latency)
+    measure("per-symbol", num_requests, lambda i: per_symbol(stub, requests[i]))
+    print(f"{'':>24} {stub.calls} round-trips")
+
+    stub = FakeStockDataService(latency=latency)
+    client = StockDetailsClient(stub, ttl_seconds=0)
+    measure("pooled fan-out", num_requests,
+            lambda i: client.get_stock_details_many(rec["symbol"] for rec in requests[i]))
+    print(f"{'':>24} {stub.calls} calls, {client.stats()['lookups']} lookups")
+    client.shutdown()
+
+    stub = FakeBulkStockDataService(latency=latency)
+    client = StockDetailsClient(stub, ttl_seconds=0)
+    measure("bulk", num_requests,
+            lambda i: client.get_stock_details_many(rec["symbol"] for rec in requests[i]))
+    print(f"{'':>24} {stub.bulk_calls} round-trips")
+
+    stub = FakeBulkStockDataService(latency=latency)
+    client = StockDetailsClient(stub, ttl_seconds=ttl)
+    measure(f"bulk + {ttl:.0f}s quote cache", num_requests,
+            lambda i: client.get_stock_details_many(rec["symbol"] for rec in requests[i]))
+    print(f"{'':>24} {stub.bulk_calls} round-trips, hit ratio {client.stats()['hit_ratio']:.2f}")
+
+    # Formatted responses are unchanged by the bulk path
+    service = RecommendationService(recommender)
+    service.stock_details = StockDetailsClient(FakeBulkStockDataService())
+    expected_service = RecommendationService(recommender)
+    expected_service.stock_details = StockDetailsClient(FakeStockDataService())
+    for recommendations in requests[:5]:
+        assert (service._format_recommendations(recommendations)
+                == expected_service._format_recommendations(recommendations))
+
+    # The batch endpoint makes one lookup per profile at most, none once symbols are known
+    stub = FakeBulkStockDataService(latency=latency)
+    service.stock_details = StockDetailsClient(stub, ttl_seconds=0)
+    profiles = [{"risk_tolerance": RISK_TOLERANCES[index % 3], "time_horizon": "medium", "budget": 10000}
+                for index in range(num_requests)]
+    start = time.perf_counter()
+    results = list(service.generate_batch_recommendations(profiles))
+    elapsed = time.perf_counter() - start
+    assert all("recommendations" in result for result in results)
+    print(f"{'batch of ' + str(num_requests):>24} {elapsed * 1000:>9.1f} ms total, {stub.bulk_calls} round-trips")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--universe", type=int, default=40)
+    parser.add_argument("--ttl", type=float, default=15.0)
+    args = parser.parse_args()
+    run(args.requests, args.latency, args.universe, args.ttl)
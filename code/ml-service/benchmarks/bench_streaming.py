@@ -0,0 +1,72 @@
+# benchmarks/bench_streaming.py
+"""
+Throughput of StreamingIndicators updates (ticks/second), with a check that
+the streamed values match the pandas indicators on the same bars.
+
+Run from code/ml-service:
+    python -m benchmarks.bench_streaming --symbols 1000 --ticks 500
+"""
+import argparse
+import math
+import time
+
+import numpy as np
+import pandas as pd
+
+from models.recommendation.rule_based import RuleBasedRecommender
+from models.recommendation.streaming import StreamingIndicators
+
+COLUMNS = ["ma_5", "ma_10", "ma_20", "rsi", "ema_12", "ema_26", "macd", "macd_signal"]
+
+
+def check_equivalence(closes, window):
+    recommender = RuleBasedRecommender(vectorized=False)
+    state = StreamingIndicators.from_closes(closes, window)
+
+    expected = recommender._calculate_indicators(pd.DataFrame({"close": closes})).iloc[-1]
+    actual = state.snapshot()
+    for column in COLUMNS:
+        assert math.isclose(expected[column], actual[column], rel_tol=1e-9, abs_tol=1e-9), column
+
+    frame = pd.DataFrame({"close": closes[-window:]})
+    for risk_tolerance in ("conservative", "moderate", "aggressive"):
+        for time_horizon in ("short", "medium", "long"):
+            assert (recommender._analyze_stock("X", frame, risk_tolerance, time_horizon)
+                    == recommender._analyze_stock("X", state, risk_tolerance, time_horizon))
+
+
+def run(num_symbols, num_ticks, window, seed):
+    rng = np.random.default_rng(seed)
+    paths = 100 * np.cumprod(1 + rng.normal(0.0005, 0.01, (num_ticks, num_symbols)), axis=0)
+
+    for column in range(min(num_symbols, 20)):
+        check_equivalence(paths[:, column], window)
+
+    states = [StreamingIndicators(window) for _ in range(num_symbols)]
+    rows = paths.tolist()
+
+    start = time.perf_counter()
+    for row in rows:
+        for state, close in zip(states, row):
+            state.update(close)
+    elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for state in states:
+        state.snapshot()
+    snapshot_elapsed = time.perf_counter() - start
+
+    ticks = num_symbols * num_ticks
+    print(f"{num_symbols} symbols x {num_ticks} bars (window {window})")
+    print(f"updates:   {ticks / elapsed:>12,.0f} ticks/s ({elapsed * 1e6 / ticks:.2f} us/tick)")
+    print(f"snapshots: {num_symbols / snapshot_elapsed:>12,.0f} symbols/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--symbols", type=int, default=1000)
+    parser.add_argument("--ticks", type=int, default=500)
+    parser.add_argument("--window", type=int, default=31)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run(args.symbols, args.ticks, args.window, args.seed)
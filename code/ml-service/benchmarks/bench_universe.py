@@ -0,0 +1,85 @@
+# benchmarks/bench_universe.py
+"""
+Universe selection with UniverseIndex bitmaps versus filtering Python lists,
+on a synthetic universe with sector preferences and many exclusions.
+
+Run from code/ml-service:
+    python -m benchmarks.bench_universe --symbols 10000 --exclusions 1000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.common import percentile, time_call
+from services.universe_index import RISK_BUCKETS, VOLATILITY_BUCKETS, UniverseIndex
+
+SECTORS = [
+    "Technology", "Healthcare", "Financials", "Consumer Staples", "Consumer Discretionary",
+    "Communication Services", "Industrials", "Energy", "Utilities", "Materials", "Real Estate",
+]
+
+
+def synthetic_universe(num_symbols, seed):
+    rng = np.random.default_rng(seed)
+    return [
+        (
+            f"SYM{index:05d}",
+            SECTORS[rng.integers(len(SECTORS))],
+            float(rng.lognormal(3, 1.5)),
+            VOLATILITY_BUCKETS[rng.integers(len(VOLATILITY_BUCKETS))],
+            float(rng.lognormal(4, 1.5)),
+        )
+        for index in range(num_symbols)
+    ]
+
+
+def list_select(records, risk_tolerance, sectors, exclusions):
+    """Baseline: list comprehensions with a list membership scan for exclusions."""
+    allowed = RISK_BUCKETS[risk_tolerance]
+    universe = [record for record in records if record[3] in allowed]
+    if sectors:
+        universe = [record for record in universe if record[1] in sectors]
+    if exclusions:
+        universe = [record for record in universe if record[0] not in exclusions and record[1] not in exclusions]
+    return [record[0] for record in universe]
+
+
+def report(label, durations):
+    print(f"{label:>28} p50 {percentile(durations, 50) * 1e6:>10.1f} us   p95 {percentile(durations, 95) * 1e6:>10.1f} us")
+
+
+def run(num_symbols, num_exclusions, repeat, seed):
+    records = synthetic_universe(num_symbols, seed)
+    rng = np.random.default_rng(seed + 1)
+    exclusions = [records[i][0] for i in rng.choice(num_symbols, num_exclusions, replace=False)] + ["Energy"]
+    sectors = ["Technology", "Healthcare", "Financials"]
+
+    start = time.perf_counter()
+    index = UniverseIndex(records)
+    print(f"{num_symbols} symbols, {num_exclusions} excluded symbols + 1 excluded sector, 3 preferred sectors")
+    print(f"{'index build':>28} {(time.perf_counter() - start) * 1000:>10.1f} ms")
+
+    for risk_tolerance in ("conservative", "moderate", "aggressive"):
+        expected = list_select(records, risk_tolerance, sectors, exclusions)
+        assert index.select(risk_tolerance, sectors, exclusions) == expected, risk_tolerance
+
+    report("list filter", time_call(lambda: list_select(records, "moderate", sectors, exclusions), repeat))
+    report("list filter (set exclusions)",
+           time_call(lambda: list_select(records, "moderate", sectors, set(exclusions)), repeat))
+    report("index: risk only", time_call(lambda: index.select("moderate"), repeat))
+    report("index: + sectors", time_call(lambda: index.select("moderate", sectors), repeat))
+    report("index: + sectors/exclusions", time_call(lambda: index.select("moderate", sectors, exclusions), repeat))
+    report("index: + market-cap floor",
+           time_call(lambda: index.select("moderate", sectors, exclusions, min_market_cap=20.0), repeat))
+    print(f"{'selected':>28} {len(index.select('moderate', sectors, exclusions))} symbols")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--symbols", type=int, default=10000)
+    parser.add_argument("--exclusions", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run(args.symbols, args.exclusions, args.repeat, args.seed)
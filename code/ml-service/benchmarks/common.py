@@ -0,0 +1,146 @@
+# benchmarks/common.py
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+# Keep service INFO logging out of the timings
+logging.disable(logging.INFO)
+
+
+def synthetic_history(num_symbols: int, num_days: int = 30, seed: int = 42) -> Dict[str, pd.DataFrame]:
+    """
+    Build historical data shaped like RecommendationService._fetch_historical_data.
+
+    Uses a fixed seed so that every run scores the same universe.
+    """
+    rng = np.random.default_rng(seed)
+    end_date = datetime(2025, 1, 31)
+    dates = pd.date_range(start=end_date - timedelta(days=num_days), end=end_date)
+
+    historical_data = {}
+    for index in range(num_symbols):
+        base_price = rng.integers(50, 500)
+        prices = np.linspace(base_price, base_price * (1 + rng.uniform(-0.2, 0.3)), len(dates))
+        prices = prices * (1 + rng.normal(0, 0.01, len(dates)))
+        volumes = rng.integers(1000000, 10000000, len(dates))
+
+        historical_data[f"SYM{index:05d}"] = pd.DataFrame({
+            'date': dates,
+            'open': prices * 0.99,
+            'high': prices * 1.02,
+            'low': prices * 0.98,
+            'close': prices,
+            'volume': volumes
+        })
+
+    return historical_data
+
+
+def time_call(func: Callable[[], object], repeat: int = 5) -> List[float]:
+    """Run func `repeat` times and return the wall-clock duration of each call in seconds."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def percentile(durations: List[float], pct: float) -> float:
+    """Return the given percentile of a list of durations."""
+    return float(np.percentile(durations, pct))
+
+
+HEADLINE_WORDS = [
+    # sentiment lexicon
+    "up", "gain", "profit", "growth", "beat", "strong", "record", "bullish", "recovery",
+    "down", "loss", "decline", "miss", "weak", "bearish", "warning", "risk", "slowdown",
+    # key terms
+    "earnings", "revenue", "dividend", "guidance", "outlook", "downgrade", "upgrade",
+    "merger", "layoffs", "CEO", "Fed", "interest rates", "inflation", "recession",
+    "bull market", "bear market", "volatility", "rally", "correction",
+    # filler
+    "shares", "company", "quarter", "analysts", "investors", "report", "said", "after",
+    "the", "a", "on", "as", "in", "for", "stock", "market", "sector", "year", "Q3",
+]
+
+
+def synthetic_headlines(count: int, min_words: int = 6, max_words: int = 14, seed: int = 42) -> List[str]:
+    """Build a reproducible corpus of financial-news style headlines."""
+    rng = np.random.default_rng(seed)
+    symbols = ["AAPL", "MSFT", "TSLA", "NVDA", "AMZN", "JNJ", "KO", "PLTR"]
+    headlines = []
+    for _ in range(count):
+        words = rng.choice(HEADLINE_WORDS, size=rng.integers(min_words, max_words + 1))
+        headlines.append(f"{rng.choice(symbols)}: " + " ".join(words).capitalize() + ".")
+    return headlines
+
+
+class FakeNewsService:
+    """
+    Local stand-in for services.news_service.NewsService with injected latency.
+
+    get_news sleeps for `latency` seconds (blocking, like a real HTTP client)
+    and returns `articles` synthetic items per symbol. Symbols listed in
+    `failing` raise instead, and symbols listed in `slow` take ten times longer.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        articles: int = 5,
+        failing: List[str] = (),
+        slow: List[str] = (),
+        seed: int = 42
+    ):
+        self.latency = latency
+        self.articles = articles
+        self.failing = set(failing)
+        self.slow = set(slow)
+        self.headlines = synthetic_headlines(1000, seed=seed)
+        self.calls = 0
+
+    def get_news(self, symbol: str, sources=None, days: int = 7) -> List[Dict[str, str]]:
+        self.calls += 1
+        time.sleep(self.latency * (10 if symbol in self.slow else 1))
+        if symbol in self.failing:
+            raise RuntimeError(f"news provider error for {symbol}")
+
+        offset = sum(map(ord, symbol)) % len(self.headlines)
+        return [
+            {"title": f"{symbol} headline {i}", "content": self.headlines[(offset + i) % len(self.headlines)]}
+            for i in range(self.articles)
+        ]
+
+
+class FakeStockDataService:
+    """Local stand-in for services.stock_data.StockDataService with injected latency."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def get_stock_details(self, symbol: str) -> Dict[str, object]:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return {"symbol": symbol, "name": f"{symbol} Inc.", "current_price": 100.0 + len(symbol)}
+
+
+class FakeBulkStockDataService(FakeStockDataService):
+    """FakeStockDataService that also offers a bulk lookup costing one round-trip."""
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__(latency)
+        self.bulk_calls = 0
+
+    def get_stock_details_many(self, symbols: List[str]) -> Dict[str, Dict[str, object]]:
+        self.bulk_calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return {symbol: {"symbol": symbol, "name": f"{symbol} Inc.", "current_price": 100.0 + len(symbol)}
+                for symbol in symbols}
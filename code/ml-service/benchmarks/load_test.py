@@ -0,0 +1,97 @@
+# benchmarks/load_test.py
+"""
+Concurrent mixed-traffic load test against the FastAPI app, in process.
+
+Clients hit /recommend, /news-sentiment and /health concurrently through an
+ASGI transport, and per-endpoint p50/p99 latency is reported. Run it once
+with the old blocking behaviour and once with the executor to compare:
+
+    python -m benchmarks.load_test --executor inline
+    python -m benchmarks.load_test --executor thread
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from collections import defaultdict
+
+import httpx
+
+from benchmarks.common import FakeNewsService, FakeStockDataService, percentile
+
+RECOMMEND_BODY = {"risk_tolerance": "moderate", "budget": 10000, "time_horizon": "medium"}
+SENTIMENT_BODY = {"symbols": ["AAPL", "MSFT", "NVDA", "TSLA", "AMZN"]}
+
+
+def load_app(executor, workers, queue, news_latency, per_symbol):
+    os.environ["ML_EXECUTOR"] = executor
+    os.environ["ML_EXECUTOR_QUEUE"] = str(queue)
+    if workers:
+        os.environ["ML_EXECUTOR_WORKERS"] = str(workers)
+
+    import app as app_module
+
+    # Local fakes for external providers; ttl=0 makes every request do the full data + indicator work
+    app_module.recommendation_service.stock_details.stock_data_service = FakeStockDataService()
+    app_module.recommendation_service.price_store.ttl_seconds = 0
+    # The per-symbol pandas path stands in for a heavier, fully CPU-bound request
+    app_module.recommendation_service.recommender.vectorized = not per_symbol
+    app_module.sentiment_service.news_service = FakeNewsService(latency=news_latency)
+    return app_module.app
+
+
+async def client_loop(client, deadline, latencies, statuses, rng):
+    while time.perf_counter() < deadline:
+        roll = rng.random()
+        start = time.perf_counter()
+        if roll < 0.4:
+            endpoint = "/recommend"
+            response = await client.post(endpoint, json=RECOMMEND_BODY)
+        elif roll < 0.8:
+            endpoint = "/news-sentiment"
+            response = await client.post(endpoint, json=SENTIMENT_BODY)
+        else:
+            endpoint = "/health"
+            response = await client.get(endpoint)
+        latencies[endpoint].append(time.perf_counter() - start)
+        statuses[(endpoint, response.status_code)] += 1
+
+
+async def run(args):
+    app = load_app(args.executor, args.workers, args.queue, args.news_latency, args.per_symbol)
+    latencies = defaultdict(list)
+    statuses = defaultdict(int)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+        deadline = time.perf_counter() + args.duration
+        await asyncio.gather(*(
+            client_loop(client, deadline, latencies, statuses, random.Random(args.seed + index))
+            for index in range(args.clients)
+        ))
+
+    print(f"executor={args.executor} clients={args.clients} duration={args.duration}s")
+    print(f"{'endpoint':>16} {'requests':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for endpoint in ("/recommend", "/news-sentiment", "/health"):
+        samples = latencies[endpoint]
+        if samples:
+            print(f"{endpoint:>16} {len(samples):>9} "
+                  f"{percentile(samples, 50) * 1000:>9.1f} {percentile(samples, 99) * 1000:>9.1f}")
+    for (endpoint, status), count in sorted(statuses.items()):
+        if status != 200:
+            print(f"{endpoint} -> HTTP {status}: {count}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--executor", choices=["inline", "thread", "process"], default="thread")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--queue", type=int, default=32)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--news-latency", type=float, default=0.02)
+    parser.add_argument("--per-symbol", action="store_true",
+                        help="use the per-symbol pandas recommender for heavier CPU load")
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(run(parser.parse_args()))
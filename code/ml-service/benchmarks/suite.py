@@ -0,0 +1,293 @@
+# benchmarks/suite.py
+"""
+Reproducible benchmark suite for the ml-service hot paths.
+
+Every case uses fixed seeds and reports calls/s, items/s, latency
+percentiles and peak traced memory. Results are written to JSON, and
+--compare flags cases whose p50 latency or peak memory regressed beyond
+--threshold against a saved baseline (exit status 1 if any did).
+
+Run from code/ml-service:
+    python -m benchmarks.suite --output baseline.json
+    python -m benchmarks.suite --compare baseline.json --output current.json
+    python -m benchmarks.suite --input current.json --compare baseline.json
+    python -m benchmarks.suite --quick --only recommender
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import FakeNewsService, FakeStockDataService, percentile, synthetic_headlines, synthetic_history
+
+# A case is built by a factory returning (call, items processed per call)
+CaseFactory = Callable[[], Tuple[Callable[[], Any], int]]
+
+# Metrics where larger means worse, checked by --compare
+REGRESSION_METRICS = ("p50_ms", "peak_memory_mb")
+
+
+def measure(call: Callable[[], Any], items: int, min_time: float, min_repeat: int, max_repeat: int) -> Dict[str, Any]:
+    """Time `call` until both min_time and min_repeat are reached, then trace one more call's memory."""
+    call()  # warm-up: imports, caches, lazily built tables
+
+    gc.collect()
+    latencies = []
+    started = time.perf_counter()
+    while len(latencies) < max_repeat and (
+        len(latencies) < min_repeat or time.perf_counter() - started < min_time
+    ):
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+    total = sum(latencies)
+
+    gc.collect()
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "repeat": len(latencies),
+        "items_per_call": items,
+        "calls_per_s": round(len(latencies) / total, 3),
+        "items_per_s": round(len(latencies) * items / total, 3),
+        "mean_ms": round(total / len(latencies) * 1000, 4),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 4),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 4),
+        "peak_memory_mb": round(peak / 2 ** 20, 3),
+    }
+
+
+def recommender_case(universe_size: int, window_days: int, seed: int) -> CaseFactory:
+    def factory():
+        from models.recommendation.rule_based import RuleBasedRecommender
+
+        recommender = RuleBasedRecommender()
+        historical_data = synthetic_history(universe_size, num_days=window_days, seed=seed)
+
+        def call():
+            # Score from scratch every time; the cache is benchmarked end to end
+            recommender.score_cache.invalidate()
+            return recommender.generate_recommendations(historical_data, "moderate", "medium", 10000)
+
+        return call, universe_size
+
+    return factory
+
+
+def indicators_case(window_days: int, seed: int) -> CaseFactory:
+    def factory():
+        from models.recommendation.rule_based import RuleBasedRecommender
+
+        recommender = RuleBasedRecommender(vectorized=False)
+        data = next(iter(synthetic_history(1, num_days=window_days, seed=seed).values()))
+        return (lambda: recommender._calculate_indicators(data.copy())), 1
+
+    return factory
+
+
+def analyze_case(min_words: int, max_words: int, count: int, seed: int) -> CaseFactory:
+    def factory():
+        from models.sentiment.transformer_model import TransformerSentimentAnalyzer
+
+        analyzer = TransformerSentimentAnalyzer()
+        texts = synthetic_headlines(count, min_words=min_words, max_words=max_words, seed=seed)
+
+        def call():
+            return [analyzer.analyze(text) for text in texts]
+
+        return call, count
+
+    return factory
+
+
+def analyze_batch_case(count: int, seed: int) -> CaseFactory:
+    def factory():
+        from models.sentiment.transformer_model import TransformerSentimentAnalyzer
+
+        analyzer = TransformerSentimentAnalyzer()
+        texts = synthetic_headlines(count, seed=seed)
+        return (lambda: analyzer.analyze_batch(texts)), count
+
+    return factory
+
+
+def analyze_sentiment_case(num_symbols: int, seed: int) -> CaseFactory:
+    def factory():
+        from api.sentiment import SentimentAnalysisService
+        from models.sentiment.transformer_model import TransformerSentimentAnalyzer
+
+        service = SentimentAnalysisService(
+            TransformerSentimentAnalyzer(),
+            news_service=FakeNewsService(latency=0.0, seed=seed)
+        )
+        symbols = [f"SYM{index:03d}" for index in range(num_symbols)]
+        return (lambda: service.analyze_sentiment(symbols=symbols)), num_symbols
+
+    return factory
+
+
+def endpoint_case(path: str, body: Dict[str, Any], seed: int) -> CaseFactory:
+    def factory():
+        import httpx
+
+        app_module = load_app(seed)
+        loop = asyncio.new_event_loop()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app_module.app), base_url="http://bench")
+
+        def call():
+            response = loop.run_until_complete(client.post(path, json=body))
+            response.raise_for_status()
+            return response
+
+        return call, 1
+
+    return factory
+
+
+_app_module = None
+
+
+def load_app(seed: int):
+    """Import the FastAPI app once, with local fakes for the external providers."""
+    global _app_module
+    if _app_module is None:
+        os.environ.setdefault("ML_EXECUTOR", "inline")
+        np.random.seed(seed)  # the synthetic bar fetcher draws from the global generator
+        import app as app_module
+
+        app_module.recommendation_service.stock_details.stock_data_service = FakeStockDataService()
+        app_module.sentiment_service.news_service = FakeNewsService(latency=0.0, seed=seed)
+        _app_module = app_module
+    return _app_module
+
+
+def build_cases(quick: bool, seed: int) -> Dict[str, CaseFactory]:
+    universe_sizes = (10, 100) if quick else (10, 100, 1000)
+    windows = (30, 90) if quick else (30, 90, 250)
+
+    cases = {}
+    for universe_size in universe_sizes:
+        for window_days in windows:
+            cases[f"recommender.generate[u={universe_size},w={window_days}]"] = \
+                recommender_case(universe_size, window_days, seed)
+    for window_days in windows:
+        cases[f"recommender.calculate_indicators[w={window_days}]"] = indicators_case(window_days, seed)
+
+    cases["sentiment.analyze[short]"] = analyze_case(4, 12, 200, seed)
+    cases["sentiment.analyze[long]"] = analyze_case(150, 400, 20, seed)
+    cases["sentiment.analyze_batch[n=2000]"] = analyze_batch_case(2000, seed)
+    cases["sentiment.analyze_sentiment[symbols=20]"] = analyze_sentiment_case(20, seed)
+
+    cases["endpoint./recommend"] = endpoint_case(
+        "/recommend", {"risk_tolerance": "moderate", "budget": 10000, "time_horizon": "medium"}, seed
+    )
+    cases["endpoint./news-sentiment"] = endpoint_case(
+        "/news-sentiment", {"symbols": ["AAPL", "MSFT", "NVDA", "TSLA", "AMZN"]}, seed
+    )
+    return cases
+
+
+def run_suite(args) -> Dict[str, Any]:
+    cases = build_cases(args.quick, args.seed)
+    results = {}
+    for name, factory in cases.items():
+        if args.only and not any(pattern in name for pattern in args.only):
+            continue
+        np.random.seed(args.seed)
+        call, items = factory()
+        results[name] = measure(call, items, args.min_time, args.min_repeat, args.max_repeat)
+        row = results[name]
+        print(f"{name:<48} p50 {row['p50_ms']:>10.3f} ms   p99 {row['p99_ms']:>10.3f} ms   "
+              f"{row['items_per_s']:>12,.1f} items/s   peak {row['peak_memory_mb']:>8.2f} MB")
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "seed": args.seed,
+            "quick": args.quick,
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Return one message per metric that got worse than baseline by more than `threshold`."""
+    regressions = []
+    print(f"\n{'case':<48} {'metric':<16} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name, row in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        for metric in REGRESSION_METRICS:
+            old, new = base.get(metric), row.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            flag = ""
+            if change > threshold:
+                flag = "  REGRESSION"
+                regressions.append(f"{name} {metric}: {old} -> {new} ({change:+.1%})")
+            print(f"{name:<48} {metric:<16} {old:>12.3f} {new:>12.3f} {change:>+9.1%}{flag}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--input", help="compare an existing results file instead of running")
+    parser.add_argument("--compare", help="baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative slowdown / memory growth treated as a regression")
+    parser.add_argument("--only", nargs="*", help="run only cases whose name contains one of these")
+    parser.add_argument("--quick", action="store_true", help="smaller universes and windows")
+    parser.add_argument("--min-time", type=float, default=1.0, help="seconds to spend timing each case")
+    parser.add_argument("--min-repeat", type=int, default=5)
+    parser.add_argument("--max-repeat", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    if args.input:
+        with open(args.input) as f:
+            current = json.load(f)
+    else:
+        current = run_suite(args)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"\nwrote {len(current['results'])} results to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for message in regressions:
+                print(f"  {message}")
+            return 1
+        print(f"\nno regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
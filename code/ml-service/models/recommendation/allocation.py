@@ -0,0 +1,502 @@
+# models/recommendation/allocation.py
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models.recommendation.indicators import BARS_PER_YEAR, TRADING_DAYS, pack_closes
+
+logger = logging.getLogger(__name__)
+
+# Per-profile limits: risk aversion of the mean-variance objective, and the
+# largest share of the budget a single stock / a single sector may take
+PROFILE_LIMITS = {
+    "conservative": {"risk_aversion": 12.0, "max_weight": 0.40, "sector_cap": 0.50},
+    "moderate": {"risk_aversion": 6.0, "max_weight": 0.30, "sector_cap": 0.45},
+    "aggressive": {"risk_aversion": 3.0, "max_weight": 0.25, "sector_cap": 0.40},
+}
+
+
+class ShrunkCovariance:
+    """
+    Ledoit-Wolf shrinkage of the sample covariance towards a scaled identity,
+    (1 - shrinkage) * X'X / T + shrinkage * mu * I for centered returns X.
+
+    The shrinkage intensity is the estimated share of the sample
+    covariance's distance from the target that is estimation noise, so short
+    histories of many stocks are pulled harder towards the target. The
+    matrix is kept in that factor form: products cost O(T x N) and only the
+    blocks the solver needs are materialized, never the full N x N matrix.
+    """
+
+    __slots__ = ("centered", "num_bars", "shrinkage", "mu", "scale", "variances")
+
+    def __init__(self, returns: np.ndarray, scale: float = 1.0):
+        """
+        Args:
+            returns: (T, N) array of per-bar returns, T >= 2
+            scale: Factor applied to the covariance (bars per year to annualize)
+        """
+        num_bars, num_assets = returns.shape
+        centered = returns - returns.mean(axis=0)
+        squared = centered ** 2
+        self.variances = squared.sum(axis=0) / num_bars
+        mu = self.variances.mean()
+
+        # ||S||^2 from the T x T Gram matrix, which is far smaller than S for wide universes
+        gram = centered @ centered.T
+        sample_norm = np.sum(gram ** 2) / num_bars ** 2
+        # Squared distance of the sample covariance from the target...
+        delta = (sample_norm - 2 * mu * self.variances.sum() + num_assets * mu ** 2) / num_assets
+        # ...and the part of it explained by noise (mean of ||x_t x_t' - S||^2 over bars, / T)
+        beta = (np.sum(squared.sum(axis=1) ** 2) / num_bars - sample_norm) / (num_bars * num_assets)
+        beta = min(beta, delta)
+
+        self.shrinkage = float(beta / delta) if delta > 0 else 1.0
+        self.centered = centered
+        self.num_bars = num_bars
+        self.mu = float(mu)
+        self.scale = scale
+        self.variances = self.variances * scale
+
+    def dot(self, weights: np.ndarray) -> np.ndarray:
+        """Covariance times a weight vector."""
+        sample = self.centered.T @ (self.centered @ weights) / self.num_bars
+        return self.scale * ((1 - self.shrinkage) * sample + self.shrinkage * self.mu * weights)
+
+    def block(self, index: np.ndarray) -> np.ndarray:
+        """The covariance among the stocks at index, as a dense matrix."""
+        columns = self.centered[:, index]
+        block = (1 - self.shrinkage) * (columns.T @ columns) / self.num_bars
+        block[np.diag_indices(len(index))] += self.shrinkage * self.mu
+        return self.scale * block
+
+
+def _shift(values: np.ndarray, upper: np.ndarray, target: float) -> float:
+    """
+    The shift t with sum(clip(values - t, 0, upper)) == target (> 0), or -inf if sum(upper) < target.
+
+    The sum is piecewise linear and non-increasing in t, with breakpoints at
+    values_i (stock i starts to count) and values_i - upper_i (stock i is
+    full), so the root is found exactly from the sorted breakpoints.
+    """
+    points = np.concatenate((values, values - upper))
+    order = np.argsort(-points)
+    points = points[order]
+    # Stocks in their linear part just below each point, and the sum at each point
+    active = np.cumsum(np.where(order < len(values), 1.0, -1.0))
+    level = np.zeros(len(points))
+    np.cumsum(active[:-1] * (points[:-1] - points[1:]), out=level[1:])
+
+    k = int(np.searchsorted(level, target)) - 1
+    if k == len(points) - 1:
+        return -np.inf
+    return points[k] - (target - level[k]) / active[k]
+
+
+def project_capped_simplex(values: np.ndarray, upper: np.ndarray, groups: np.ndarray, caps: np.ndarray) -> np.ndarray:
+    """
+    Euclidean projection onto {w : sum(w) = 1, 0 <= w <= upper, sum of w over group g <= caps[g]}.
+
+    From the KKT conditions, w_i = clip(values_i - max(tau, rho_g), 0, upper_i)
+    where rho_g is the shift that fills group g exactly to its cap. That is
+    clip(values_i - tau, 0, upper'_i) with upper'_i = clip(values_i - rho_g,
+    0, upper_i), and rho_g only matters for groups over their cap, so rho_g
+    is computed for the groups found over it (usually none or one) until
+    the projection meets every cap.
+    """
+    return _project(values, upper, groups, caps, np.zeros(len(caps), dtype=bool))[0]
+
+
+def _project(
+    values: np.ndarray,
+    upper: np.ndarray,
+    groups: np.ndarray,
+    caps: np.ndarray,
+    binding: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """project_capped_simplex starting from the groups already known to bind (any superset is exact)."""
+    while True:
+        bounds = upper
+        if binding.any():
+            bounds = upper.copy()
+            for group in np.flatnonzero(binding):
+                members = groups == group
+                rho = _shift(values[members], upper[members], caps[group])
+                bounds[members] = np.clip(values[members] - rho, 0.0, upper[members])
+        weights = np.clip(values - _shift(values, bounds, 1.0), 0.0, bounds)
+        over = (np.bincount(groups, weights, len(caps)) > caps + 1e-12) & ~binding
+        if not over.any():
+            return weights, binding
+        binding = binding | over
+
+
+def solve_mean_variance(
+    expected: np.ndarray,
+    cov: np.ndarray,
+    risk_aversion: float,
+    upper: np.ndarray,
+    groups: np.ndarray,
+    caps: np.ndarray,
+    tol: float = 1e-6,
+    max_iter: int = 2000,
+    start: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, int]:
+    """
+    Maximize expected @ w - risk_aversion / 2 * w @ cov @ w over fully invested,
+    long-only weights with per-stock and per-group caps.
+
+    Accelerated projected gradient (FISTA with adaptive restart); every
+    iteration is one matrix-vector product plus an exact projection.
+    Starts from `start` (projected) if given, else from equal weights.
+
+    Returns:
+        Tuple of (weights, iterations used)
+    """
+    num_assets = len(expected)
+    lipschitz = risk_aversion * np.linalg.eigvalsh(cov)[-1]
+    step = 1.0 / lipschitz if lipschitz > 0 else 1.0
+
+    if start is None:
+        start = np.full(num_assets, 1.0 / num_assets)
+    # Groups over their cap stay in the projections' binding set, which settles after a few iterations
+    weights, binding = _project(start, upper, groups, caps, np.zeros(len(caps), dtype=bool))
+    momentum_point = weights
+    t = 1.0
+    for iteration in range(1, max_iter + 1):
+        gradient = risk_aversion * (cov @ momentum_point) - expected
+        updated, binding = _project(momentum_point - step * gradient, upper, groups, caps, binding)
+        change = updated - weights
+        if np.max(np.abs(change)) < tol:
+            return updated, iteration
+        # Restart the momentum as soon as it points uphill
+        if np.dot(momentum_point - updated, change) > 0:
+            t = 1.0
+        t_next = (1 + np.sqrt(1 + 4 * t * t)) / 2
+        momentum_point = updated + ((t - 1) / t_next) * change
+        weights, t = updated, t_next
+    return weights, max_iter
+
+
+def solve_working_set(
+    expected: np.ndarray,
+    cov: ShrunkCovariance,
+    risk_aversion: float,
+    upper: np.ndarray,
+    groups: np.ndarray,
+    caps: np.ndarray,
+    initial_size: int = 32,
+    tol: float = 1e-6,
+    max_iter: int = 2000,
+    max_rounds: int = 20
+) -> Tuple[np.ndarray, int]:
+    """
+    solve_mean_variance over a large universe whose solution holds few stocks.
+
+    The problem is solved densely over a working set (initially the best
+    expected returns, enough of them to fill the budget under the caps),
+    then one projected-gradient step over the whole universe checks
+    optimality: the step leaves an optimal portfolio unchanged, and the
+    stocks it buys join the working set for the next round, which starts
+    from the previous solution. Each check is one O(T x N) product and one
+    projection.
+
+    Returns:
+        Tuple of (weights over the whole universe, rounds used)
+    """
+    num_assets = len(expected)
+    active = _initial_working_set(expected, upper, groups, caps, initial_size)
+    weights = np.zeros(num_assets)
+    for rounds in range(1, max_rounds + 1):
+        block = cov.block(active)
+        weights[active], _ = solve_mean_variance(
+            expected[active], block, risk_aversion, upper[active], groups[active], caps, tol, max_iter,
+            start=weights[active] if rounds > 1 else None
+        )
+        if len(active) == num_assets:
+            break
+        step = 1.0 / (risk_aversion * np.linalg.eigvalsh(block)[-1])
+        gradient = risk_aversion * cov.dot(weights) - expected
+        stepped = project_capped_simplex(weights - step * gradient, upper, groups, caps)
+        entering = np.flatnonzero(stepped > tol)
+        entering = entering[~np.isin(entering, active)]
+        if len(entering) == 0:
+            break
+        active = np.union1d(active, entering)
+    return weights, rounds
+
+
+def _initial_working_set(expected: np.ndarray, upper: np.ndarray, groups: np.ndarray, caps: np.ndarray, size: int) -> np.ndarray:
+    """The best `size` expected returns, extended until they can hold the whole budget under the caps."""
+    order = np.argsort(-expected, kind="stable")
+    ordered_groups = groups[order]
+    ordered_upper = upper[order]
+
+    # Room each stock adds: its own cap, limited by what its sector's better stocks left
+    by_group = np.argsort(ordered_groups, kind="stable")
+    sorted_groups = ordered_groups[by_group]
+    filled = np.cumsum(ordered_upper[by_group]) - ordered_upper[by_group]
+    filled -= filled[np.searchsorted(sorted_groups, sorted_groups)]
+    before = np.empty(len(order))
+    before[by_group] = filled
+    room = np.clip(caps[ordered_groups] - before, 0.0, ordered_upper)
+
+    needed = int(np.searchsorted(np.cumsum(room), 1.0 - 1e-9)) + 1
+    return np.sort(order[:max(size, needed)])
+
+
+def feasible_limits(groups: np.ndarray, num_groups: int, max_weight: float, sector_cap: float) -> Tuple[float, float]:
+    """
+    Relax (max_weight, sector_cap) just enough for the candidates to hold the whole budget.
+
+    Few candidates or sectors (e.g. a single preferred sector) cannot be
+    fully invested under the profile's caps; max_weight is raised to at
+    least 1/N and sector_cap to the smallest cap that still fits.
+    """
+    max_weight = max(max_weight, 1.0 / len(groups))
+    capacities = np.sort(np.bincount(groups, minlength=num_groups) * max_weight)
+    capacities = capacities[capacities > 0]
+    if np.minimum(capacities, sector_cap).sum() >= 1.0:
+        return max_weight, sector_cap
+
+    filled = 0.0
+    for index, capacity in enumerate(capacities):
+        cap = (1.0 - filled) / (len(capacities) - index)
+        if cap <= capacity:
+            return max_weight, cap
+        filled += capacity
+    return max_weight, float(capacities[-1])
+
+
+def round_to_lots(weights: np.ndarray, prices: np.ndarray, budget: float, lot_size: int) -> np.ndarray:
+    """
+    Turn target weights into whole lots of shares that fit in the budget.
+
+    Every stock first gets the whole lots below its target; leftover cash
+    then buys single lots for the stocks furthest below target, while at
+    least half a lot short of it, so each position stays within half a lot
+    of its target.
+
+    Returns:
+        Number of shares per stock
+    """
+    lot_cost = prices * lot_size
+    targets = weights * budget
+    lots = np.floor(targets / lot_cost)
+    cash = budget - float(lots @ lot_cost)
+
+    while True:
+        shortfall = (targets - lots * lot_cost) / lot_cost
+        eligible = (lot_cost <= cash) & (shortfall >= 0.5)
+        if not eligible.any():
+            break
+        index = int(np.argmax(np.where(eligible, shortfall, -np.inf)))
+        lots[index] += 1
+        cash -= lot_cost[index]
+    return (lots * lot_size).astype(np.int64)
+
+
+class CovarianceAllocator:
+    """
+    Sizes recommendations with a covariance-aware, long-only mean-variance
+    optimization instead of making allocations proportional to scores.
+
+    The covariance is a Ledoit-Wolf shrinkage estimate from the last
+    lookback_bars returns of the already fetched histories. Expected returns
+    follow the usual alpha = volatility x score z-score scaling, so a stock's
+    score buys it weight in proportion to the risk it adds. The problem is
+    solved over the whole ranked universe (up to max_candidates) under the
+    profile's max weight and sector cap (PROFILE_LIMITS), then re-solved
+    over the num_picks largest positions, and finally rounded to whole
+    lots of lot_size shares when that still invests the budget.
+    """
+
+    def __init__(
+        self,
+        lookback_bars: int = 252,
+        max_candidates: int = 1000,
+        lot_size: int = 1,
+        limits: Optional[Dict[str, Dict[str, float]]] = None,
+        tol: float = 1e-6,
+        max_iter: int = 2000
+    ):
+        """
+        Args:
+            lookback_bars: Most recent bars whose returns enter the covariance
+            max_candidates: Best-ranked stocks the first solve chooses from
+            lot_size: Shares per lot (0 keeps fractional allocations)
+            limits: Per-risk-tolerance overrides of PROFILE_LIMITS entries
+            tol: Convergence tolerance on the largest weight change
+            max_iter: Iteration cap of each solve
+        """
+        self.lookback_bars = lookback_bars
+        self.max_candidates = max_candidates
+        self.lot_size = lot_size
+        self.limits = {profile: dict(values) for profile, values in PROFILE_LIMITS.items()}
+        for profile, values in (limits or {}).items():
+            self.limits.setdefault(profile, dict(PROFILE_LIMITS["moderate"])).update(values)
+        self.tol = tol
+        self.max_iter = max_iter
+        logger.info(f"CovarianceAllocator initialized (lookback={lookback_bars} bars, lot_size={lot_size})")
+
+    @classmethod
+    def from_env(cls) -> Optional["CovarianceAllocator"]:
+        """Build from ML_ALLOCATION_* env vars, or None if ML_ALLOCATOR=score (score-proportional sizing)."""
+        if os.environ.get("ML_ALLOCATOR", "covariance").lower() == "score":
+            return None
+        return cls(
+            lookback_bars=int(os.environ.get("ML_ALLOCATION_LOOKBACK_BARS", "252")),
+            max_candidates=int(os.environ.get("ML_ALLOCATION_MAX_CANDIDATES", "1000")),
+            lot_size=int(os.environ.get("ML_ALLOCATION_LOT_SIZE", "1"))
+        )
+
+    def allocate(
+        self,
+        analyzed_stocks: List[Dict[str, Any]],
+        historical_data: Dict[str, Any],
+        risk_tolerance: str,
+        budget: float,
+        num_picks: int,
+        sectors: Optional[Dict[str, str]] = None,
+        interval: str = "1d"
+    ) -> Optional[List[Tuple[Dict[str, Any], float, Optional[int]]]]:
+        """
+        Choose and size positions from a ranking.
+
+        Args:
+            analyzed_stocks: Ranking from rank_stocks, best first
+            historical_data: The histories the ranking was scored from
+            risk_tolerance: Selects the PROFILE_LIMITS entry
+            budget: Amount to invest, for lot rounding
+            num_picks: Most positions to hold
+            sectors: Symbol to sector, for the sector caps (no caps if None)
+            interval: Bar interval of historical_data, to annualize the covariance
+
+        Returns:
+            (analysis, weight, shares or None) per position in ranking order, or
+            None if the histories cannot support a covariance (too few bars or
+            candidates, or live streaming states without a close history)
+        """
+        positions = self.plan(analyzed_stocks, historical_data, risk_tolerance, num_picks, sectors, interval)
+        return self.size(positions, budget) if positions is not None else None
+
+    def plan(
+        self,
+        analyzed_stocks: List[Dict[str, Any]],
+        historical_data: Dict[str, Any],
+        risk_tolerance: str,
+        num_picks: int,
+        sectors: Optional[Dict[str, str]] = None,
+        interval: str = "1d"
+    ) -> Optional[List[Tuple[Dict[str, Any], float, float]]]:
+        """
+        The budget-independent part of allocate: the positions and their target weights.
+
+        Returns:
+            (analysis, target weight, latest close) per position in ranking
+            order, or None (see allocate)
+        """
+        candidates = [
+            stock for stock in analyzed_stocks[:self.max_candidates]
+            if "close" in _fields(historical_data.get(stock["symbol"]))
+        ]
+        if len(candidates) < 2:
+            return None
+        symbols, closes, _ = pack_closes({stock["symbol"]: historical_data[stock["symbol"]] for stock in candidates})
+        closes = closes[-(self.lookback_bars + 1):]
+        if closes.shape[0] < 3:
+            return None
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = closes[1:] / closes[:-1] - 1
+        # Bars before a stock's history starts count as flat
+        returns[~np.isfinite(returns)] = 0.0
+        cov = ShrunkCovariance(returns, scale=BARS_PER_YEAR.get(interval, TRADING_DAYS))
+
+        scores = np.array([stock["score"] for stock in candidates], dtype=np.float64)
+        spread = scores.std()
+        z_scores = (scores - scores.mean()) / spread if spread > 0 else np.zeros(len(scores))
+        expected = np.sqrt(cov.variances) * z_scores
+
+        limits = self.limits.get(risk_tolerance, self.limits["moderate"])
+        sector_names = [(sectors or {}).get(symbol, symbol if sectors else "") for symbol in symbols]
+        _, groups = np.unique(sector_names, return_inverse=True)
+
+        # Choose the positions from every candidate, then size the largest num_picks among themselves
+        weights = self._solve(expected, cov, groups, limits)
+        picks = np.flatnonzero(weights > 1e-6)
+        picks = picks[np.argsort(-weights[picks], kind="stable")][:num_picks]
+        picks.sort()
+        weights = self._solve(expected, cov, groups, limits, picks, start=weights[picks])
+
+        return [
+            (candidates[index], float(weights[position]), float(closes[-1, index]))
+            for position, index in enumerate(picks)
+        ]
+
+    def size(
+        self,
+        positions: List[Tuple[Dict[str, Any], float, float]],
+        budget: float
+    ) -> List[Tuple[Dict[str, Any], float, Optional[int]]]:
+        """
+        Finish a plan for a budget: round the target weights to whole lots when that still invests it.
+
+        A budget of zero or less buys nothing: every position keeps its
+        target weight with zero shares.
+
+        Returns:
+            (analysis, weight, shares or None) per position with shares (see allocate)
+        """
+        if budget <= 0 and self.lot_size > 0:
+            return [(stock, float(weight), 0) for stock, weight, _ in positions]
+        weights = np.array([weight for _, weight, _ in positions], dtype=np.float64)
+        shares = None
+        if self.lot_size > 0 and positions:
+            prices = np.array([price for _, _, price in positions], dtype=np.float64)
+            rounded = round_to_lots(weights, prices, budget, self.lot_size)
+            if rounded.any():
+                shares = rounded
+                weights = shares * prices / budget
+
+        return [
+            (stock, float(weights[position]), int(shares[position]) if shares is not None else None)
+            for position, (stock, _, _) in enumerate(positions)
+            if shares is None or shares[position] > 0
+        ]
+
+    def _solve(
+        self,
+        expected: np.ndarray,
+        cov: ShrunkCovariance,
+        groups: np.ndarray,
+        limits: Dict[str, float],
+        index: Optional[np.ndarray] = None,
+        start: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Optimal weights over every candidate, or densely over the few at index (from start)."""
+        if index is not None:
+            expected, groups = expected[index], groups[index]
+        _, groups = np.unique(groups, return_inverse=True)
+        num_groups = int(groups.max()) + 1
+        max_weight, sector_cap = feasible_limits(groups, num_groups, limits["max_weight"], limits["sector_cap"])
+        upper = np.full(len(expected), max_weight)
+        caps = np.full(num_groups, sector_cap)
+
+        if index is None:
+            weights, _ = solve_working_set(
+                expected, cov, limits["risk_aversion"], upper, groups, caps, tol=self.tol, max_iter=self.max_iter
+            )
+        else:
+            weights, _ = solve_mean_variance(
+                expected, cov.block(index), limits["risk_aversion"], upper, groups, caps, self.tol, self.max_iter, start
+            )
+        return weights
+
+
+def _fields(data: Any):
+    """Column names of a history (DataFrame, PriceView or array mapping); nothing for streaming states."""
+    if data is None or not hasattr(data, "__getitem__"):
+        return ()
+    return data.columns if hasattr(data, "columns") else data
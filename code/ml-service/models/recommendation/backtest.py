@@ -0,0 +1,468 @@
+# models/recommendation/backtest.py
+import itertools
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from models.recommendation.indicators import (
+    LONG_TERM_BARS, MEDIUM_TERM_BARS, ROLLING_CONTEXT_BARS, SHORT_TERM_BARS, TRADING_DAYS
+)
+from models.recommendation.rule_based import RuleBasedRecommender
+from services.lookback import DEFAULT_LOOKBACKS, parse_lookback
+
+logger = logging.getLogger(__name__)
+
+# Per-bar scoring inputs of an indicator panel, in the order they are stacked
+PANEL_FIELDS = ("close", "ma_5", "ma_20", "rsi", "volatility", "short_term", "medium_term", "long_term")
+
+# Scorer used inside each sweep worker, created on first use
+_worker_recommender = None
+
+
+def default_windows() -> Dict[str, int]:
+    """Scoring window in daily bars per time horizon, from the default lookbacks (weekly ones replayed daily)."""
+    return {
+        horizon: max(round(parse_lookback(spec)[0] * TRADING_DAYS / 365.25), ROLLING_CONTEXT_BARS)
+        for horizon, spec in DEFAULT_LOOKBACKS.items()
+    }
+
+
+def indicator_panel(closes: np.ndarray, window: int, bars_per_year: float = TRADING_DAYS) -> np.ndarray:
+    """
+    The recommender's scoring inputs for every symbol at every bar.
+
+    Row t holds what compute_indicator_batch reports for the `window` bars
+    ending at bar t: moving averages and RSI as of t, and volatility and
+    trend strengths over the window (or the symbol's history, if shorter),
+    all from trailing cumulative sums instead of one pass per date.
+
+    Args:
+        closes: (T, S) daily closes, NaN before a symbol's first bar
+        window: Bars of history the recommender is handed per symbol
+        bars_per_year: Annualization factor for volatility
+
+    Returns:
+        (len(PANEL_FIELDS), T, S) array
+    """
+    num_bars, num_symbols = closes.shape
+    listed = ~np.isnan(closes)
+    start = np.where(listed.any(axis=0), listed.argmax(axis=0), num_bars)
+    rows = np.arange(num_bars)[:, None]
+
+    panel = np.empty((len(PANEL_FIELDS),) + closes.shape)
+    panel[0] = closes
+    panel[1] = _rolling_mean(closes, 5)
+    panel[2] = _rolling_mean(closes, 20)
+
+    # RSI-14, with missing deltas counting as neither gain nor loss and no
+    # value before the symbol's 14th bar (as compute_indicator_batch)
+    delta = np.full(closes.shape, np.nan)
+    delta[1:] = closes[1:] - closes[:-1]
+    gain = _rolling_mean(np.where(delta > 0, delta, 0.0), 14)
+    loss = _rolling_mean(np.where(delta < 0, -delta, 0.0), 14)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        panel[3] = np.where(rows - start >= 13, 100 - 100 / (1 + gain / loss), np.nan)
+
+    # Volatility of the window - 1 returns inside each window (sample std)
+    returns = np.full(closes.shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns[1:] = closes[1:] / closes[:-1] - 1
+    valid = ~np.isnan(returns)
+    filled = np.where(valid, returns, 0.0)
+    count = _trailing_sum(valid.astype(np.float64), window - 1)
+    total = _trailing_sum(filled, window - 1)
+    squares = _trailing_sum(filled * filled, window - 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variance = np.where(count > 1, (squares - total * total / count) / (count - 1), np.nan)
+    panel[4] = np.sqrt(np.maximum(variance, 0.0)) * np.sqrt(bars_per_year)
+
+    # Trend strength: direction over the last `bars` bars times the share of up bars
+    up = (returns > 0).astype(np.float64)
+    for field, bars in ((5, SHORT_TERM_BARS), (6, MEDIUM_TERM_BARS), (7, LONG_TERM_BARS)):
+        window_start = np.maximum(rows - bars + 1, start)
+        first = np.take_along_axis(closes, np.minimum(window_start, num_bars - 1), axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            panel[field] = (closes > first) * _trailing_sum(up, bars - 1) / (rows + 1 - window_start)
+    return panel
+
+
+def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing rolling mean along axis 0; NaN unless the full window is present."""
+    out = np.full(values.shape, np.nan)
+    if values.shape[0] < window:
+        return out
+    valid = ~np.isnan(values)
+    sums = _trailing_sum(np.where(valid, values, 0.0), window)
+    counts = _trailing_sum(valid.astype(np.float64), window)
+    with np.errstate(invalid="ignore"):
+        out[window - 1:] = np.where(counts[window - 1:] == window, sums[window - 1:] / window, np.nan)
+    return out
+
+
+def _trailing_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """Sum of each row and the window - 1 rows before it (fewer at the top), along axis 0."""
+    sums = np.cumsum(values, axis=0)
+    if window > 0:
+        sums[window:] -= sums[:-window].copy()
+    else:
+        sums[:] = 0.0
+    return sums
+
+
+def _score_weights(scores: np.ndarray, held: np.ndarray, risk_tolerance: str) -> np.ndarray:
+    """RuleBasedRecommender's score-proportional allocation, for rows of picked scores."""
+    scores = np.where(held, scores, 0).astype(np.float64)
+    counts = held.sum(axis=1, keepdims=True)
+    totals = scores.sum(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weights = np.where(totals > 0, scores / totals, held / counts)
+        if risk_tolerance == "conservative":
+            # More even distribution for conservative profiles
+            weights = np.where(held, 0.7 * weights + 0.3 / counts, 0.0)
+        # (the aggressive 1.2x scaling cancels out in the normalization)
+        weights = weights / weights.sum(axis=1, keepdims=True)
+    return np.nan_to_num(weights)
+
+
+def replay(
+    panel: np.ndarray,
+    prices: np.ndarray,
+    recommender,
+    risk_tolerance: str,
+    time_horizon: str,
+    rebalance_every: int = 21,
+    thresholds: Optional[Dict[str, float]] = None,
+    first_bar: int = ROLLING_CONTEXT_BARS,
+    min_history: int = ROLLING_CONTEXT_BARS,
+    cost_bps: float = 0.0,
+    bars_per_year: float = TRADING_DAYS
+) -> Dict[str, Any]:
+    """
+    Walk the strategy forward over an indicator panel.
+
+    Every rebalance_every bars from first_bar, the symbols with at least
+    min_history bars are scored from that bar's panel row only (no later
+    data), the recommender's top num_recommendations are bought with its
+    score-proportional allocation at that bar's close, and held (drifting
+    with their prices) until the next rebalance. All rebalance dates are
+    scored in one call.
+
+    Args:
+        panel: indicator_panel output
+        prices: (T, S) closes with gaps forward-filled, to value holdings
+        recommender: RuleBasedRecommender whose rules and pick counts are replayed
+        risk_tolerance: Profile risk tolerance
+        time_horizon: Profile time horizon
+        rebalance_every: Bars between rebalances
+        thresholds: Overrides of the recommender's scoring thresholds
+        first_bar: Bar of the first rebalance
+        min_history: Bars a symbol needs before it can be picked
+        cost_bps: Trading cost per unit of traded weight, in basis points
+        bars_per_year: Bars per year, to annualize the metrics
+
+    Returns:
+        Metrics (see summarize) plus per-bar "returns" and "traded" arrays
+        (zero before the first rebalance)
+    """
+    num_bars, num_symbols = prices.shape
+    dates = np.arange(first_bar, num_bars - 1, rebalance_every)
+    returns = np.zeros(num_bars)
+    traded = np.zeros(num_bars)
+    if len(dates) == 0:
+        return dict(summarize(returns, traded, bars_per_year), returns=returns, traded=traded)
+
+    rows = panel[:, dates]
+    scores, _ = recommender.score_indicators(
+        dict(zip(PANEL_FIELDS, rows)), risk_tolerance, time_horizon, thresholds=thresholds
+    )
+    listed = ~np.isnan(rows[0])
+    age = dates[:, None] - np.argmax(~np.isnan(panel[0]), axis=0)[None, :]
+    scores = np.where(listed & (age >= min_history - 1), scores, -1)
+
+    # Best first, ties in symbol order, as rank_stocks sorts them
+    top_n = min(recommender.num_recommendations(risk_tolerance), num_symbols)
+    picks = np.argsort(-scores, axis=1, kind="stable")[:, :top_n]
+    picked = np.take_along_axis(scores, picks, axis=1)
+    weights = _score_weights(picked, picked >= 0, risk_tolerance)
+
+    holdings = np.zeros(num_symbols)
+    cost = cost_bps / 10000
+    for index, date in enumerate(dates):
+        end = dates[index + 1] if index + 1 < len(dates) else num_bars - 1
+        held = weights[index] > 0
+        columns, target_weights = picks[index][held], weights[index][held]
+        target = np.zeros(num_symbols)
+        target[columns] = target_weights
+        traded[date] = np.abs(target - holdings).sum() / 2
+
+        holdings = np.zeros(num_symbols)
+        if len(columns) == 0:
+            continue  # nothing eligible: stay in cash
+        relatives = prices[date:end + 1, columns] / prices[date, columns]
+        values = relatives @ target_weights
+        period = values[1:] / values[:-1] - 1
+        period[0] -= 2 * traded[date] * cost
+        returns[date + 1:end + 1] = period
+        holdings[columns] = target_weights * relatives[-1] / values[-1]
+    return dict(summarize(returns[first_bar + 1:], traded[first_bar:], bars_per_year), returns=returns, traded=traded)
+
+
+def summarize(returns: np.ndarray, traded: np.ndarray, bars_per_year: float = TRADING_DAYS) -> Dict[str, float]:
+    """
+    Performance of a per-bar return series.
+
+    Returns:
+        total_return, cagr, volatility and sharpe (annualized, no risk-free
+        rate), max_drawdown (negative), and turnover (one-way traded weight
+        per year)
+    """
+    years = len(returns) / bars_per_year if len(returns) else 0.0
+    if years == 0:
+        return {"total_return": 0.0, "cagr": 0.0, "volatility": 0.0, "sharpe": 0.0, "max_drawdown": 0.0, "turnover": 0.0}
+    equity = np.cumprod(1 + returns)
+    peaks = np.maximum.accumulate(np.concatenate([[1.0], equity]))[1:]
+    spread = returns.std(ddof=1) if len(returns) > 1 else 0.0
+    return {
+        "total_return": float(equity[-1] - 1),
+        "cagr": float(equity[-1] ** (1 / years) - 1) if equity[-1] > 0 else -1.0,
+        "volatility": float(spread * np.sqrt(bars_per_year)),
+        "sharpe": float(returns.mean() / spread * np.sqrt(bars_per_year)) if spread > 0 else 0.0,
+        "max_drawdown": float(np.min(equity / peaks - 1)),
+        "turnover": float(traded.sum() / years),
+    }
+
+
+def threshold_grid(**values: Iterable[float]) -> List[Dict[str, float]]:
+    """Every combination of the given threshold values, e.g. threshold_grid(rsi_momentum=[55, 60, 65], ...)."""
+    names = list(values)
+    return [dict(zip(names, combination)) for combination in itertools.product(*values.values())]
+
+
+class WalkForwardBacktest:
+    """
+    Replays the rule-based strategy over years of daily closes for a whole
+    universe, to evaluate and tune its scoring thresholds.
+
+    Scoring inputs are computed once per time horizon for every (bar,
+    symbol) as an indicator panel (see indicator_panel), so a replay only
+    scores its rebalance dates in one vectorized call and values the
+    holdings between them; parameter sweeps share the panels across runs
+    and workers. Each rebalance only sees bars up to its own date.
+
+    Long horizons look back over weekly bars in the service; they are
+    replayed on daily bars over the same number of years.
+    """
+
+    def __init__(
+        self,
+        closes: np.ndarray,
+        symbols: Optional[List[str]] = None,
+        windows: Optional[Dict[str, int]] = None,
+        min_history: int = ROLLING_CONTEXT_BARS,
+        cost_bps: float = 0.0,
+        recommender=None
+    ):
+        """
+        Args:
+            closes: (T, S) daily closes, NaN before a symbol's first bar (and
+                after its last, when it was delisted)
+            symbols: Column labels (for reports)
+            windows: Bars of history scored per time horizon (default_windows() if None)
+            min_history: Bars a symbol needs before it can be picked
+            cost_bps: Trading cost per unit of traded weight, in basis points
+            recommender: RuleBasedRecommender whose rules are replayed (a default one if None)
+        """
+        self.closes = np.asarray(closes, dtype=np.float64)
+        self.symbols = symbols or [f"S{index}" for index in range(self.closes.shape[1])]
+        self.windows = dict(default_windows(), **(windows or {}))
+        self.min_history = min_history
+        self.cost_bps = cost_bps
+        self.recommender = recommender or RuleBasedRecommender()
+
+        # Holdings are valued at the last known close through gaps and after delisting
+        num_bars = self.closes.shape[0]
+        last_seen = np.where(~np.isnan(self.closes), np.arange(num_bars)[:, None], 0)
+        np.maximum.accumulate(last_seen, axis=0, out=last_seen)
+        self.prices = np.take_along_axis(self.closes, last_seen, axis=0)
+        self._panels: Dict[int, np.ndarray] = {}
+        logger.info(f"WalkForwardBacktest over {num_bars} bars x {self.closes.shape[1]} symbols")
+
+    def panel(self, time_horizon: str) -> np.ndarray:
+        """The indicator panel of a horizon's scoring window (computed once)."""
+        window = self.windows.get(time_horizon, self.windows["medium"])
+        if window not in self._panels:
+            self._panels[window] = indicator_panel(self.closes, window)
+        return self._panels[window]
+
+    def run(
+        self,
+        risk_tolerance: str,
+        time_horizon: str,
+        rebalance_every: int = 21,
+        thresholds: Optional[Dict[str, float]] = None,
+        first_bar: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Replay one profile (see replay).
+
+        Args:
+            risk_tolerance: Profile risk tolerance
+            time_horizon: Profile time horizon
+            rebalance_every: Bars between rebalances
+            thresholds: Overrides of the scoring thresholds
+            first_bar: Bar of the first rebalance (defaults to min_history)
+
+        Returns:
+            The job's parameters, its metrics, and per-bar "returns" and "traded"
+        """
+        job = self._job(risk_tolerance, time_horizon, rebalance_every, thresholds, first_bar)
+        result = replay(
+            self.panel(time_horizon), self.prices, self.recommender, risk_tolerance, time_horizon,
+            rebalance_every, thresholds, job["first_bar"], self.min_history, self.cost_bps
+        )
+        return dict(job, **result)
+
+    def sweep(
+        self,
+        jobs: List[Dict[str, Any]],
+        workers: Optional[int] = None,
+        start_method: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Run many replays, in parallel across processes.
+
+        The panels the jobs need and the prices are written once to shared
+        memory, which the workers map instead of receiving copies; each job
+        sends back only its metrics and per-bar series.
+
+        Args:
+            jobs: run() keyword arguments per replay (risk_tolerance, time_horizon,
+                and optionally rebalance_every, thresholds, first_bar)
+            workers: Pool size (defaults to the CPU count; 1 runs in this process)
+            start_method: multiprocessing start method for the pool (platform default if None)
+
+        Returns:
+            run() results in job order
+        """
+        workers = min(workers or os.cpu_count() or 1, len(jobs))
+        if workers <= 1:
+            return [self.run(**job) for job in jobs]
+
+        arrays = {"prices": self.prices}
+        for job in jobs:
+            arrays.setdefault(job["time_horizon"], self.panel(job["time_horizon"]))
+        blocks = {}
+        try:
+            for name, array in arrays.items():
+                block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                np.ndarray(array.shape, dtype=np.float64, buffer=block.buf)[:] = array
+                blocks[name] = (block, array.shape)
+
+            context = multiprocessing.get_context(start_method)
+            payloads = [
+                (
+                    (blocks[job["time_horizon"]][0].name, blocks[job["time_horizon"]][1]),
+                    (blocks["prices"][0].name, blocks["prices"][1]),
+                    self._job(**job), self.min_history, self.cost_bps, self.recommender.thresholds
+                )
+                for job in jobs
+            ]
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                chunksize = max(len(jobs) // (workers * 4), 1)
+                return list(pool.map(_replay_job, payloads, chunksize=chunksize))
+        finally:
+            for block, _ in blocks.values():
+                block.close()
+                block.unlink()
+
+    def walk_forward(
+        self,
+        results: List[Dict[str, Any]],
+        train_bars: int,
+        test_bars: int,
+        metric: str = "sharpe"
+    ) -> Dict[str, Any]:
+        """
+        Out-of-sample evaluation of choosing parameters by past performance.
+
+        The timeline after the first rebalance is cut into consecutive test
+        periods of test_bars; for each, the sweep result with the best metric
+        over the train_bars before it is chosen, and its returns over the
+        test period are stitched into one out-of-sample series.
+
+        Args:
+            results: sweep() (or run()) results over this backtest's bars
+            train_bars: Bars each choice is judged on
+            test_bars: Bars each choice is then held for
+            metric: summarize() key to maximize
+
+        Returns:
+            Metrics of the stitched series plus a "folds" list of
+            (train_start, test_start, test_end, chosen result index)
+        """
+        first_bar = min(result["first_bar"] for result in results)
+        num_bars = len(results[0]["returns"])
+        stitched = np.zeros(num_bars)
+        traded = np.zeros(num_bars)
+        folds = []
+        for test_start in range(first_bar + 1 + train_bars, num_bars, test_bars):
+            train = slice(test_start - train_bars, test_start)
+            test = slice(test_start, min(test_start + test_bars, num_bars))
+            scores = [
+                summarize(result["returns"][train], result["traded"][train])[metric] for result in results
+            ]
+            best = int(np.argmax(scores))
+            stitched[test] = results[best]["returns"][test]
+            traded[test] = results[best]["traded"][test]
+            folds.append((train.start, test.start, test.stop, best))
+        if not folds:
+            return dict(summarize(np.zeros(0), np.zeros(0)), folds=folds)
+        tested = slice(folds[0][1], folds[-1][2])
+        return dict(summarize(stitched[tested], traded[tested]), folds=folds)
+
+    def _job(
+        self,
+        risk_tolerance: str,
+        time_horizon: str,
+        rebalance_every: int = 21,
+        thresholds: Optional[Dict[str, float]] = None,
+        first_bar: Optional[int] = None
+    ) -> Dict[str, Any]:
+        return {
+            "risk_tolerance": risk_tolerance,
+            "time_horizon": time_horizon,
+            "rebalance_every": rebalance_every,
+            "thresholds": dict(thresholds or {}),
+            "first_bar": self.min_history if first_bar is None else first_bar,
+        }
+
+
+def _replay_job(payload: Tuple) -> Dict[str, Any]:
+    """Pool job: replay one sweep entry against the shared panels."""
+    global _worker_recommender
+    (panel_name, panel_shape), (prices_name, prices_shape), job, min_history, cost_bps, base = payload
+
+    if _worker_recommender is None or _worker_recommender.thresholds != base:
+        _worker_recommender = RuleBasedRecommender(thresholds=base)
+
+    # Workers share the parent's resource tracker, so attaching here does not
+    # make the blocks outlive (or die with) this worker; the parent unlinks them
+    panel_block = shared_memory.SharedMemory(name=panel_name)
+    prices_block = shared_memory.SharedMemory(name=prices_name)
+    try:
+        panel = np.ndarray(panel_shape, dtype=np.float64, buffer=panel_block.buf)
+        prices = np.ndarray(prices_shape, dtype=np.float64, buffer=prices_block.buf)
+        result = replay(
+            panel, prices, _worker_recommender, job["risk_tolerance"], job["time_horizon"],
+            job["rebalance_every"], job["thresholds"], job["first_bar"], min_history, cost_bps
+        )
+        del panel, prices
+    finally:
+        panel_block.close()
+        prices_block.close()
+    return dict(job, **result)
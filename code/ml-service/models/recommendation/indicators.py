@@ -0,0 +1,194 @@
+# models/recommendation/indicators.py
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+
+# Annualization factor used for volatility (trading days per year)
+TRADING_DAYS = 252
+
+# Bars per year for each bar interval, to annualize volatility (6.5-hour sessions intraday)
+BARS_PER_YEAR = {
+    "1d": TRADING_DAYS,
+    "1w": 52,
+    "1mo": 12,
+    "60min": TRADING_DAYS * 6.5,
+    "30min": TRADING_DAYS * 13,
+    "15min": TRADING_DAYS * 26,
+    "5min": TRADING_DAYS * 78,
+}
+
+# Unit named in rationales ("Price above 20-day MA"); intraday bars are just "bar"
+BAR_UNITS = {"1d": "day", "1w": "week", "1mo": "month"}
+
+# Lookbacks used by the trend-strength metrics
+SHORT_TERM_BARS = 5
+MEDIUM_TERM_BARS = 20
+LONG_TERM_BARS = 52
+
+# Bars of history the rolling windows need before a row (MA-20, and 14 deltas for RSI-14)
+ROLLING_CONTEXT_BARS = 20
+
+# Bars of history an EMA chain (ema_26, then the 9-bar MACD signal) needs before
+# older bars' weights drop below float64 precision (0.926**478 and 0.8**165 < 2**-53)
+EWM_CONTEXT_BARS = 650
+
+
+def pack_closes(historical_data: Dict[str, pd.DataFrame]) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """
+    Pack every symbol's close prices into one aligned (dates x symbols) array.
+
+    Series are right-aligned on their most recent bar so that positional
+    lookbacks (the last N bars) line up across symbols. Shorter series are
+    padded with NaN at the top.
+
+    Args:
+        historical_data: Dictionary mapping symbols to DataFrames of historical data
+
+    Returns:
+        Tuple of (symbols, closes, lengths) where closes has shape (T, S)
+    """
+    symbols = list(historical_data.keys())
+    series = [np.asarray(historical_data[symbol]["close"], dtype=np.float64) for symbol in symbols]
+    lengths = np.array([len(values) for values in series], dtype=np.int64)
+
+    num_bars = int(lengths.max()) if len(series) else 0
+    closes = np.full((num_bars, len(symbols)), np.nan)
+    for column, values in enumerate(series):
+        closes[num_bars - len(values):, column] = values
+
+    return symbols, closes, lengths
+
+
+def compute_indicator_batch(
+    closes: np.ndarray,
+    lengths: np.ndarray,
+    bars_per_year: float = TRADING_DAYS,
+    rows: Optional[int] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Calculate technical indicators for all symbols in one vectorized pass.
+
+    Mirrors RuleBasedRecommender._calculate_indicators and
+    _calculate_trend_strength column by column.
+
+    With `rows` set, the per-bar indicators are only computed for the last
+    rows bars, from trailing blocks that also hold the history the rolling
+    windows (ROLLING_CONTEXT_BARS) and EMAs (EWM_CONTEXT_BARS) need, so
+    their cost no longer grows with the window; summaries (volatility,
+    trends) still cover every bar. Moving averages and RSI are unchanged by
+    this, EMAs/MACD agree to float64 precision.
+
+    Args:
+        closes: Array of close prices with shape (T, S), right-aligned
+        lengths: Number of real (non-padded) bars per symbol
+        bars_per_year: Annualization factor for volatility (see BARS_PER_YEAR)
+        rows: Number of most recent rows of per-bar indicators needed (all if None)
+
+    Returns:
+        Dictionary of (T, S) (or (rows, S)) indicator arrays plus per-symbol (S,) summary arrays
+    """
+    num_bars, num_symbols = closes.shape
+    start = num_bars - lengths
+    rolling_from = 0 if rows is None else max(num_bars - rows - ROLLING_CONTEXT_BARS, 0)
+    ewm_from = 0 if rows is None else max(num_bars - rows - EWM_CONTEXT_BARS, 0)
+    block = closes[rolling_from:]
+    age = np.arange(rolling_from, num_bars)[:, None] - start[None, :]
+
+    indicators = {
+        "close": block,
+        "ma_5": _rolling_mean(block, 5),
+        "ma_10": _rolling_mean(block, 10),
+        "ma_20": _rolling_mean(block, 20),
+    }
+
+    # RSI: a missing delta counts as neither gain nor loss, as in the pandas path
+    delta = np.full(block.shape, np.nan)
+    delta[1:] = block[1:] - block[:-1]
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    # Padded rows must not count towards the 14-bar warmup
+    warm = age >= 13
+    avg_gain = np.where(warm, _rolling_mean(gain, 14), np.nan)
+    avg_loss = np.where(warm, _rolling_mean(loss, 14), np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / avg_loss
+        indicators["rsi"] = 100 - (100 / (1 + rs))
+
+    # MACD
+    indicators["ema_12"] = _ewm_mean(closes[ewm_from:], 12)
+    indicators["ema_26"] = _ewm_mean(closes[ewm_from:], 26)
+    indicators["macd"] = indicators["ema_12"] - indicators["ema_26"]
+    indicators["macd_signal"] = _ewm_mean(indicators["macd"], 9)
+
+    if rows is not None:
+        for name, values in indicators.items():
+            indicators[name] = values[-rows:]
+
+    # Annualized volatility of daily returns (sample std, NaNs skipped)
+    returns = np.full(closes.shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns[1:] = closes[1:] / closes[:-1] - 1
+    valid = ~np.isnan(returns)
+    count = valid.sum(axis=0)
+    filled = np.where(valid, returns, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = filled.sum(axis=0) / count
+        squared = np.where(valid, (returns - mean) ** 2, 0.0)
+        variance = np.where(count > 1, squared.sum(axis=0) / (count - 1), np.nan)
+    indicators["volatility"] = np.sqrt(variance) * np.sqrt(bars_per_year)
+
+    # Trend strength: direction over the window times share of up days
+    # (returns before a symbol's first bar are NaN, so never count as up days)
+    columns = np.arange(num_symbols)
+    last_close = closes[-1] if num_bars else np.full(num_symbols, np.nan)
+    for name, window in (
+        ("short_term", SHORT_TERM_BARS),
+        ("medium_term", MEDIUM_TERM_BARS),
+        ("long_term", LONG_TERM_BARS),
+    ):
+        window_start = np.maximum(num_bars - window, start)
+        trend = (last_close > closes[window_start, columns]).astype(np.float64)
+        up_days = (returns[max(num_bars - window + 1, 0):] > 0).sum(axis=0)
+        consistency = up_days / (num_bars - window_start)
+        indicators[name] = trend * consistency
+
+    indicators["first_close"] = closes[start, columns]
+    indicators["last_close"] = last_close
+
+    return indicators
+
+
+def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing rolling mean along axis 0; NaN unless the full window is present."""
+    out = np.full(values.shape, np.nan)
+    if values.shape[0] < window:
+        return out
+
+    valid = ~np.isnan(values)
+    zero_row = np.zeros((1, values.shape[1]))
+    sums = np.concatenate([zero_row, np.cumsum(np.where(valid, values, 0.0), axis=0)])
+    counts = np.concatenate([zero_row, np.cumsum(valid, axis=0)])
+
+    window_sums = sums[window:] - sums[:-window]
+    window_counts = counts[window:] - counts[:-window]
+    out[window - 1:] = np.where(window_counts == window, window_sums / window, np.nan)
+    return out
+
+
+def _ewm_mean(values: np.ndarray, span: int) -> np.ndarray:
+    """Recursive EMA along axis 0, matching pandas ewm(span, adjust=False)."""
+    out = np.full(values.shape, np.nan)
+    if values.shape[0] == 0:
+        return out
+
+    new_weight = 2.0 / (span + 1)
+    old_weight = 1.0 - new_weight
+    previous = values[0].copy()
+    out[0] = previous
+    for row in range(1, values.shape[0]):
+        current = values[row]
+        updated = (old_weight * previous + new_weight * current) / (old_weight + new_weight)
+        # Leading NaNs: the series starts at its first valid value
+        previous = np.where(np.isnan(previous), current, updated)
+        out[row] = previous
+    return out
@@ -0,0 +1,147 @@
+# models/recommendation/parallel.py
+import heapq
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from models.recommendation.indicators import BARS_PER_YEAR, compute_indicator_batch, pack_closes
+
+logger = logging.getLogger(__name__)
+
+# Scorer used inside each pool worker, created on first use and rebuilt when the thresholds change
+_worker_recommender = None
+
+
+class ParallelScorer:
+    """
+    Scores very large universes on a process pool.
+
+    The packed (dates x symbols) close array is split into column shards that
+    are written back to back into one shared-memory block, so workers map
+    their shard instead of unpickling DataFrames. Each worker computes the
+    vectorized indicators and scores for its shard and returns only its
+    top_n analyses; the shard lists are merged by (score desc, input order),
+    which reproduces the serial ranking's order exactly, ties included.
+
+    Every shard keeps the full date axis, so each symbol's indicators are
+    computed over exactly the same values as in the serial pass. Analyses
+    scored this way are not memoized in the recommender's score cache, since
+    only the shard winners come back.
+    """
+
+    def __init__(self, workers: Optional[int] = None, min_symbols: int = 2000, start_method: Optional[str] = None):
+        """
+        Args:
+            workers: Pool size (defaults to the CPU count)
+            min_symbols: Universes smaller than this are scored serially,
+                where the pool's overhead would outweigh the gain
+            start_method: multiprocessing start method for the pool (platform default if None)
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.min_symbols = min_symbols
+        self._context = multiprocessing.get_context(start_method)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        logger.info(f"ParallelScorer initialized (workers={self.workers}, min_symbols={min_symbols})")
+
+    @classmethod
+    def from_env(cls) -> Optional["ParallelScorer"]:
+        """Build a scorer from ML_PARALLEL_WORKERS / ML_PARALLEL_MIN_SYMBOLS, or None if unset."""
+        workers = os.environ.get("ML_PARALLEL_WORKERS")
+        if not workers:
+            return None
+        return cls(workers=int(workers), min_symbols=int(os.environ.get("ML_PARALLEL_MIN_SYMBOLS", "2000")))
+
+    def top_stocks(
+        self,
+        historical_data: Dict[str, pd.DataFrame],
+        risk_tolerance: str,
+        time_horizon: str,
+        top_n: int,
+        interval: str = "1d",
+        thresholds: Optional[Dict[str, float]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Return the top_n analyses of the universe, best first, as rank_stocks would.
+
+        Args:
+            historical_data: Dictionary mapping symbols to DataFrames (or close arrays)
+            risk_tolerance: User's risk tolerance
+            time_horizon: Investment time horizon
+            top_n: Number of best-scoring analyses to return
+            interval: Bar interval of historical_data
+            thresholds: The scoring thresholds of the calling recommender
+                (DEFAULT_THRESHOLDS if None)
+        """
+        symbols, closes, lengths = pack_closes(historical_data)
+        if not symbols:
+            return []
+
+        bounds = np.linspace(0, len(symbols), min(self.workers, len(symbols)) + 1).astype(int)
+        shards = [(int(start), int(end)) for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+        num_bars = closes.shape[0]
+
+        block = shared_memory.SharedMemory(create=True, size=max(closes.nbytes, 1))
+        try:
+            # Shards are laid out back to back, each a C-contiguous (T, shard) array
+            offset = 0
+            jobs = []
+            for start, end in shards:
+                shape = (num_bars, end - start)
+                np.ndarray(shape, dtype=np.float64, buffer=block.buf, offset=offset)[:] = closes[:, start:end]
+                jobs.append((
+                    block.name, offset, shape, lengths[start:end], start, symbols[start:end],
+                    risk_tolerance, time_horizon, top_n, interval, thresholds
+                ))
+                offset += shape[0] * shape[1] * 8
+
+            pool = self._get_pool()
+            shard_results = list(pool.map(_score_shard, jobs))
+        finally:
+            block.close()
+            block.unlink()
+
+        merged = heapq.merge(*shard_results, key=lambda item: (-item[1]["score"], item[0]))
+        return [analysis for _, analysis in merged][:top_n]
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=self._context)
+        return self._pool
+
+
+def _score_shard(job: Tuple) -> List[Tuple[int, Dict[str, Any]]]:
+    """Pool job: score one shard from shared memory and return its top_n as (input position, analysis)."""
+    global _worker_recommender
+    name, offset, shape, lengths, first_position, symbols, risk_tolerance, time_horizon, top_n, interval, thresholds = job
+
+    from models.recommendation.rule_based import RuleBasedRecommender
+    if _worker_recommender is None or _worker_recommender.thresholds != RuleBasedRecommender._merge_thresholds(thresholds):
+        _worker_recommender = RuleBasedRecommender(thresholds=thresholds)
+
+    # Workers share the parent's resource tracker, so attaching here does not
+    # make the block outlive (or die with) this worker; the parent unlinks it
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        closes = np.ndarray(shape, dtype=np.float64, buffer=block.buf, offset=offset)
+        indicators = compute_indicator_batch(closes, lengths, BARS_PER_YEAR.get(interval, 252), rows=1)
+        analyses = _worker_recommender._build_analyses(symbols, indicators, risk_tolerance, time_horizon, interval)
+        del closes, indicators
+    finally:
+        block.close()
+
+    ranked = sorted(
+        ((first_position + index, analysis) for index, analysis in enumerate(analyses)),
+        key=lambda item: (-item[1]["score"], item[0])
+    )
+    return ranked[:top_n]
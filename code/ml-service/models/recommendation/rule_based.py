@@ -1,19 +1,69 @@
 # models/recommendation/rule_based.py
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any
+from typing import Callable, Dict, List, Any, Optional, Tuple
 import logging
 from datetime import datetime
 
+from models.recommendation.indicators import BAR_UNITS, BARS_PER_YEAR, compute_indicator_batch, pack_closes
+from models.recommendation.score_cache import ScoreCache, series_fingerprint
+from models.recommendation.streaming import StreamingIndicators, snapshot_indicators
+from services.metrics import METRICS
+
 logger = logging.getLogger(__name__)
 
+RISK_TOLERANCES = ("conservative", "moderate", "aggressive")
+
+# Thresholds of the scoring rules (tunable, e.g. with backtest parameter sweeps)
+DEFAULT_THRESHOLDS = {
+    "rsi_stable_low": 40,       # conservative: RSI in [low, high] is stable momentum...
+    "rsi_stable_high": 60,
+    "rsi_overbought": 70,       # ...and overbought above this
+    "rsi_momentum": 60,         # aggressive: strong momentum at or above this
+    "volatility_low": 0.2,      # annualized: conservative below, moderate from here...
+    "volatility_high": 0.3,     # ...to here, aggressive above
+    "trend_short": 0.7,         # short horizon: short-term trend strength above this
+    "trend_medium": 0.6,        # medium horizon: mean of short and medium-term strength above this
+    "trend_long": 0.6,          # long horizon: long-term trend strength above this
+}
+
 class RuleBasedRecommender:
     """
     Rule-based recommendation engine that uses predefined rules to generate
     stock recommendations based on user profiles and market data.
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        vectorized: bool = True,
+        score_cache: Optional[ScoreCache] = None,
+        parallel_scorer=None,
+        allocator=None,
+        thresholds: Optional[Dict[str, float]] = None
+    ):
+        """
+        Initialize the recommender.
+
+        Args:
+            vectorized: Score all symbols in one cross-sectional NumPy pass
+                instead of running the pandas indicators one symbol at a time
+            score_cache: Memo of per-stock analyses keyed by price-series
+                fingerprint and profile (a private one is created if None)
+            parallel_scorer: Optional ParallelScorer that generate_recommendations
+                hands universes of at least parallel_scorer.min_symbols to
+            allocator: Optional CovarianceAllocator that chooses and sizes the
+                positions from the price histories (allocations are
+                proportional to score if None)
+            thresholds: Overrides of DEFAULT_THRESHOLDS entries
+
+        Raises:
+            ValueError: If thresholds names an unknown threshold
+        """
+        self.thresholds = self._merge_thresholds(thresholds)
+        self.vectorized = vectorized
+        self.score_cache = score_cache if score_cache is not None else ScoreCache()
+        self.parallel_scorer = parallel_scorer
+        self.allocator = allocator
         logger.info("Initializing RuleBasedRecommender")
         
     def generate_recommendations(
@@ -21,7 +71,10 @@ class RuleBasedRecommender:
         historical_data: Dict[str, pd.DataFrame],
         risk_tolerance: str,
         time_horizon: str,
-        budget: float
+        budget: float,
+        interval: str = "1d",
+        sectors: Optional[Dict[str, str]] = None,
+        quotes: Optional[Callable[[List[str]], Dict[str, float]]] = None
     ) -> List[Dict[str, Any]]:
         """
         Generate stock recommendations based on historical data and user profile.
@@ -31,29 +84,169 @@ class RuleBasedRecommender:
             risk_tolerance: User's risk tolerance (conservative, moderate, aggressive)
             time_horizon: Investment time horizon (short, medium, long)
             budget: Available investment budget
+            interval: Bar interval of historical_data ("1d", "1w", "1mo" or intraday, e.g. "60min")
+            sectors: Optional mapping of symbol to sector, for the allocator's sector caps
+            quotes: Optional lookup of current prices to size lots at (see scale_allocation)
             
         Returns:
             List of recommended stocks with allocation percentages
         """
         logger.info(f"Generating recommendations for {risk_tolerance} profile, {time_horizon} horizon")
         
-        # Calculate technical indicators for each stock
-        analyzed_stocks = []
-        for symbol, data in historical_data.items():
-            analysis = self._analyze_stock(symbol, data, risk_tolerance, time_horizon)
-            analyzed_stocks.append(analysis)
-            
-        # Sort stocks by score in descending order
-        analyzed_stocks.sort(key=lambda x: x["score"], reverse=True)
+        if self._use_parallel(historical_data):
+            # Shards return only their best stocks; allocation only needs the global top N
+            # (or the allocator's candidate pool)
+            top_n = self.num_recommendations(risk_tolerance)
+            if self.allocator is not None:
+                top_n = max(top_n, self.allocator.max_candidates)
+            with METRICS.stage("recommend", "parallel_scoring"):
+                analyzed_stocks = self.parallel_scorer.top_stocks(
+                    historical_data, risk_tolerance, time_horizon, top_n, interval, self.thresholds
+                )
+        else:
+            analyzed_stocks = self.rank_stocks(historical_data, risk_tolerance, time_horizon, interval)
+        return self.allocate(analyzed_stocks, risk_tolerance, budget, historical_data, sectors, interval, quotes)
         
-        # Select top stocks based on risk tolerance
-        num_recommendations = {
+    def num_recommendations(self, risk_tolerance: str) -> int:
+        """Number of stocks allocate picks for a risk tolerance."""
+        return {
             "conservative": 3,  # Fewer stocks for conservative investors
             "moderate": 5,      # More diversification for moderate
             "aggressive": 7      # Even more for aggressive
         }.get(risk_tolerance, 5)
         
-        top_stocks = analyzed_stocks[:num_recommendations]
+    def _use_parallel(self, historical_data: Dict[str, pd.DataFrame]) -> bool:
+        """Parallel scoring covers large, vectorizable universes (no live streaming states)."""
+        return (
+            self.parallel_scorer is not None
+            and self.vectorized
+            and len(historical_data) >= self.parallel_scorer.min_symbols
+            and not any(isinstance(data, StreamingIndicators) for data in historical_data.values())
+        )
+        
+    def rank_stocks(
+        self,
+        historical_data: Dict[str, pd.DataFrame],
+        risk_tolerance: str,
+        time_horizon: str,
+        interval: str = "1d"
+    ) -> List[Dict[str, Any]]:
+        """
+        Score every stock for a profile and sort them best first.
+        
+        The ranking does not depend on the budget, so it can be computed once
+        and shared by every profile with the same risk tolerance, time horizon
+        and universe (see allocate).
+        
+        Analyses are memoized per (symbol, series fingerprint, profile, bar
+        interval), so only symbols whose prices changed since the last call
+        are re-scored.
+            
+        Returns:
+            List of analyzed stocks (symbol, score, rationale, target_price), best first
+        """
+        with METRICS.stage("recommend", "score_cache"):
+            keys = {
+                symbol: (symbol, series_fingerprint(data), risk_tolerance, time_horizon, interval)
+                for symbol, data in historical_data.items()
+            }
+            analyses = {symbol: self.score_cache.get(key) for symbol, key in keys.items()}
+            missing = {symbol: historical_data[symbol] for symbol, analysis in analyses.items() if analysis is None}
+        
+        # Calculate technical indicators for each stock not in the cache
+        if missing:
+            METRICS.inc("ml_symbols_scored_total", len(missing), pipeline="recommend")
+            if self.vectorized:
+                computed = self._analyze_stocks_batch(missing, risk_tolerance, time_horizon, interval)
+            else:
+                # Indicators and scoring are interleaved per symbol on this path
+                with METRICS.stage("recommend", "analyze_per_symbol"):
+                    computed = [
+                        self._analyze_stock(symbol, data, risk_tolerance, time_horizon, interval)
+                        for symbol, data in missing.items()
+                    ]
+            for analysis in computed:
+                self.score_cache.put(keys[analysis["symbol"]], analysis)
+                analyses[analysis["symbol"]] = analysis
+                
+        # Keep input order so ties sort the same as without the cache
+        analyzed_stocks = [analyses[symbol] for symbol in historical_data]
+            
+        # Sort stocks by score in descending order
+        analyzed_stocks.sort(key=lambda x: x["score"], reverse=True)
+        return analyzed_stocks
+        
+    def allocate(
+        self,
+        analyzed_stocks: List[Dict[str, Any]],
+        risk_tolerance: str,
+        budget: float,
+        historical_data: Optional[Dict[str, pd.DataFrame]] = None,
+        sectors: Optional[Dict[str, str]] = None,
+        interval: str = "1d",
+        quotes: Optional[Callable[[List[str]], Dict[str, float]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Pick the top stocks from a ranking produced by rank_stocks and size their allocations.
+        
+        Given the histories the ranking was scored from, the allocator (if
+        any) chooses and sizes the positions from their covariance; otherwise,
+        or if the histories cannot support it, allocations are proportional
+        to score.
+        
+        Args:
+            analyzed_stocks: Ranking from rank_stocks, best first
+            risk_tolerance: User's risk tolerance (conservative, moderate, aggressive)
+            budget: Available investment budget
+            historical_data: The histories the ranking was scored from
+            sectors: Optional mapping of symbol to sector, for the allocator's sector caps
+            interval: Bar interval of historical_data
+            quotes: Optional lookup of current prices to size lots at (see scale_allocation)
+        
+        Returns:
+            List of recommended stocks with allocation percentages (and share
+            counts when the allocator rounds to lots)
+        """
+        base = self.base_allocation(analyzed_stocks, risk_tolerance, historical_data, sectors, interval)
+        return self.scale_allocation(base, budget, quotes)
+        
+    def base_allocation(
+        self,
+        analyzed_stocks: List[Dict[str, Any]],
+        risk_tolerance: str,
+        historical_data: Optional[Dict[str, pd.DataFrame]] = None,
+        sectors: Optional[Dict[str, str]] = None,
+        interval: str = "1d"
+    ) -> List[Dict[str, Any]]:
+        """
+        The budget-independent part of allocate, which scale_allocation finishes for a budget.
+        
+        Allocations can be planned once and shared by every budget (e.g. in
+        precomputed snapshots). Positions planned by the allocator also carry
+        their target "weight" and latest "price", for lot rounding.
+        """
+        if self.allocator is not None and historical_data is not None:
+            with METRICS.stage("recommend", "allocation"):
+                positions = self.allocator.plan(
+                    analyzed_stocks, historical_data, risk_tolerance,
+                    self.num_recommendations(risk_tolerance), sectors, interval
+                )
+            if positions is not None:
+                return [
+                    {
+                        "symbol": stock["symbol"],
+                        "confidence": self._map_score_to_confidence(stock["score"]),
+                        "rationale": stock["rationale"],
+                        "allocation": round(weight * 100, 2),
+                        "target_price": stock.get("target_price"),
+                        "weight": weight,
+                        "price": price
+                    }
+                    for stock, weight, price in positions
+                ]
+        
+        # Select top stocks based on risk tolerance
+        top_stocks = analyzed_stocks[:self.num_recommendations(risk_tolerance)]
         
         # Calculate allocation percentages
         total_score = sum(stock["score"] for stock in top_stocks)
@@ -86,16 +279,62 @@ class RuleBasedRecommender:
             
         return recommendations
         
+    def scale_allocation(
+        self,
+        base: List[Dict[str, Any]],
+        budget: float,
+        quotes: Optional[Callable[[List[str]], Dict[str, float]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Finish a base_allocation for a budget, as new dicts (the base is left untouched).
+        
+        Allocator-planned positions are rounded to whole lots of shares at
+        the prices quotes returns for their symbols (the latest close for
+        symbols it has no price for, or without quotes), so that shares x
+        price is what each allocation invests; the rest of the budget stays
+        cash. Score-proportional allocations do not depend on the budget.
+        """
+        if not base or "weight" not in base[0]:
+            return [dict(rec) for rec in base]
+        
+        prices = [rec["price"] for rec in base]
+        if quotes is not None:
+            current = quotes([rec["symbol"] for rec in base])
+            prices = [current.get(rec["symbol"]) or price for rec, price in zip(base, prices)]
+        positions = self.allocator.size([(rec, rec["weight"], price) for rec, price in zip(base, prices)], budget)
+        return [
+            {
+                "symbol": rec["symbol"],
+                "confidence": rec["confidence"],
+                "rationale": rec["rationale"],
+                "allocation": round(weight * 100, 2),
+                "target_price": rec["target_price"],
+                "shares": shares
+            }
+            for rec, weight, shares in positions
+        ]
+        
     def _analyze_stock(
         self, 
         symbol: str, 
         data: pd.DataFrame,
         risk_tolerance: str,
-        time_horizon: str
+        time_horizon: str,
+        interval: str = "1d"
     ) -> Dict[str, Any]:
         """Analyze a stock using technical indicators and return a score and rationale."""
-        # Calculate technical indicators
+        # A live StreamingIndicators state already holds the current values
+        if isinstance(data, StreamingIndicators):
+            return self._analyze_stocks_batch({symbol: data}, risk_tolerance, time_horizon, interval)[0]
+            
+        # Calculate technical indicators on a copy; the input may be a shared cached frame
+        # (or array columns, e.g. a PriceView, of which only the closes are read)
+        if isinstance(data, pd.DataFrame):
+            data = data.copy()
+        else:
+            data = pd.DataFrame({"close": np.asarray(data["close"], dtype=np.float64)})
         data = self._calculate_indicators(data)
+        unit = BAR_UNITS.get(interval, "bar")
         
         # Get the most recent data point
         current = data.iloc[-1]
@@ -107,38 +346,39 @@ class RuleBasedRecommender:
         # Check moving average signals
         if current["close"] > current["ma_20"]:
             score += 10
-            observations.append("Price above 20-day MA")
+            observations.append(f"Price above 20-{unit} MA")
         else:
             score -= 5
-            observations.append("Price below 20-day MA")
+            observations.append(f"Price below 20-{unit} MA")
             
         if current["ma_5"] > current["ma_20"]:
             score += 15
-            observations.append("5-day MA crossed above 20-day MA")
+            observations.append(f"5-{unit} MA crossed above 20-{unit} MA")
         
         # Check RSI
+        thresholds = self.thresholds
         if risk_tolerance == "conservative":
             # Conservative - prefer stable stocks
-            if 40 <= current["rsi"] <= 60:
+            if thresholds["rsi_stable_low"] <= current["rsi"] <= thresholds["rsi_stable_high"]:
                 score += 15
                 observations.append("RSI indicates stable momentum")
-            elif current["rsi"] > 70:
+            elif current["rsi"] > thresholds["rsi_overbought"]:
                 score -= 20
                 observations.append("RSI indicates potential overbought conditions")
                 
         elif risk_tolerance == "aggressive":
             # Aggressive - prefer momentum
-            if current["rsi"] >= 60:
+            if current["rsi"] >= thresholds["rsi_momentum"]:
                 score += 20
                 observations.append("RSI shows strong momentum")
                 
         # Check volatility based on risk tolerance
-        volatility = data["close"].pct_change().std() * np.sqrt(252)  # Annualized volatility
+        volatility = data["close"].pct_change().std() * np.sqrt(BARS_PER_YEAR.get(interval, 252))  # Annualized volatility
         
         volatility_score = 0
         if risk_tolerance == "conservative":
             # Conservative - prefer low volatility
-            if volatility < 0.2:
+            if volatility < thresholds["volatility_low"]:
                 volatility_score = 15
                 observations.append("Low volatility suitable for conservative profile")
             else:
@@ -147,13 +387,13 @@ class RuleBasedRecommender:
                 
         elif risk_tolerance == "moderate":
             # Moderate - prefer medium volatility
-            if 0.2 <= volatility <= 0.3:
+            if thresholds["volatility_low"] <= volatility <= thresholds["volatility_high"]:
                 volatility_score = 10
                 observations.append("Moderate volatility suitable for balanced profile")
                 
         elif risk_tolerance == "aggressive":
             # Aggressive - can handle higher volatility
-            if volatility > 0.3:
+            if volatility > thresholds["volatility_high"]:
                 volatility_score = 10
                 observations.append("Higher volatility with potential for greater returns")
                 
@@ -164,20 +404,20 @@ class RuleBasedRecommender:
         
         if time_horizon == "short":
             # Short-term: Focus on recent momentum
-            if trend_strength["short_term"] > 0.7:
+            if trend_strength["short_term"] > thresholds["trend_short"]:
                 score += 15
                 observations.append("Strong short-term uptrend")
                 
         elif time_horizon == "medium":
             # Medium-term: Balance of short and medium trends
             avg_trend = (trend_strength["short_term"] + trend_strength["medium_term"]) / 2
-            if avg_trend > 0.6:
+            if avg_trend > thresholds["trend_medium"]:
                 score += 15
                 observations.append("Consistent medium-term uptrend")
                 
         elif time_horizon == "long":
             # Long-term: Focus on longer trends and fundamental strength
-            if trend_strength["medium_term"] > 0.6:
+            if trend_strength["long_term"] > thresholds["trend_long"]:
                 score += 10
                 observations.append("Solid long-term growth potential")
         
@@ -202,6 +442,193 @@ class RuleBasedRecommender:
             "target_price": target_price
         }
     
+    def _analyze_stocks_batch(
+        self,
+        historical_data: Dict[str, pd.DataFrame],
+        risk_tolerance: str,
+        time_horizon: str,
+        interval: str = "1d"
+    ) -> List[Dict[str, Any]]:
+        """
+        Vectorized equivalent of calling _analyze_stock for every symbol.
+
+        Indicators for the whole universe are computed in one pass over a
+        (dates x symbols) array and the scoring rules are applied as masks.
+        Scoring only reads the latest row of the per-bar indicators, so only
+        that row is computed, however long the window.
+        """
+        if not historical_data:
+            return []
+
+        # Live StreamingIndicators states already hold their current values
+        states = {symbol: data for symbol, data in historical_data.items() if isinstance(data, StreamingIndicators)}
+        frames = {symbol: data for symbol, data in historical_data.items() if symbol not in states}
+
+        analyses = {}
+        if frames:
+            with METRICS.stage("recommend", "indicators"):
+                symbols, closes, lengths = pack_closes(frames)
+                indicators = compute_indicator_batch(closes, lengths, BARS_PER_YEAR.get(interval, 252), rows=1)
+            with METRICS.stage("recommend", "scoring"):
+                analyses.update(zip(symbols, self._build_analyses(
+                    symbols, indicators, risk_tolerance, time_horizon, interval
+                )))
+        if states:
+            with METRICS.stage("recommend", "indicators"):
+                indicators = snapshot_indicators(states.values())
+            with METRICS.stage("recommend", "scoring"):
+                analyses.update(zip(states, self._build_analyses(
+                    list(states), indicators, risk_tolerance, time_horizon, interval
+                )))
+
+        return [analyses[symbol] for symbol in historical_data]
+
+    def _build_analyses(
+        self,
+        symbols: List[str],
+        indicators: Dict[str, np.ndarray],
+        risk_tolerance: str,
+        time_horizon: str,
+        interval: str = "1d"
+    ) -> List[Dict[str, Any]]:
+        """Score a batch of indicator columns and build the per-stock analysis dicts."""
+        scores, observations = self._score_batch(indicators, risk_tolerance, time_horizon, interval)
+
+        target_multiplier = {
+            "conservative": 1.05,  # 5% growth target
+            "moderate": 1.10,      # 10% growth target
+            "aggressive": 1.20     # 20% growth target
+        }.get(risk_tolerance, 1.10)
+        target_prices = indicators["last_close"] * target_multiplier
+
+        analyzed_stocks = []
+        for column, symbol in enumerate(symbols):
+            # Create rationale based on top observations
+            rationale = " and ".join(
+                [text for text, mask in observations if mask[column]][:3]
+            )
+            analyzed_stocks.append({
+                "symbol": symbol,
+                "score": scores[column],
+                "rationale": rationale,
+                "target_price": round(target_prices[column], 2)
+            })
+
+        return analyzed_stocks
+
+    def _score_batch(
+        self,
+        indicators: Dict[str, np.ndarray],
+        risk_tolerance: str,
+        time_horizon: str,
+        interval: str = "1d"
+    ) -> Tuple[List[int], List[Tuple[str, np.ndarray]]]:
+        """
+        Apply the _analyze_stock scoring rules to every symbol at once.
+
+        Returns:
+            Tuple of (clamped scores, ordered list of (observation, mask))
+        """
+        latest = dict(
+            indicators,
+            close=indicators["last_close"],
+            ma_5=indicators["ma_5"][-1],
+            ma_20=indicators["ma_20"][-1],
+            rsi=indicators["rsi"][-1]
+        )
+        scores, observations = self.score_indicators(latest, risk_tolerance, time_horizon, interval)
+        return scores.tolist(), observations
+
+    def score_indicators(
+        self,
+        indicators: Dict[str, np.ndarray],
+        risk_tolerance: str,
+        time_horizon: str,
+        interval: str = "1d",
+        thresholds: Optional[Dict[str, float]] = None
+    ) -> Tuple[np.ndarray, List[Tuple[str, np.ndarray]]]:
+        """
+        Apply the scoring rules to arrays of current indicator values.
+
+        Arrays can have any (common) shape, e.g. (symbols,) for one ranking
+        or (dates, symbols) when a backtest scores many rebalance dates at once.
+
+        Args:
+            indicators: close, ma_5, ma_20, rsi, volatility, short_term, medium_term
+                and long_term values
+            risk_tolerance: User's risk tolerance (conservative, moderate, aggressive)
+            time_horizon: Investment time horizon (short, medium, long)
+            interval: Bar interval, named in the rationales
+            thresholds: Overrides of self.thresholds entries (e.g. for a parameter sweep)
+
+        Returns:
+            Tuple of (clamped integer scores, ordered list of (observation, mask))
+        """
+        thresholds = self._merge_thresholds(thresholds, self.thresholds) if thresholds else self.thresholds
+        close = indicators["close"]
+        ma_5 = indicators["ma_5"]
+        ma_20 = indicators["ma_20"]
+        rsi = indicators["rsi"]
+        volatility = indicators["volatility"]
+
+        score = np.full(close.shape, 50, dtype=np.int64)  # Base score
+        observations = []
+
+        def observe(mask: np.ndarray, points: int, text: str):
+            nonlocal score
+            score = score + np.where(mask, points, 0)
+            observations.append((text, mask))
+
+        # Check moving average signals
+        above_ma = close > ma_20
+        unit = BAR_UNITS.get(interval, "bar")
+        observe(above_ma, 10, f"Price above 20-{unit} MA")
+        observe(~above_ma, -5, f"Price below 20-{unit} MA")
+        observe(ma_5 > ma_20, 15, f"5-{unit} MA crossed above 20-{unit} MA")
+
+        # Check RSI
+        if risk_tolerance == "conservative":
+            stable = (rsi >= thresholds["rsi_stable_low"]) & (rsi <= thresholds["rsi_stable_high"])
+            observe(stable, 15, "RSI indicates stable momentum")
+            observe(~stable & (rsi > thresholds["rsi_overbought"]), -20, "RSI indicates potential overbought conditions")
+        elif risk_tolerance == "aggressive":
+            observe(rsi >= thresholds["rsi_momentum"], 20, "RSI shows strong momentum")
+
+        # Check volatility based on risk tolerance
+        if risk_tolerance == "conservative":
+            low_volatility = volatility < thresholds["volatility_low"]
+            observe(low_volatility, 15, "Low volatility suitable for conservative profile")
+            observe(~low_volatility, -15, "Higher volatility than ideal for conservative profile")
+        elif risk_tolerance == "moderate":
+            observe((volatility >= thresholds["volatility_low"]) & (volatility <= thresholds["volatility_high"]), 10,
+                    "Moderate volatility suitable for balanced profile")
+        elif risk_tolerance == "aggressive":
+            observe(volatility > thresholds["volatility_high"], 10, "Higher volatility with potential for greater returns")
+
+        # Trend strength based on time horizon
+        if time_horizon == "short":
+            observe(indicators["short_term"] > thresholds["trend_short"], 15, "Strong short-term uptrend")
+        elif time_horizon == "medium":
+            avg_trend = (indicators["short_term"] + indicators["medium_term"]) / 2
+            observe(avg_trend > thresholds["trend_medium"], 15, "Consistent medium-term uptrend")
+        elif time_horizon == "long":
+            observe(indicators["long_term"] > thresholds["trend_long"], 10, "Solid long-term growth potential")
+
+        # Clamp score between 0-100
+        return np.clip(score, 0, 100), observations
+
+    @staticmethod
+    def _merge_thresholds(
+        overrides: Optional[Dict[str, float]],
+        base: Optional[Dict[str, float]] = None
+    ) -> Dict[str, float]:
+        unknown = set(overrides or {}) - set(DEFAULT_THRESHOLDS)
+        if unknown:
+            raise ValueError(f"Unknown scoring thresholds: {', '.join(sorted(unknown))}")
+        merged = dict(base if base is not None else DEFAULT_THRESHOLDS)
+        merged.update(overrides or {})
+        return merged
+
     def _calculate_indicators(self, data: pd.DataFrame) -> pd.DataFrame:
         """Calculate technical indicators for the given data."""
         # Calculate moving averages
@@ -235,13 +662,19 @@ class RuleBasedRecommender:
         medium_term_data = data.iloc[-20:]
         medium_term_trend = 1 if medium_term_data["close"].iloc[-1] > medium_term_data["close"].iloc[0] else 0
         
+        # Long-term trend (52 bars: a year of weekly bars)
+        long_term_data = data.iloc[-52:]
+        long_term_trend = 1 if long_term_data["close"].iloc[-1] > long_term_data["close"].iloc[0] else 0
+        
         # Calculate trend consistency (percentage of days with positive returns)
         short_term_consistency = (short_term_data["close"].pct_change() > 0).mean()
         medium_term_consistency = (medium_term_data["close"].pct_change() > 0).mean()
+        long_term_consistency = (long_term_data["close"].pct_change() > 0).mean()
         
         return {
             "short_term": short_term_trend * short_term_consistency,
-            "medium_term": medium_term_trend * medium_term_consistency
+            "medium_term": medium_term_trend * medium_term_consistency,
+            "long_term": long_term_trend * long_term_consistency
         }
     
     def _map_score_to_confidence(self, score: float) -> float:
@@ -254,22 +687,50 @@ class RuleBasedRecommender:
 import numpy as np
 from typing import Dict, List, Any, Optional
 import logging
+import os
 import re
+from functools import reduce
+from operator import or_
+
+from models.sentiment.onnx_backend import OnnxSentimentBackend
 
 logger = logging.getLogger(__name__)
 
+# Equivalent to r'\b\w+\b': a greedy \w+ run is always word-bounded
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# Upper bound on memoized score/key-term entries kept by analyze_batch
+RESULT_CACHE_SIZE = 4096
+
+# Analyzer used inside each process-pool worker, built from the environment on first use
+_worker_analyzer = None
+
 class TransformerSentimentAnalyzer:
     """
     A sentiment analysis model that uses transformer architecture 
     to analyze financial text for sentiment and key terms.
+    
+    When model_path points at a local ONNX model (see OnnxSentimentBackend),
+    sentiment scores come from that model; otherwise, or if it cannot be
+    loaded, the lexicon scorer is used. Key terms always come from the
+    financial terms dictionary.
     """
     
-    def __init__(self, model_path: Optional[str] = None):
+    def __init__(
+        self,
+        model_path: Optional[str] = None,
+        max_batch_size: int = 32,
+        max_length: int = 128,
+        threads: Optional[int] = None
+    ):
         """
         Initialize the sentiment analyzer with a pre-trained transformer model.
         
-        In a real implementation, this would load the model from disk.
-        For this example, we'll simulate the model's behavior.
+        Args:
+            model_path: Local ONNX model directory or file (lexicon scorer if None)
+            max_batch_size: Largest micro-batch run through the model
+            max_length: Token limit per document for the model
+            threads: ONNX Runtime intra-op threads (runtime default if None)
         """
         self.model_path = model_path
         logger.info(f"Initializing TransformerSentimentAnalyzer with model path: {model_path}")
@@ -284,26 +745,8 @@ class TransformerSentimentAnalyzer:
             "bull market", "bear market", "volatility", "rally", "correction"
         ]
         
-        # Load model (simulated in this example)
-        logger.info("Model loaded successfully")
-        
-    def analyze(self, text: str) -> Dict[str, Any]:
-        """
-        Analyze the sentiment of the given text.
-        
-        Args:
-            text: The text to analyze
-            
-        Returns:
-            Dictionary containing sentiment score, label, key terms, and confidence
-        """
-        logger.info(f"Analyzing text: {text[:50]}...")
-        
-        # In a real implementation, this would use the transformer model
-        # For this example, we'll use a simple rule-based approach
-        
         # Positive and negative word dictionaries with weights
-        positive_words = {
+        self.positive_words = {
             "up": 0.5, "gain": 0.7, "profit": 0.8, "growth": 0.6, 
             "positive": 0.7, "increase": 0.6, "higher": 0.5, "beat": 0.8,
             "strong": 0.6, "outperform": 0.8, "exceed": 0.7, "above": 0.5,
@@ -311,7 +754,7 @@ class TransformerSentimentAnalyzer:
             "recovery": 0.6, "momentum": 0.5, "advantage": 0.5, "successful": 0.6
         }
         
-        negative_words = {
+        self.negative_words = {
             "down": 0.5, "loss": 0.7, "decline": 0.6, "negative": 0.7,
             "decrease": 0.6, "lower": 0.5, "miss": 0.8, "weak": 0.6,
             "underperform": 0.8, "below": 0.5, "disappoint": 0.7, "concern": 0.6,
@@ -319,13 +762,188 @@ class TransformerSentimentAnalyzer:
             "struggle": 0.6, "slowdown": 0.6, "pressure": 0.5, "fail": 0.8
         }
         
+        self._compile_lexicons()
+        
+        self.backend = self._load_backend(model_path, max_batch_size, max_length, threads)
+        # Identifies what produces the scores (e.g. to namespace cached results)
+        self.model_id = self.backend.model_file if self.backend is not None else "lexicon"
+        logger.info(f"Model loaded successfully ({'onnx' if self.backend is not None else 'lexicon'} backend)")
+        
+    @classmethod
+    def from_env(cls) -> "TransformerSentimentAnalyzer":
+        """Build an analyzer from ML_SENTIMENT_MODEL_PATH, ML_SENTIMENT_BATCH_SIZE, ML_SENTIMENT_MAX_LENGTH and ML_SENTIMENT_THREADS."""
+        threads = os.environ.get("ML_SENTIMENT_THREADS")
+        return cls(
+            model_path=os.environ.get("ML_SENTIMENT_MODEL_PATH") or None,
+            max_batch_size=int(os.environ.get("ML_SENTIMENT_BATCH_SIZE", "32")),
+            max_length=int(os.environ.get("ML_SENTIMENT_MAX_LENGTH", "128")),
+            threads=int(threads) if threads else None
+        )
+        
+    @staticmethod
+    def _load_backend(
+        model_path: Optional[str],
+        max_batch_size: int,
+        max_length: int,
+        threads: Optional[int]
+    ) -> Optional[OnnxSentimentBackend]:
+        """Load the ONNX backend for model_path, or return None to use the lexicon scorer."""
+        if not model_path:
+            return None
+        try:
+            return OnnxSentimentBackend(model_path, max_batch_size=max_batch_size, max_length=max_length, threads=threads)
+        except Exception as e:
+            logger.warning(f"Could not load ONNX sentiment model from {model_path}, using the lexicon scorer: {str(e)}")
+            return None
+        
+    def _compile_lexicons(self):
+        """Precompile the key-term lookups used by analyze_batch."""
+        # Each token maps to a bitmask of the financial_terms positions it can
+        # match. A \bterm\b match of a single-word term is exactly a token
+        # equal to the term; a multi-word term can only match if its first
+        # word is a token, and is then confirmed with its own regex.
+        self._term_masks = {}
+        self._phrase_terms = []
+        for position, term in enumerate(self.financial_terms):
+            lowered = term.lower()
+            bit = 1 << position
+            first_word = TOKEN_PATTERN.match(lowered)
+            if first_word is None:
+                continue
+            self._term_masks[first_word.group()] = self._term_masks.get(first_word.group(), 0) | bit
+            if first_word.group() != lowered:
+                pattern = re.compile(r'\b' + re.escape(lowered) + r'\b')
+                self._phrase_terms.append((bit, pattern))
+        
+        # Lexicon weights are few and discrete and term sets repeat, so
+        # analyze_batch memoizes both across calls
+        self._score_fields_cache = {}
+        self._key_terms_cache = {}
+        
+    def analyze(self, text: str) -> Dict[str, Any]:
+        """
+        Analyze the sentiment of the given text.
+        
+        Args:
+            text: The text to analyze
+            
+        Returns:
+            Dictionary containing sentiment score, label, key terms, and confidence
+        """
+        logger.debug("Analyzing text: %s...", text[:50])
+        
+        if self.backend is not None:
+            return self.analyze_batch([text])[0]
+        
+        # Without a model, use a simple rule-based approach
+        
         # Convert to lowercase and tokenize
         tokens = re.findall(r'\b\w+\b', text.lower())
         
         # Count positive and negative words
-        positive_score = sum(positive_words.get(word, 0) for word in tokens)
-        negative_score = sum(negative_words.get(word, 0) for word in tokens)
+        positive_score = sum(self.positive_words.get(word, 0) for word in tokens)
+        negative_score = sum(self.negative_words.get(word, 0) for word in tokens)
+        
+        # Extract key financial terms
+        key_terms = [term for term in self.financial_terms 
+                     if re.search(r'\b' + re.escape(term.lower()) + r'\b', text.lower())]
+        
+        return self._build_result(positive_score, negative_score, key_terms)
+        
+    def analyze_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Analyze the sentiment of many texts using the precompiled lexicons.
+        
+        Produces the same results as calling analyze on each text, but
+        lowercases and tokenizes each document once and resolves both the
+        lexicon scores and the key terms from that single token pass. With
+        a model backend, the scores for the whole batch come from one
+        predict call instead.
+        
+        Args:
+            texts: The texts to analyze
+            
+        Returns:
+            List of result dictionaries, in the same order as texts
+        """
+        logger.debug(f"Analyzing batch of {len(texts)} texts")
+        
+        positive_get = self.positive_words.get
+        negative_get = self.negative_words.get
+        mask_get = self._term_masks.get
+        phrase_terms = self._phrase_terms
+        financial_terms = self.financial_terms
+        score_fields = self._score_fields_cache
+        key_terms_by_mask = self._key_terms_cache
+        if len(score_fields) > RESULT_CACHE_SIZE:
+            score_fields.clear()
+        if len(key_terms_by_mask) > RESULT_CACHE_SIZE:
+            key_terms_by_mask.clear()
+        
+        if self.backend is not None:
+            model_fields = [self._model_fields(probabilities) for probabilities in self.backend.predict(texts)]
+        else:
+            model_fields = None
+        
+        results = []
+        for index, text in enumerate(texts):
+            lowered = text.lower()
+            tokens = TOKEN_PATTERN.findall(lowered)
+            
+            mask = reduce(or_, filter(None, map(mask_get, tokens)), 0)
+            for bit, pattern in phrase_terms:
+                if mask & bit and not pattern.search(lowered):
+                    mask ^= bit
+            
+            key_terms = key_terms_by_mask.get(mask)
+            if key_terms is None:
+                key_terms = [term for position, term in enumerate(financial_terms) if mask >> position & 1][:5]
+                key_terms_by_mask[mask] = key_terms
+            
+            if model_fields is not None:
+                fields = model_fields[index]
+            else:
+                # Skipping non-lexicon tokens keeps the same summation order as analyze
+                positive_score = sum(filter(None, map(positive_get, tokens)))
+                negative_score = sum(filter(None, map(negative_get, tokens)))
+                fields = score_fields.get((positive_score, negative_score))
+                if fields is None:
+                    fields = self._score_fields(positive_score, negative_score)
+                    score_fields[(positive_score, negative_score)] = fields
+            
+            results.append({
+                "score": fields[0],
+                "label": fields[1],
+                "key_terms": list(key_terms),
+                "confidence": fields[2]
+            })
+            
+        return results
+        
+    def _build_result(self, positive_score: float, negative_score: float, key_terms: List[str]) -> Dict[str, Any]:
+        """Turn lexicon scores and matched terms into the analyzer's result dictionary."""
+        sentiment_score, sentiment_label, confidence = self._score_fields(positive_score, negative_score)
+        
+        return {
+            "score": sentiment_score,
+            "label": sentiment_label,
+            "key_terms": key_terms[:5],  # Limit to top 5 terms
+            "confidence": confidence
+        }
+        
+    def _model_fields(self, probabilities: Dict[str, float]):
+        """Compute the rounded (score, label, confidence) from the model's label probabilities."""
+        # Score is P(positive) - P(negative), on the same -1 to 1 scale as the lexicon score
+        sentiment_score = probabilities.get("positive", 0.0) - probabilities.get("negative", 0.0)
+        sentiment_label = max(probabilities, key=probabilities.get)
+        if sentiment_label not in ("positive", "neutral", "negative"):
+            sentiment_label = "positive" if sentiment_score > 0.2 else "negative" if sentiment_score < -0.2 else "neutral"
+        confidence = max(probabilities.values())
         
+        return round(sentiment_score, 2), sentiment_label, round(confidence, 2)
+        
+    def _score_fields(self, positive_score: float, negative_score: float):
+        """Compute the rounded (score, label, confidence) for a pair of lexicon scores."""
         # Calculate overall sentiment score (-1 to 1)
         if positive_score + negative_score > 0:
             sentiment_score = (positive_score - negative_score) / (positive_score + negative_score)
@@ -340,20 +958,22 @@ class TransformerSentimentAnalyzer:
         else:
             sentiment_label = "neutral"
             
-        # Extract key financial terms
-        key_terms = [term for term in self.financial_terms 
-                     if re.search(r'\b' + re.escape(term.lower()) + r'\b', text.lower())]
-                
-        # Limit to top 5 terms
-        key_terms = key_terms[:5]
-        
         # Calculate confidence (how certain the model is about its prediction)
         # For this example, we'll use a simple approach based on sentiment strength
         confidence = min(0.5 + abs(sentiment_score) * 0.5, 0.95)
         
-        return {
-            "score": round(sentiment_score, 2),
-            "label": sentiment_label,
-            "key_terms": key_terms,
-            "confidence": round(confidence, 2)
-        }
\ No newline at end of file
+        return round(sentiment_score, 2), sentiment_label, round(confidence, 2)
+
+
+def analyze_batch_in_worker(texts: List[str]) -> List[Dict[str, Any]]:
+    """
+    Process-pool job: analyze texts with this worker's own analyzer.
+    
+    An analyzer holds a tokenizer and model session that cannot be pickled,
+    so process pools are sent this function instead of a bound analyze_batch;
+    each worker builds its analyzer once with TransformerSentimentAnalyzer.from_env.
+    """
+    global _worker_analyzer
+    if _worker_analyzer is None:
+        _worker_analyzer = TransformerSentimentAnalyzer.from_env()
+    return _worker_analyzer.analyze_batch(texts)
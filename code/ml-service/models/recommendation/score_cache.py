@@ -0,0 +1,95 @@
+# models/recommendation/score_cache.py
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def series_fingerprint(data: Any) -> bytes:
+    """
+    Fingerprint the part of a symbol's history that scoring depends on.
+
+    Scores only read the close series, so two windows with identical closes
+    always score the same. Works for DataFrames and OHLCVStore windows alike;
+    objects that provide their own fingerprint() (e.g. StreamingIndicators)
+    are asked directly.
+    """
+    if hasattr(data, "fingerprint"):
+        return data.fingerprint()
+    closes = np.ascontiguousarray(np.asarray(data["close"], dtype=np.float64))
+    return hashlib.blake2b(closes.tobytes(), digest_size=16).digest()
+
+
+class ScoreCache:
+    """
+    Bounded LRU memo of per-stock analyses.
+
+    Keys are (symbol, series fingerprint, risk_tolerance, time_horizon), so a
+    new bar changes the key and stale scores can never be served; invalidate
+    just releases a symbol's old entries early when its data is known to have
+    changed.
+    """
+
+    def __init__(self, max_entries: int = 20000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[Hashable, ...], Dict[str, Any]]" = OrderedDict()
+        # Keys by symbol (key[0]), so invalidating one symbol does not scan every entry
+        self._symbol_keys: Dict[Hashable, set] = {}
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, key: Tuple[Hashable, ...]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            analysis = self._entries.get(key)
+            if analysis is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+        return dict(analysis)
+
+    def put(self, key: Tuple[Hashable, ...], analysis: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = dict(analysis)
+            self._entries.move_to_end(key)
+            self._symbol_keys.setdefault(key[0], set()).add(key)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._forget(evicted)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, symbol: Optional[str] = None):
+        """Drop cached analyses for a symbol, or everything if no symbol is given."""
+        with self._lock:
+            if symbol is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                self._symbol_keys.clear()
+            else:
+                stale = self._symbol_keys.pop(symbol, ())
+                for key in stale:
+                    del self._entries[key]
+                removed = len(stale)
+            self._stats["invalidations"] += removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/eviction counters, hit ratio and current size."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+    def _forget(self, key: Tuple[Hashable, ...]):
+        """Remove an evicted key from the symbol index (the lock is held)."""
+        keys = self._symbol_keys.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._symbol_keys[key[0]]
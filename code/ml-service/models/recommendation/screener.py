@@ -0,0 +1,348 @@
+# models/recommendation/screener.py
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models.recommendation.indicators import BARS_PER_YEAR, compute_indicator_batch, pack_closes
+from models.recommendation.rule_based import RISK_TOLERANCES
+from services.metrics import METRICS
+from services.universe_index import UniverseIndex
+
+logger = logging.getLogger(__name__)
+
+# Per-symbol values kept for screening: the scoring inputs plus what the filters read
+FEATURE_COLUMNS = (
+    "close", "avg_volume", "ma_5", "ma_20", "rsi", "macd", "macd_signal",
+    "volatility", "short_term", "medium_term", "long_term",
+)
+
+# Bars averaged for the volume filter
+VOLUME_BARS = 20
+
+MACD_CONDITIONS = ("bullish", "bearish")
+
+
+class FeatureColumns:
+    """
+    Latest indicator values of every symbol in a UniverseIndex, for one bar interval.
+
+    Values are held as one float64 array per FEATURE_COLUMNS name, in index
+    order (NaN until a symbol has been computed), so screens filter and score
+    the whole universe with a few vectorized operations.
+
+    Updates are incremental: invalidate marks a symbol whose bars changed
+    (e.g. as a PriceStore listener) and refresh recomputes only the marked
+    symbols. Columns are copied on write and swapped in whole, so readers
+    always see one consistent version without locking.
+    """
+
+    def __init__(self, universe_index: UniverseIndex, interval: str = "1d", chunk_size: int = 512):
+        """
+        Args:
+            universe_index: Universe whose symbols the columns are aligned with
+            interval: Bar interval of the histories (annualizes volatility)
+            chunk_size: Symbols whose indicators are computed per batch (bounds
+                the (bars x symbols) array built for multi-year histories)
+        """
+        self.universe_index = universe_index
+        self.interval = interval
+        self.chunk_size = chunk_size
+
+        self.columns = {name: np.full(universe_index.size, np.nan) for name in FEATURE_COLUMNS}
+        self.version = 0
+        self.updated_at: Optional[float] = None
+
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        # Symbol -> sequence number of its latest invalidation; everything starts uncomputed
+        self._sequence = 0
+        self._marks = dict.fromkeys(universe_index.symbols.tolist(), 0)
+
+    def invalidate(self, symbol: Optional[str] = None):
+        """Mark a symbol (or every symbol if none is given) for recomputation on the next refresh."""
+        with self._lock:
+            self._sequence += 1
+            if symbol is None:
+                self._marks = dict.fromkeys(self.universe_index.symbols.tolist(), self._sequence)
+            elif symbol in self.universe_index:
+                self._marks[symbol] = self._sequence
+
+    def pending(self) -> List[str]:
+        """Symbols that are not computed yet or were invalidated since."""
+        with self._lock:
+            return list(self._marks)
+
+    def refresh(self, fetch: Callable[[str], Any]) -> int:
+        """
+        Recompute the pending symbols.
+
+        Args:
+            fetch: Returns a symbol's history, a mapping with a "close" (and
+                optionally a "volume") series; symbols whose fetch fails keep
+                NaN values until they are invalidated again
+
+        Returns:
+            Number of symbols recomputed
+        """
+        pending = self.pending()
+        if not pending:
+            return 0
+
+        historical_data, seen = {}, {}
+        for symbol in pending:
+            try:
+                historical_data[symbol] = fetch(symbol)
+            except Exception as e:
+                logger.warning(f"Could not fetch history of {symbol} for screening: {str(e)}")
+            # Invalidations up to here (including any this fetch caused) are covered
+            seen[symbol] = self._sequence
+
+        self.update(historical_data)
+        with self._lock:
+            for symbol, sequence in seen.items():
+                if self._marks.get(symbol, sequence + 1) <= sequence:
+                    del self._marks[symbol]
+        return len(historical_data)
+
+    def update(self, historical_data: Dict[str, Any]):
+        """Recompute the given symbols' values from their histories and publish a new version."""
+        symbols = [
+            symbol for symbol, data in historical_data.items()
+            if symbol in self.universe_index and len(data["close"])
+        ]
+        if not symbols:
+            return
+
+        updates = {name: np.empty(len(symbols)) for name in FEATURE_COLUMNS}
+        bars_per_year = BARS_PER_YEAR.get(self.interval, 252)
+        with METRICS.stage("screen", "features"):
+            for start in range(0, len(symbols), self.chunk_size):
+                chunk = symbols[start:start + self.chunk_size]
+                _, closes, lengths = pack_closes({symbol: historical_data[symbol] for symbol in chunk})
+                indicators = compute_indicator_batch(closes, lengths, bars_per_year, rows=1)
+                rows = slice(start, start + len(chunk))
+                updates["close"][rows] = indicators["last_close"]
+                for name in ("ma_5", "ma_20", "rsi", "macd", "macd_signal"):
+                    updates[name][rows] = indicators[name][-1]
+                for name in ("volatility", "short_term", "medium_term", "long_term"):
+                    updates[name][rows] = indicators[name]
+                updates["avg_volume"][rows] = [_average_volume(historical_data[symbol]) for symbol in chunk]
+
+        positions = self.universe_index.positions(symbols)
+        with self._write_lock:
+            columns = {name: values.copy() for name, values in self.columns.items()}
+            for name, values in updates.items():
+                columns[name][positions] = values
+            self.columns = columns
+            self.version += 1
+            self.updated_at = time.time()
+        METRICS.inc("ml_symbols_scored_total", len(symbols), pipeline="screen")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = len(self._marks)
+        return {
+            "symbols": self.universe_index.size,
+            "computed": int(np.count_nonzero(~np.isnan(self.columns["close"]))),
+            "pending": pending,
+            "version": self.version,
+            "age_seconds": time.time() - self.updated_at if self.updated_at is not None else None,
+        }
+
+
+def _average_volume(data: Any) -> float:
+    if "volume" not in data:
+        return np.nan
+    volume = np.asarray(data["volume"], dtype=np.float64)[-VOLUME_BARS:]
+    return float(volume.mean()) if len(volume) else np.nan
+
+
+class Screener:
+    """
+    Ranks the whole universe for a risk/horizon profile from precomputed FeatureColumns.
+
+    Filters are boolean masks over the columns (sectors and exclusions come
+    from the UniverseIndex bitmaps) and scores are the recommender's rules
+    applied to the columns, memoized per column version. Only the requested
+    page is ranked: np.argpartition selects the best offset + limit matches
+    and just those are sorted, ties keeping index order.
+    """
+
+    def __init__(
+        self,
+        recommender,
+        universe_index: UniverseIndex,
+        intervals: Dict[str, str],
+        max_limit: int = 500
+    ):
+        """
+        Args:
+            recommender: RuleBasedRecommender whose scoring rules rank the universe
+            universe_index: Universe to screen
+            intervals: Bar interval of each time horizon (one FeatureColumns per horizon)
+            max_limit: Largest page size a screen may request
+        """
+        self.recommender = recommender
+        self.universe_index = universe_index
+        self.max_limit = max_limit
+        self.features = {
+            time_horizon: FeatureColumns(universe_index, interval)
+            for time_horizon, interval in intervals.items()
+        }
+        self._scores: Dict[Tuple[str, str], Tuple[int, np.ndarray, List[Tuple[str, np.ndarray]]]] = {}
+
+    def features_for(self, time_horizon: str) -> FeatureColumns:
+        """Feature columns of a horizon; unknown horizons use the medium ones."""
+        return self.features.get(time_horizon, self.features.get("medium"))
+
+    def invalidate(self, symbol: Optional[str] = None):
+        """Mark a symbol's features stale in every horizon (a PriceStore listener)."""
+        for features in self.features.values():
+            features.invalidate(symbol)
+
+    def screen(
+        self,
+        risk_tolerance: str,
+        time_horizon: str,
+        sectors: Optional[List[str]] = None,
+        exclusions: Optional[List[str]] = None,
+        min_volume: Optional[float] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        min_rsi: Optional[float] = None,
+        max_rsi: Optional[float] = None,
+        macd: Optional[str] = None,
+        min_score: Optional[float] = None,
+        limit: int = 20,
+        offset: int = 0
+    ) -> Dict[str, Any]:
+        """
+        Score and filter every symbol, and return one page of the best matches.
+
+        Args:
+            risk_tolerance: Risk tolerance whose scoring rules apply
+            time_horizon: Investment horizon (selects the features' bar interval)
+            sectors: Sectors to keep (case-insensitive)
+            exclusions: Symbols and/or sector names to drop
+            min_volume: Minimum average volume over the last VOLUME_BARS bars
+            min_price, max_price: Range of the latest close
+            min_rsi, max_rsi: Range of the latest RSI
+            macd: "bullish" (MACD above its signal line) or "bearish" (below)
+            min_score: Minimum score (0-100)
+            limit: Page size (at most max_limit)
+            offset: Matches to skip (best first)
+
+        Returns:
+            {"results", "total", "offset", "limit", "as_of"}: results are
+            dicts of symbol, sector, score, confidence, rationale and feature
+            values, best first; total counts every match
+
+        Raises:
+            ValueError: If the profile, the page or the MACD condition is invalid
+        """
+        # Scores are memoized per profile, so only known profiles may create entries
+        if risk_tolerance not in RISK_TOLERANCES:
+            raise ValueError(f"Unknown risk tolerance {risk_tolerance!r}; expected one of {', '.join(RISK_TOLERANCES)}")
+        if time_horizon not in self.features:
+            raise ValueError(f"Unknown time horizon {time_horizon!r}; expected one of {', '.join(self.features)}")
+        if not 1 <= limit <= self.max_limit:
+            raise ValueError(f"limit must be between 1 and {self.max_limit}")
+        if offset < 0:
+            raise ValueError("offset must not be negative")
+        if macd is not None and macd not in MACD_CONDITIONS:
+            raise ValueError(f"Unknown MACD condition {macd!r}; expected one of {', '.join(MACD_CONDITIONS)}")
+
+        features = self.features_for(time_horizon)
+        # One consistent version for the whole screen
+        version, columns, updated_at = features.version, features.columns, features.updated_at
+
+        with METRICS.stage("screen", "filter"):
+            mask = self.universe_index.mask(sectors=sectors, exclusions=exclusions)
+            mask &= ~np.isnan(columns["close"])
+            bounds = (
+                ("avg_volume", min_volume, None),
+                ("close", min_price, max_price),
+                ("rsi", min_rsi, max_rsi),
+            )
+            for name, low, high in bounds:
+                if low is not None:
+                    mask &= columns[name] >= low
+                if high is not None:
+                    mask &= columns[name] <= high
+            if macd == "bullish":
+                mask &= columns["macd"] > columns["macd_signal"]
+            elif macd == "bearish":
+                mask &= columns["macd"] < columns["macd_signal"]
+
+        with METRICS.stage("screen", "scoring"):
+            scores, observations = self._scored(time_horizon, risk_tolerance, version, columns, features.interval)
+            if min_score is not None:
+                mask &= scores >= min_score
+
+        with METRICS.stage("screen", "top_k"):
+            candidates = np.flatnonzero(mask)
+            page = self._page(scores, candidates, offset, limit)
+
+        results = []
+        for position in page.tolist():
+            score = int(scores[position])
+            results.append({
+                "symbol": self.universe_index.symbols[position],
+                "sector": self.universe_index.sector_names[self.universe_index.sector_codes[position]],
+                "score": score,
+                "confidence": self.recommender._map_score_to_confidence(score),
+                "rationale": " and ".join([text for text, hits in observations if hits[position]][:3]),
+                "price": round(float(columns["close"][position]), 2),
+                "volume": _optional(columns["avg_volume"][position]),
+                "rsi": _optional(columns["rsi"][position]),
+                "macd": _optional(columns["macd"][position]),
+                "macd_signal": _optional(columns["macd_signal"][position]),
+                "volatility": _optional(columns["volatility"][position]),
+            })
+
+        return {
+            "results": results,
+            "total": len(candidates),
+            "offset": offset,
+            "limit": limit,
+            "as_of": updated_at,
+        }
+
+    def _scored(
+        self,
+        time_horizon: str,
+        risk_tolerance: str,
+        version: int,
+        columns: Dict[str, np.ndarray],
+        interval: str
+    ) -> Tuple[np.ndarray, List[Tuple[str, np.ndarray]]]:
+        """Scores and observation masks of every symbol, recomputed once per column version."""
+        key = (time_horizon, risk_tolerance)
+        cached = self._scores.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1], cached[2]
+        scores, observations = self.recommender.score_indicators(columns, risk_tolerance, time_horizon, interval)
+        self._scores[key] = (version, scores, observations)
+        return scores, observations
+
+    @staticmethod
+    def _page(scores: np.ndarray, candidates: np.ndarray, offset: int, limit: int) -> np.ndarray:
+        """Positions of candidates ranked offset to offset + limit, best first (ties in index order)."""
+        end = min(offset + limit, len(candidates))
+        if offset >= end:
+            return candidates[:0]
+        # Integer scores with the position folded in make every key unique
+        keys = candidates - scores[candidates] * (len(scores) + 1)
+        if end < len(candidates):
+            selected = np.argpartition(keys, end - 1)[:end]
+        else:
+            selected = np.arange(len(candidates))
+        ordered = selected[np.argsort(keys[selected])]
+        return candidates[ordered[offset:end]]
+
+
+def _optional(value: float) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), 4)
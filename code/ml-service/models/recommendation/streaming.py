@@ -0,0 +1,266 @@
+# models/recommendation/streaming.py
+import hashlib
+import math
+from array import array
+from typing import Dict, Iterable
+
+import numpy as np
+
+from models.recommendation.indicators import BARS_PER_YEAR, TRADING_DAYS, SHORT_TERM_BARS, MEDIUM_TERM_BARS, LONG_TERM_BARS
+
+NAN = float("nan")
+
+MA_WINDOWS = (5, 10, 20)
+RSI_WINDOW = 14
+
+
+class StreamingIndicators:
+    """
+    Incrementally maintained technical indicators for one symbol.
+
+    Each update is O(1): moving averages and the RSI gain/loss averages use
+    running sums over ring buffers, EMAs are updated recursively, and
+    volatility keeps running sums of returns and squared returns (recomputed
+    from the window once per pass over it), annualized for the bar interval
+    the closes arrive at.
+
+    Values match RuleBasedRecommender._calculate_indicators on the same bars.
+    The RSI there averages gains and losses over a simple 14-bar window, so
+    this keeps running 14-bar sums rather than Wilder smoothing. Volatility
+    and trend strength are computed over the last `window` bars, matching
+    _analyze_stock on a DataFrame holding that many bars; EMAs and MACD run
+    over every bar seen, as pandas does over the full series.
+    """
+
+    __slots__ = (
+        "window", "bars_per_year", "count", "last_close",
+        "_closes", "_close_capacity",
+        "_ma_sums",
+        "_deltas", "_gain_sum", "_loss_sum", "_gain_count", "_loss_count",
+        "_returns", "_return_capacity", "_return_sum", "_return_sq_sum",
+        "_short_up", "_medium_up", "_long_up", "_long_bars",
+        "ema_12", "ema_26", "macd_signal",
+    )
+
+    def __init__(self, window: int = 31, interval: str = "1d"):
+        """
+        Args:
+            window: Number of most recent bars that volatility and trend
+                strength are computed over (the fetched window length)
+            interval: Bar interval of the closes ("1d", "1w", "1mo" or intraday, e.g. "60min")
+        """
+        if window < MEDIUM_TERM_BARS + 1:
+            raise ValueError(f"window must be at least {MEDIUM_TERM_BARS + 1} bars")
+
+        self.window = window
+        self.bars_per_year = BARS_PER_YEAR.get(interval, TRADING_DAYS)
+        self.count = 0
+        self.last_close = NAN
+
+        self._close_capacity = window
+        self._closes = array("d", bytes(8 * window))
+        self._ma_sums = array("d", bytes(8 * len(MA_WINDOWS)))
+
+        self._deltas = array("d", bytes(8 * RSI_WINDOW))
+        self._gain_sum = 0.0
+        self._loss_sum = 0.0
+        self._gain_count = 0
+        self._loss_count = 0
+
+        self._return_capacity = window - 1
+        self._returns = array("d", bytes(8 * self._return_capacity))
+        self._return_sum = 0.0
+        self._return_sq_sum = 0.0
+        self._short_up = 0
+        self._medium_up = 0
+        # The long-term trend spans LONG_TERM_BARS, or the whole window if shorter
+        self._long_bars = min(window, LONG_TERM_BARS)
+        self._long_up = 0
+
+        self.ema_12 = NAN
+        self.ema_26 = NAN
+        self.macd_signal = NAN
+
+    @classmethod
+    def from_closes(cls, closes: Iterable[float], window: int = 31, interval: str = "1d") -> "StreamingIndicators":
+        """Build a state by replaying a series of closes."""
+        state = cls(window, interval)
+        for close in closes:
+            state.update(close)
+        return state
+
+    def update(self, close: float):
+        """Add the next bar's close."""
+        close = float(close)
+        t = self.count
+        closes = self._closes
+        capacity = self._close_capacity
+
+        # Moving averages: add the new close, drop the one leaving each window
+        for i, w in enumerate(MA_WINDOWS):
+            self._ma_sums[i] += close
+            if t >= w:
+                self._ma_sums[i] -= closes[(t - w) % capacity]
+
+        if t > 0:
+            previous = self.last_close
+            self._update_rsi(t, close - previous)
+            self._update_returns(t, close / previous - 1)
+
+        closes[t % capacity] = close
+        self.count = t + 1
+        self.last_close = close
+
+        # EMAs / MACD (pandas ewm(span, adjust=False) recursion)
+        self.ema_12 = _ema_step(self.ema_12, close, 12)
+        self.ema_26 = _ema_step(self.ema_26, close, 26)
+        self.macd_signal = _ema_step(self.macd_signal, self.ema_12 - self.ema_26, 9)
+
+    def _update_rsi(self, t: int, delta: float):
+        # Delta t (1-based) lives in slot t % RSI_WINDOW; the slot holds delta t - 14
+        slot = t % RSI_WINDOW
+        if t > RSI_WINDOW:
+            old = self._deltas[slot]
+            if old > 0:
+                self._gain_sum -= old
+                self._gain_count -= 1
+            elif old < 0:
+                self._loss_sum += old
+                self._loss_count -= 1
+        self._deltas[slot] = delta
+        if delta > 0:
+            self._gain_sum += delta
+            self._gain_count += 1
+        elif delta < 0:
+            self._loss_sum -= delta
+            self._loss_count += 1
+
+        # Running sums can drift below zero; an empty side is exactly zero
+        if self._gain_count == 0:
+            self._gain_sum = 0.0
+        if self._loss_count == 0:
+            self._loss_sum = 0.0
+
+    def _update_returns(self, t: int, ret: float):
+        returns = self._returns
+        capacity = self._return_capacity
+        # Return t (1-based) lives in slot t % capacity
+        n = t  # returns seen so far, including this one
+
+        if n > capacity:
+            old = returns[t % capacity]
+            self._return_sum -= old
+            self._return_sq_sum -= old * old
+
+        # Trend consistency counts up days among the last 4 / 19 / _long_bars - 1 returns
+        if n > SHORT_TERM_BARS - 1 and returns[(t - SHORT_TERM_BARS + 1) % capacity] > 0:
+            self._short_up -= 1
+        if n > MEDIUM_TERM_BARS - 1 and returns[(t - MEDIUM_TERM_BARS + 1) % capacity] > 0:
+            self._medium_up -= 1
+        if n > self._long_bars - 1 and returns[(t - self._long_bars + 1) % capacity] > 0:
+            self._long_up -= 1
+        if ret > 0:
+            self._short_up += 1
+            self._medium_up += 1
+            self._long_up += 1
+
+        returns[t % capacity] = ret
+        if t % capacity == 0:
+            # Re-anchor once per pass over the ring so add/subtract rounding cannot accumulate
+            # (unfilled slots hold zeros); amortized O(1)
+            self._return_sum = math.fsum(returns)
+            self._return_sq_sum = math.fsum(r * r for r in returns)
+        else:
+            self._return_sum += ret
+            self._return_sq_sum += ret * ret
+
+    def fingerprint(self) -> bytes:
+        """
+        Fingerprint of everything scoring depends on (the last `window` closes and the annualization).
+
+        Used by series_fingerprint so states can share the ScoreCache with DataFrames.
+        """
+        digest = hashlib.blake2b(self._closes.tobytes(), digest_size=16)
+        digest.update(f"{min(self.count, self.window)}:{self.count % self._close_capacity}:{self.bars_per_year}".encode())
+        return digest.digest()
+
+    def close_at(self, bars_ago: int) -> float:
+        """Close from `bars_ago` bars before the latest one (0 = latest)."""
+        if bars_ago >= min(self.count, self._close_capacity):
+            raise IndexError(bars_ago)
+        return self._closes[(self.count - 1 - bars_ago) % self._close_capacity]
+
+    def snapshot(self) -> Dict[str, float]:
+        """Current indicator values, named like the _calculate_indicators columns."""
+        count = self.count
+        bars = min(count, self.window)
+
+        values = {"close": self.last_close}
+        for i, w in enumerate(MA_WINDOWS):
+            values[f"ma_{w}"] = self._ma_sums[i] / w if count >= w else NAN
+
+        # pandas counts the first (missing) delta as a zero gain/loss
+        if count >= RSI_WINDOW:
+            avg_gain = self._gain_sum / RSI_WINDOW
+            avg_loss = self._loss_sum / RSI_WINDOW
+            if avg_loss > 0:
+                values["rsi"] = 100 - (100 / (1 + avg_gain / avg_loss))
+            else:
+                values["rsi"] = 100.0 if avg_gain > 0 else NAN
+        else:
+            values["rsi"] = NAN
+
+        values["ema_12"] = self.ema_12
+        values["ema_26"] = self.ema_26
+        values["macd"] = self.ema_12 - self.ema_26
+        values["macd_signal"] = self.macd_signal
+
+        n = bars - 1
+        if n > 1:
+            mean = self._return_sum / n
+            # Only rounding of a (near-)constant window can take this below zero
+            variance = max((self._return_sq_sum - n * mean * mean) / (n - 1), 0.0)
+            values["volatility"] = math.sqrt(variance) * math.sqrt(self.bars_per_year)
+        else:
+            values["volatility"] = NAN
+
+        for name, span, up_days in (
+            ("short_term", SHORT_TERM_BARS, self._short_up),
+            ("medium_term", MEDIUM_TERM_BARS, self._medium_up),
+            ("long_term", self._long_bars, self._long_up),
+        ):
+            length = min(bars, span)
+            if length == 0:
+                values[name] = NAN
+                continue
+            trend = 1 if self.last_close > self.close_at(length - 1) else 0
+            values[name] = trend * (up_days / length)
+
+        values["bars"] = bars
+        return values
+
+
+def _ema_step(previous: float, value: float, span: int) -> float:
+    new_weight = 2.0 / (span + 1)
+    old_weight = 1.0 - new_weight
+    if previous != previous:  # NaN: the series starts here
+        return value
+    return (old_weight * previous + new_weight * value) / (old_weight + new_weight)
+
+
+def snapshot_indicators(states: Iterable[StreamingIndicators]) -> Dict[str, np.ndarray]:
+    """
+    Stack the current values of many states into compute_indicator_batch's layout.
+
+    Only the latest row is available, so the per-bar indicators come back
+    with shape (1, S) and the per-symbol summaries with shape (S,).
+    """
+    snapshots = [state.snapshot() for state in states]
+    indicators = {}
+    for name in ("ma_5", "ma_10", "ma_20", "rsi", "ema_12", "ema_26", "macd", "macd_signal"):
+        indicators[name] = np.array([[values[name] for values in snapshots]], dtype=np.float64)
+    for name in ("volatility", "short_term", "medium_term", "long_term"):
+        indicators[name] = np.array([values[name] for values in snapshots], dtype=np.float64)
+    indicators["last_close"] = np.array([values["close"] for values in snapshots], dtype=np.float64)
+    indicators["close"] = indicators["last_close"][None, :]
+    return indicators
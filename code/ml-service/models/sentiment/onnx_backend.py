@@ -0,0 +1,247 @@
+# models/sentiment/onnx_backend.py
+import bisect
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    import onnxruntime as ort
+    from tokenizers import Tokenizer
+except ImportError:  # optional: the lexicon scorer is used without them
+    ort = None
+    Tokenizer = None
+
+logger = logging.getLogger(__name__)
+
+# Files looked up in a model directory; quantized models are preferred
+MODEL_FILES = ("model.int8.onnx", "model_quantized.onnx", "model.onnx")
+TOKENIZER_FILE = "tokenizer.json"
+CONFIG_FILE = "config.json"
+
+# Padded sequence lengths; a micro-batch is padded to the smallest bucket
+# that fits its longest document instead of to max_length
+DEFAULT_BUCKETS = (16, 32, 64, 128, 256, 512)
+
+# Label order assumed when config.json has no id2label
+DEFAULT_LABELS = ("negative", "neutral", "positive")
+
+# Backends unpickled in this process (process-pool workers), by configuration
+_shared_backends: Dict[tuple, "OnnxSentimentBackend"] = {}
+
+
+def is_available() -> bool:
+    """Whether onnxruntime and tokenizers are installed."""
+    return ort is not None
+
+
+def find_model_file(model_path: str) -> Optional[str]:
+    """Return the .onnx file for model_path (a file, or a directory holding one of MODEL_FILES)."""
+    if os.path.isfile(model_path) and model_path.endswith(".onnx"):
+        return model_path
+    if os.path.isdir(model_path):
+        for name in MODEL_FILES:
+            candidate = os.path.join(model_path, name)
+            if os.path.isfile(candidate):
+                return candidate
+    return None
+
+
+class OnnxSentimentBackend:
+    """
+    CPU inference for an exported sequence-classification model (e.g. a
+    small financial-sentiment BERT) with ONNX Runtime.
+
+    Everything is loaded from local files, so it runs offline: the .onnx
+    graph (an int8-quantized one is preferred when present), the Hugging
+    Face tokenizer.json and, optionally, config.json for id2label.
+
+    predict() tokenizes through an LRU cache of token ids, sorts documents by
+    length and groups them into micro-batches of at most max_batch_size
+    within one length bucket; each is padded only up to its bucket, so
+    short headlines never pay for max_length attention. Results come back
+    in input order.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        max_batch_size: int = 32,
+        max_length: int = 128,
+        buckets: Optional[Sequence[int]] = DEFAULT_BUCKETS,
+        tokenizer_cache_size: int = 8192,
+        threads: Optional[int] = None
+    ):
+        """
+        Args:
+            model_path: Model directory (or .onnx file next to tokenizer.json)
+            max_batch_size: Largest micro-batch sent to the session
+            max_length: Token limit per document (longer ones are truncated)
+            buckets: Padded lengths to choose from; None pads every batch to max_length
+            tokenizer_cache_size: Token-id sequences kept in the tokenizer cache
+            threads: ONNX Runtime intra-op threads (runtime default if None)
+
+        Raises:
+            ImportError: If onnxruntime or tokenizers is not installed
+            FileNotFoundError: If the model or tokenizer file is missing
+        """
+        if not is_available():
+            raise ImportError("onnxruntime and tokenizers are required for the ONNX sentiment backend")
+
+        model_file = find_model_file(model_path)
+        if model_file is None:
+            raise FileNotFoundError(f"No ONNX model ({', '.join(MODEL_FILES)}) found at {model_path}")
+        model_dir = os.path.dirname(model_file)
+        tokenizer_file = os.path.join(model_dir, TOKENIZER_FILE)
+        if not os.path.isfile(tokenizer_file):
+            raise FileNotFoundError(f"No {TOKENIZER_FILE} next to {model_file}")
+
+        self._config = (model_path, max_batch_size, max_length, tuple(buckets) if buckets else None,
+                        tokenizer_cache_size, threads)
+        self.model_file = model_file
+        self.max_batch_size = max_batch_size
+        self.max_length = max_length
+        self.buckets = sorted(b for b in (buckets or ()) if b < max_length) + [max_length]
+        self.tokenizer_cache_size = tokenizer_cache_size
+
+        self.tokenizer = Tokenizer.from_file(tokenizer_file)
+        self.tokenizer.no_padding()
+        self.tokenizer.enable_truncation(max_length)
+        self.pad_id = self.tokenizer.token_to_id("[PAD]") or 0
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_file, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+        self.labels = self._load_labels(os.path.join(model_dir, CONFIG_FILE))
+        self._lock = threading.Lock()
+        self._token_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._stats = {"tokenizer_hits": 0, "tokenizer_misses": 0, "batches": 0, "padded_tokens": 0, "tokens": 0}
+        logger.info(f"OnnxSentimentBackend loaded {model_file} (labels={self.labels}, buckets={self.buckets})")
+
+    def __reduce__(self):
+        # Sessions cannot be pickled; a process-pool worker loads the model once and reuses it
+        return _shared_backend, self._config
+
+    def predict(self, texts: List[str]) -> List[Dict[str, float]]:
+        """
+        Return one {label: probability} dictionary per text, in input order.
+        """
+        if not texts:
+            return []
+        encoded = self._encode(texts)
+        order = sorted(range(len(texts)), key=lambda index: len(encoded[index]))
+
+        # Micro-batches never span two length buckets, so each is padded only to its own
+        batches, batch, batch_width = [], [], None
+        for position in order:
+            width = self._bucket(len(encoded[position]))
+            if batch and (width != batch_width or len(batch) == self.max_batch_size):
+                batches.append((batch, batch_width))
+                batch = []
+            batch.append(position)
+            batch_width = width
+        batches.append((batch, batch_width))
+
+        results: List[Optional[Dict[str, float]]] = [None] * len(texts)
+        for positions, width in batches:
+            probabilities = self._run([encoded[position] for position in positions], width)
+            for position, row in zip(positions, probabilities):
+                results[position] = dict(zip(self.labels, row.tolist()))
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        """Tokenizer cache hits/misses, batches run and the share of padding in them."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["tokenizer_entries"] = len(self._token_cache)
+        lookups = stats["tokenizer_hits"] + stats["tokenizer_misses"]
+        stats["tokenizer_hit_ratio"] = round(stats["tokenizer_hits"] / lookups, 4) if lookups else 0.0
+        stats["padding_ratio"] = round(stats["padded_tokens"] / stats["tokens"], 4) if stats["tokens"] else 0.0
+        return stats
+
+    def _encode(self, texts: List[str]) -> List[np.ndarray]:
+        cache = self._token_cache
+        with self._lock:
+            encoded = [cache.get(text) for text in texts]
+            for text, ids in zip(texts, encoded):
+                if ids is not None:
+                    cache.move_to_end(text)
+            missing = list(dict.fromkeys(text for text, ids in zip(texts, encoded) if ids is None))
+            self._stats["tokenizer_hits"] += len(texts) - len(missing)
+            self._stats["tokenizer_misses"] += len(missing)
+
+        if missing:
+            fresh = {
+                text: np.asarray(encoding.ids, dtype=np.int64)
+                for text, encoding in zip(missing, self.tokenizer.encode_batch(missing))
+            }
+            with self._lock:
+                cache.update(fresh)
+                while len(cache) > self.tokenizer_cache_size:
+                    cache.popitem(last=False)
+            encoded = [ids if ids is not None else fresh[text] for text, ids in zip(texts, encoded)]
+        return encoded
+
+    def _bucket(self, length: int) -> int:
+        return self.buckets[bisect.bisect_left(self.buckets, length)]
+
+    def _run(self, sequences: List[np.ndarray], width: int) -> np.ndarray:
+        input_ids = np.full((len(sequences), width), self.pad_id, dtype=np.int64)
+        attention_mask = np.zeros((len(sequences), width), dtype=np.int64)
+        for row, ids in enumerate(sequences):
+            input_ids[row, :len(ids)] = ids
+            attention_mask[row, :len(ids)] = 1
+
+        feed = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feed["token_type_ids"] = np.zeros_like(input_ids)
+        logits = self.session.run(None, {name: value for name, value in feed.items() if name in self.input_names})[0]
+
+        with self._lock:
+            self._stats["batches"] += 1
+            self._stats["tokens"] += input_ids.size
+            self._stats["padded_tokens"] += input_ids.size - int(attention_mask.sum())
+
+        # Softmax over the label axis
+        logits = logits - logits.max(axis=1, keepdims=True)
+        exponentials = np.exp(logits)
+        return exponentials / exponentials.sum(axis=1, keepdims=True)
+
+    @staticmethod
+    def _load_labels(config_file: str) -> List[str]:
+        if not os.path.isfile(config_file):
+            return list(DEFAULT_LABELS)
+        with open(config_file) as handle:
+            id2label = json.load(handle).get("id2label")
+        if not id2label:
+            return list(DEFAULT_LABELS)
+        return [str(id2label[key]).lower() for key in sorted(id2label, key=int)]
+
+
+def _shared_backend(*config) -> OnnxSentimentBackend:
+    backend = _shared_backends.get(config)
+    if backend is None:
+        backend = _shared_backends[config] = OnnxSentimentBackend(*config)
+    return backend
+
+
+def quantize_int8(model_file: str, output_file: Optional[str] = None) -> str:
+    """
+    Write a dynamically int8-quantized copy of an ONNX model (MatMul/Gemm
+    weights), by default as model.int8.onnx next to it, which
+    OnnxSentimentBackend then prefers.
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    output_file = output_file or os.path.join(os.path.dirname(model_file), MODEL_FILES[0])
+    quantize_dynamic(model_file, output_file, weight_type=QuantType.QInt8)
+    logger.info(f"Quantized {model_file} to {output_file}")
+    return output_file
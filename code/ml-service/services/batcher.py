@@ -0,0 +1,202 @@
+# services/batcher.py
+import asyncio
+import logging
+import os
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from services.executor import BoundedExecutor
+from services.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+
+class _Request:
+    """Items one caller submitted, and where their results are collected."""
+
+    __slots__ = ("future", "enqueued", "results", "remaining")
+
+    def __init__(self, future: asyncio.Future, enqueued: float, count: int):
+        self.future = future
+        self.enqueued = enqueued
+        self.results: List[Any] = [None] * count
+        self.remaining = count
+
+
+class MicroBatcher:
+    """
+    Gathers items submitted by concurrent requests into shared batches.
+
+    Every submit() call queues its items and awaits a future. A batch is
+    dispatched once max_batch_size items are queued, or max_wait seconds
+    after its first item arrived, whichever comes first; it runs as one
+    batch_func(items) call (on `executor` when one is set) and each
+    result is routed back to the request that submitted the item. A
+    request's items may be split over consecutive batches; its future
+    resolves when all of them are done. Items of requests that were
+    cancelled while queued are dropped before dispatch.
+
+    At most max_concurrent_batches batches run at once; items arriving
+    meanwhile accumulate into the next batch, so batches grow with load.
+    If batch_func fails, every request with an item in that batch gets the
+    exception.
+
+    Must be used from a single event loop at a time (the loop that serves
+    the app); the internal state is rebuilt if it is used from a new loop.
+    """
+
+    def __init__(
+        self,
+        batch_func: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 64,
+        max_wait: float = 0.005,
+        executor: Optional[BoundedExecutor] = None,
+        max_concurrent_batches: int = 1,
+        name: str = "sentiment"
+    ):
+        """
+        Args:
+            batch_func: Function mapping a list of items to a list of results in the same order
+            max_batch_size: Largest batch passed to batch_func
+            max_wait: Seconds a queued item waits for the batch to fill before dispatch
+            executor: Where batch_func runs (inline on the event loop if None)
+            max_concurrent_batches: Batches allowed in flight at once
+            name: Pipeline label for the submit-to-result ("batched") stage metric
+        """
+        self.batch_func = batch_func
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.executor = executor
+        self.max_concurrent_batches = max_concurrent_batches
+        self.name = name
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Deque[Tuple[_Request, int, Any]] = deque()
+        self._running = set()
+        self._stats = {
+            "requests": 0, "items": 0, "batches": 0, "batched_items": 0,
+            "full_batches": 0, "dropped": 0, "failed_batches": 0
+        }
+        logger.info(f"MicroBatcher initialized (max_batch_size={max_batch_size}, max_wait={max_wait * 1000:.1f}ms)")
+
+    @classmethod
+    def from_env(
+        cls,
+        batch_func: Callable[[List[Any]], List[Any]],
+        executor: Optional[BoundedExecutor] = None
+    ) -> Optional["MicroBatcher"]:
+        """Build a batcher from ML_BATCHER_MAX_SIZE / ML_BATCHER_MAX_WAIT_MS, or None if ML_BATCHER=off."""
+        if os.environ.get("ML_BATCHER", "on").lower() in ("off", "0", "false"):
+            return None
+        return cls(
+            batch_func,
+            max_batch_size=int(os.environ.get("ML_BATCHER_MAX_SIZE", "64")),
+            max_wait=float(os.environ.get("ML_BATCHER_MAX_WAIT_MS", "2")) / 1000.0,
+            executor=executor,
+            max_concurrent_batches=int(os.environ.get("ML_BATCHER_CONCURRENCY", "1"))
+        )
+
+    async def submit(self, items: List[Any]) -> List[Any]:
+        """
+        Queue items for batching and return their results, in order.
+
+        Raises:
+            Whatever batch_func (or the executor) raised for a batch holding one of the items
+        """
+        if not items:
+            return []
+        self._bind_loop()
+
+        request = _Request(self._loop.create_future(), self._loop.time(), len(items))
+        self._queue.extend((request, index, item) for index, item in enumerate(items))
+        self._stats["requests"] += 1
+        self._stats["items"] += len(items)
+        self._arrived.set()
+        try:
+            return await request.future
+        finally:
+            METRICS.record_stage(self.name, "batched", self._loop.time() - request.enqueued)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return request/item/batch counters, the mean batch size and the current queue length."""
+        stats = dict(self._stats)
+        stats["queued"] = len(self._queue)
+        stats["mean_batch_size"] = round(stats["batched_items"] / stats["batches"], 2) if stats["batches"] else 0.0
+        stats.update({"max_batch_size": self.max_batch_size, "max_wait_ms": self.max_wait * 1000})
+        return stats
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if loop is self._loop:
+            return
+        self._loop = loop
+        self._queue.clear()
+        self._arrived = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+        self._dispatcher = loop.create_task(self._dispatch_loop())
+
+    async def _dispatch_loop(self):
+        queue = self._queue
+        while True:
+            await self._arrived.wait()
+            # Wait for a free slot first: items keep accumulating while batches run
+            await self._slots.acquire()
+
+            # Give the batch until max_wait after its oldest item arrived to fill up
+            deadline = queue[0][0].enqueued + self.max_wait if queue else self._loop.time()
+            while len(queue) < self.max_batch_size:
+                remaining = deadline - self._loop.time()
+                if remaining <= 0:
+                    break
+                self._arrived.clear()
+                try:
+                    await asyncio.wait_for(self._arrived.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+
+            batch = []
+            while queue and len(batch) < self.max_batch_size:
+                entry = queue.popleft()
+                if entry[0].future.done():
+                    self._stats["dropped"] += 1
+                else:
+                    batch.append(entry)
+            if queue:
+                self._arrived.set()
+            else:
+                self._arrived.clear()
+
+            if batch:
+                self._stats["batches"] += 1
+                self._stats["batched_items"] += len(batch)
+                if len(batch) == self.max_batch_size:
+                    self._stats["full_batches"] += 1
+                # Keep a reference: the loop only holds weak ones to running tasks
+                task = self._loop.create_task(self._run_batch(batch))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+            else:
+                self._slots.release()
+
+    async def _run_batch(self, batch: List[Tuple[_Request, int, Any]]):
+        try:
+            items = [item for _, _, item in batch]
+            if self.executor is None:
+                results = self.batch_func(items)
+            else:
+                results = await self.executor.run(self.batch_func, items)
+        except Exception as e:
+            self._stats["failed_batches"] += 1
+            logger.warning(f"Batch of {len(batch)} items failed: {str(e)}")
+            for request, _, _ in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+
+        for (request, index, _), result in zip(batch, results):
+            request.results[index] = result
+            request.remaining -= 1
+            if request.remaining == 0 and not request.future.done():
+                request.future.set_result(request.results)
@@ -0,0 +1,174 @@
+# services/executor.py
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_KINDS = ("thread", "process", "inline")
+
+
+class ExecutorSaturatedError(Exception):
+    """Raised when a BoundedExecutor already has max_workers + max_queue jobs pending."""
+
+
+class BoundedExecutor:
+    """
+    Runs CPU-bound service calls off the event loop with a bounded backlog.
+
+    kind selects where jobs run:
+        "thread"  - a ThreadPoolExecutor (NumPy/pandas release the GIL for most kernels)
+        "process" - a ProcessPoolExecutor; func and its arguments must be picklable
+        "inline"  - directly on the event loop, i.e. the old blocking behaviour
+
+    At most max_workers jobs run at once and at most max_queue more wait for a
+    worker. Submitting beyond that raises ExecutorSaturatedError right away
+    so the caller can shed load (e.g. with a 503) instead of queueing forever.
+    """
+
+    def __init__(self, kind: str = "thread", max_workers: Optional[int] = None, max_queue: int = 32):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Unknown executor kind: {kind}")
+
+        self.kind = kind
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
+        self.max_queue = max_queue
+
+        self._pool: Optional[Executor] = None
+        if kind == "thread":
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ml-cpu")
+        elif kind == "process":
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0}
+        logger.info(f"BoundedExecutor initialized ({kind}, workers={self.max_workers}, queue={max_queue})")
+
+    @classmethod
+    def from_env(cls) -> "BoundedExecutor":
+        """Build an executor from ML_EXECUTOR, ML_EXECUTOR_WORKERS and ML_EXECUTOR_QUEUE."""
+        workers = os.environ.get("ML_EXECUTOR_WORKERS")
+        return cls(
+            kind=os.environ.get("ML_EXECUTOR", "thread"),
+            max_workers=int(workers) if workers else None,
+            max_queue=int(os.environ.get("ML_EXECUTOR_QUEUE", "32"))
+        )
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run func(*args, **kwargs) on the pool and await its result.
+
+        Raises:
+            ExecutorSaturatedError: If the backlog is already full
+        """
+        self._acquire()
+        try:
+            result = await self._call(self._pool, func, *args, **kwargs)
+        except Exception:
+            with self._lock:
+                self._stats["failed"] += 1
+            raise
+        finally:
+            self._release()
+
+        with self._lock:
+            self._stats["completed"] += 1
+        return result
+
+    def reserve(self) -> "ExecutorSlot":
+        """
+        Take one job slot for work that keeps running over time, e.g. a streamed response.
+
+        The slot counts toward the backlog like a submitted job until it is
+        released, so a long stream is refused up front when the executor is
+        saturated instead of running outside its bound.
+
+        Raises:
+            ExecutorSaturatedError: If the backlog is already full
+        """
+        self._acquire()
+        return ExecutorSlot(self)
+
+    async def _call(self, pool: Optional[Executor], func: Callable[..., Any], *args, **kwargs) -> Any:
+        if pool is None:
+            return func(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        call = functools.partial(func, *args, **kwargs)
+        if not isinstance(pool, ProcessPoolExecutor):
+            # Carry context variables (e.g. the request's metrics trace) into the worker
+            call = functools.partial(contextvars.copy_context().run, call)
+        return await loop.run_in_executor(pool, call)
+
+    def _acquire(self):
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self._stats["rejected"] += 1
+                raise ExecutorSaturatedError(
+                    f"{self._pending} jobs pending (limit {self.max_workers + self.max_queue})"
+                )
+            self._pending += 1
+            self._stats["submitted"] += 1
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return job counters and the current backlog."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = self._pending
+        stats.update({"kind": self.kind, "max_workers": self.max_workers, "max_queue": self.max_queue})
+        return stats
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class ExecutorSlot:
+    """
+    A job slot held on a BoundedExecutor (see BoundedExecutor.reserve).
+
+    Calls made through the slot run on the executor's pool without taking
+    another slot. With a process pool they run on the event loop's default
+    thread pool instead, since stateful callables (e.g. a generator's
+    __next__) cannot be sent to another process. The slot is given back by
+    release() or, failing that, when it is garbage collected.
+    """
+
+    def __init__(self, executor: BoundedExecutor):
+        self._executor = executor
+        self._released = False
+        self._failed = False
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run func(*args, **kwargs) under this slot and await its result."""
+        pool = self._executor._pool
+        try:
+            if isinstance(pool, ProcessPoolExecutor):
+                call = functools.partial(contextvars.copy_context().run, functools.partial(func, *args, **kwargs))
+                return await asyncio.get_running_loop().run_in_executor(None, call)
+            return await self._executor._call(pool, func, *args, **kwargs)
+        except Exception:
+            self._failed = True
+            raise
+
+    def release(self):
+        """Give the slot back; later calls do nothing."""
+        if self._released:
+            return
+        self._released = True
+        executor = self._executor
+        executor._release()
+        with executor._lock:
+            executor._stats["failed" if self._failed else "completed"] += 1
+
+    def __del__(self):
+        self.release()
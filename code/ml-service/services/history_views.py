@@ -0,0 +1,214 @@
+# services/history_views.py
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.lookback import DAILY_INTERVALS, Lookbacks
+from services.price_store import PriceStore
+
+logger = logging.getLogger(__name__)
+
+# Columns views carry: the ones scoring reads (each extra pandas column costs ~35us per symbol to extract)
+VIEW_FIELDS = ("date", "close")
+
+# How each field is aggregated when daily bars are downsampled
+_AGGREGATIONS = {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum", "date": "last"}
+
+
+class PriceView:
+    """
+    Read-only bars of one symbol at one interval, as a mapping of field to array.
+    HistoryViews builds them with the VIEW_FIELDS columns.
+
+    Like OHLCVStore windows, views can be passed straight to
+    RuleBasedRecommender (which only reads "close"). The close series is
+    fingerprinted once, so score-cache lookups do not rehash long windows.
+    """
+
+    __slots__ = ("interval", "columns", "_fingerprint")
+
+    def __init__(self, columns: Dict[str, np.ndarray], interval: str):
+        self.interval = interval
+        self.columns = columns
+        self._fingerprint: Optional[bytes] = None
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        return self.columns[field]
+
+    def __contains__(self, field: str) -> bool:
+        return field in self.columns
+
+    def __len__(self) -> int:
+        return len(self.columns["close"])
+
+    def fingerprint(self) -> bytes:
+        """Same digest series_fingerprint computes for a DataFrame with these closes."""
+        if self._fingerprint is None:
+            closes = np.ascontiguousarray(self.columns["close"], dtype=np.float64)
+            self._fingerprint = hashlib.blake2b(closes.tobytes(), digest_size=16).digest()
+        return self._fingerprint
+
+    def since(self, cutoff: np.datetime64) -> "PriceView":
+        """Zero-copy view of the bars dated at or after cutoff."""
+        first = int(np.searchsorted(self.columns["date"], cutoff, side="left"))
+        if first == 0:
+            return self
+        return PriceView({field: values[first:] for field, values in self.columns.items()}, self.interval)
+
+    def frame(self) -> pd.DataFrame:
+        """The bars as a DataFrame (copies)."""
+        return pd.DataFrame(self.columns)
+
+
+def downsample(view: PriceView, interval: str) -> PriceView:
+    """
+    Aggregate daily bars into calendar weeks (Monday to Sunday) or months.
+
+    Each bar is dated by the last daily bar it covers; open/high/low/close/
+    volume aggregate as first/max/min/last/sum.
+    """
+    dates = view["date"]
+    if interval == "1w":
+        # 1970-01-01 was a Thursday; shift so weeks start on Monday
+        groups = (dates.astype("datetime64[D]").astype(np.int64) + 3) // 7
+    elif interval == "1mo":
+        groups = dates.astype("datetime64[M]").astype(np.int64)
+    else:
+        raise ValueError(f"Cannot downsample daily bars to {interval}")
+
+    if len(dates) == 0:
+        return PriceView(dict(view.columns), interval)
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(groups)) + 1])
+    ends = np.concatenate([starts[1:], [len(dates)]]) - 1
+
+    columns = {}
+    for field, values in view.columns.items():
+        how = _AGGREGATIONS.get(field)
+        if how == "first":
+            columns[field] = values[starts]
+        elif how == "last":
+            columns[field] = values[ends]
+        elif how == "max":
+            columns[field] = np.maximum.reduceat(values, starts)
+        elif how == "min":
+            columns[field] = np.minimum.reduceat(values, starts)
+        elif how == "sum":
+            columns[field] = np.add.reduceat(values, starts)
+    return PriceView(columns, interval)
+
+
+class _Entry:
+    __slots__ = ("base", "series", "views")
+
+    def __init__(self, base: pd.DataFrame):
+        self.base = base
+        self.series: Dict[str, PriceView] = {}
+        self.views: Dict[Tuple[int, str], PriceView] = {}
+
+
+class HistoryViews:
+    """
+    Per-horizon price history for every symbol, built once per data version.
+
+    All daily, weekly and monthly horizons read one daily series per symbol
+    from the price store (Lookbacks.base_days long). Its weekly and monthly
+    downsamples are computed once and shared by every horizon at that
+    interval, and each horizon's window is a zero-copy slice of one of
+    them, so the per-request cost stays flat as lookbacks grow to years.
+    Intraday horizons read their own series from the store.
+
+    Views are rebuilt when the store returns a different frame for the
+    symbol, i.e. after its bars changed, so they never outlive the data
+    they were built from. Views are shared between requests and read-only.
+    """
+
+    def __init__(self, price_store: PriceStore, lookbacks: Lookbacks, max_entries: Optional[int] = None):
+        """
+        Args:
+            price_store: Where the underlying bars come from
+            lookbacks: Per-horizon lookback days and bar interval
+            max_entries: Most (symbol, series) entries kept (defaults to the store's max_entries)
+        """
+        self.price_store = price_store
+        self.lookbacks = lookbacks
+        self.max_entries = max_entries or price_store.max_entries
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "rebuilds": 0, "downsamples": 0, "evictions": 0}
+
+    def get(self, symbol: str, time_horizon: str) -> PriceView:
+        """
+        Get a symbol's bars over a horizon's lookback, at the horizon's interval.
+
+        Returns:
+            PriceView of the most recent bars (shared, read-only)
+        """
+        days, interval = self.lookbacks.get(time_horizon)
+        if interval in DAILY_INTERVALS:
+            base_days, base_interval = self.lookbacks.base_days, "1d"
+        else:
+            base_days, base_interval = days, interval
+        base = self.price_store.get(symbol, base_days, base_interval)
+        key = (symbol, base_interval)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.base is base:
+                view = entry.views.get((days, interval))
+                if view is not None:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return view
+            self._stats["misses"] += 1
+            if entry is None or entry.base is not base:
+                if entry is not None:
+                    self._stats["rebuilds"] += 1
+                entry = _Entry(base)
+                self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+        # Built outside the lock; concurrent builders of one view produce equal views
+        series = entry.series.get(interval)
+        if series is None:
+            series = entry.series.get(base_interval)
+            if series is None:
+                series = PriceView({field: base[field].to_numpy() for field in VIEW_FIELDS}, base_interval)
+                entry.series[base_interval] = series
+            if interval != base_interval:
+                series = downsample(series, interval)
+                entry.series[interval] = series
+                with self._lock:
+                    self._stats["downsamples"] += 1
+
+        view = series
+        if len(series):
+            view = series.since(series["date"][-1] - np.timedelta64(days, "D"))
+        entry.views[(days, interval)] = view
+        return view
+
+    def invalidate(self, symbol: Optional[str] = None):
+        """Drop the views of a symbol, or of every symbol if none is given."""
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == symbol]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/rebuild counters, the hit ratio and current size."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
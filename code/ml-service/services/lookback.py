@@ -0,0 +1,100 @@
+# services/lookback.py
+import logging
+import os
+import re
+from typing import Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bars resampled from the shared daily history
+DAILY_INTERVALS = ("1d", "1w", "1mo")
+# Bars fetched separately at their own interval (pandas frequency strings)
+INTRADAY_INTERVALS = ("5min", "15min", "30min", "60min")
+
+MAX_LOOKBACK_DAYS = 3653            # 10 years of daily (or coarser) bars
+MAX_INTRADAY_LOOKBACK_DAYS = 60     # what intraday providers typically keep
+
+# How much history each time horizon scores over, and at which interval, unless
+# configured: the 30 days of daily bars every horizon has always been scored on.
+# Longer windows (e.g. "3y" or "10y:1w") multiply upstream fetches and memory per symbol.
+DEFAULT_LOOKBACKS = {"short": "30d", "medium": "30d", "long": "30d"}
+
+_SPEC = re.compile(r"^\s*(\d+)\s*([dwy])\s*(?::\s*(\w+))?\s*$")
+_DAYS_PER_UNIT = {"d": 1, "w": 7, "y": 365.25}
+
+
+def parse_lookback(spec: str) -> Tuple[int, str]:
+    """
+    Parse a lookback spec such as "90d", "3y", "10y:1w" or "30d:15min".
+
+    Returns:
+        Tuple of (calendar days, bar interval); the interval defaults to "1d"
+
+    Raises:
+        ValueError: If the spec is malformed, the interval unknown or the lookback out of range
+    """
+    match = _SPEC.match(spec)
+    if match is None:
+        raise ValueError(f"Invalid lookback {spec!r}; expected e.g. '90d', '3y' or '10y:1w'")
+    count, unit, interval = match.groups()
+    days = round(int(count) * _DAYS_PER_UNIT[unit])
+    interval = interval or "1d"
+
+    if interval in DAILY_INTERVALS:
+        limit = MAX_LOOKBACK_DAYS
+    elif interval in INTRADAY_INTERVALS:
+        limit = MAX_INTRADAY_LOOKBACK_DAYS
+    else:
+        raise ValueError(f"Unknown bar interval {interval!r} in lookback {spec!r}")
+    if not 1 <= days <= limit:
+        raise ValueError(f"Lookback {spec!r} must be between 1 and {limit} days for {interval} bars")
+    return days, interval
+
+
+class Lookbacks:
+    """
+    Per-horizon history windows: calendar days of bars and the bar interval.
+
+    Daily, weekly and monthly horizons are all served from one daily series
+    per symbol, long enough for the longest of them (base_days), so the
+    price store fetches and refreshes each symbol's history once. Intraday
+    horizons get a series of their own.
+    """
+
+    def __init__(self, specs: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            specs: Mapping of time horizon to lookback spec (see parse_lookback);
+                horizons left out keep their DEFAULT_LOOKBACKS value
+        """
+        merged = dict(DEFAULT_LOOKBACKS)
+        merged.update(specs or {})
+        self.specs = merged
+        self.horizons = {horizon: parse_lookback(spec) for horizon, spec in merged.items()}
+        daily_days = [days for days, interval in self.horizons.values() if interval in DAILY_INTERVALS]
+        self.base_days = max(daily_days) if daily_days else 0
+        logger.info(f"Lookbacks: {', '.join(f'{h}={s}' for h, s in merged.items())}")
+
+    @classmethod
+    def from_env(cls) -> "Lookbacks":
+        """Read ML_LOOKBACK_SHORT / ML_LOOKBACK_MEDIUM / ML_LOOKBACK_LONG (e.g. "2y", "10y:1w", "30d:15min")."""
+        specs = {}
+        for horizon in DEFAULT_LOOKBACKS:
+            spec = os.environ.get(f"ML_LOOKBACK_{horizon.upper()}")
+            if spec:
+                specs[horizon] = spec
+        return cls(specs)
+
+    def get(self, time_horizon: str) -> Tuple[int, str]:
+        """(days, interval) for a horizon; unknown horizons use the medium window."""
+        return self.horizons.get(time_horizon, self.horizons["medium"])
+
+    def interval(self, time_horizon: str) -> str:
+        return self.get(time_horizon)[1]
+
+    def base_series(self) -> Set[Tuple[int, str]]:
+        """(days, interval) of the series read from the price store per symbol: the daily base and each intraday lookback."""
+        return {
+            (days, interval) if interval not in DAILY_INTERVALS else (self.base_days, "1d")
+            for days, interval in self.horizons.values()
+        }
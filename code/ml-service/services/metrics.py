@@ -0,0 +1,338 @@
+# services/metrics.py
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds; the last, implicit bucket is +Inf
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+STAGE_METRIC = "ml_stage_duration_seconds"
+REQUEST_METRIC = "ml_request_duration_seconds"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# (pipeline.stage, seconds) entries for the current request, when tracing was asked for
+_trace: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("ml_trace", default=None)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (per-bucket counts, cumulated when rendered)."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _StageTimer:
+    """Context manager returned by MetricsRegistry.stage."""
+
+    __slots__ = ("registry", "histogram", "name", "start")
+
+    def __init__(self, registry: "MetricsRegistry", histogram: Histogram, name: str):
+        self.registry = registry
+        self.histogram = histogram
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        registry = self.registry
+        if registry.enabled:
+            histogram = self.histogram
+            lock = registry._lock
+            lock.acquire()
+            histogram.counts[bisect_left(histogram.buckets, elapsed)] += 1
+            histogram.sum += elapsed
+            histogram.count += 1
+            lock.release()
+        trace = _trace.get()
+        if trace is not None:
+            trace.append((self.name, elapsed))
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry:
+    """
+    In-process counters and latency histograms rendered in the Prometheus text format.
+
+    Pipelines wrap each stage in `with METRICS.stage("recommend", "indicators"):`.
+    A stage costs two perf_counter calls and one locked histogram update, and
+    nothing at all when metrics are disabled and the request is not traced.
+
+    Per-request traces are opt-in: start_trace() makes every stage timed in
+    the current context (including executor threads the work is handed to)
+    append its duration to a list that can be returned in a response header.
+
+    Values are per process. Stages timed inside a process-pool worker are
+    recorded in that worker, not in the serving process.
+
+    Collectors registered with add_collector are called on render and their
+    numeric stats are exported as gauges, so existing stats() dicts (price
+    store, score cache, executor) show up on /metrics without extra work on
+    the hot path.
+    """
+
+    def __init__(self, enabled: bool = True, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._help: Dict[str, str] = {
+            STAGE_METRIC: "Time spent in each pipeline stage",
+            REQUEST_METRIC: "HTTP request latency by route and status",
+            "ml_symbols_scored_total": "Symbols scored by the recommender (score cache misses)",
+            "ml_documents_analyzed_total": "Texts run through the sentiment analyzer",
+            "ml_symbol_errors_total": "Symbols whose news could not be fetched",
+        }
+        self._collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        # (pipeline, stage) -> (histogram, trace name), so timing a stage allocates nothing else
+        self._stages: Dict[Tuple[str, str], Tuple[Histogram, str]] = {}
+
+    @classmethod
+    def from_env(cls) -> "MetricsRegistry":
+        """Build a registry, disabled if ML_METRICS is "0"."""
+        return cls(enabled=os.environ.get("ML_METRICS", "1") != "0")
+
+    def stage(self, pipeline: str, stage: str):
+        """Time a pipeline stage: `with METRICS.stage("sentiment", "fetch_news"): ...`"""
+        entry = self._stages.get((pipeline, stage)) or self._stage(pipeline, stage)
+        if not self.enabled and _trace.get() is None:
+            return _NULL_TIMER
+        return _StageTimer(self, entry[0], entry[1])
+
+    def record_stage(self, pipeline: str, stage: str, seconds: float):
+        """Record a stage duration measured by the caller (e.g. summed over a loop)."""
+        if not self.enabled and _trace.get() is None:
+            return
+        histogram, name = self._stage(pipeline, stage)
+        self._record(histogram, name, seconds)
+
+    def _stage(self, pipeline: str, stage: str) -> Tuple[Histogram, str]:
+        entry = self._stages.get((pipeline, stage))
+        if entry is None:
+            with self._lock:
+                key = (STAGE_METRIC, (("pipeline", pipeline), ("stage", stage)))
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = Histogram(self.buckets)
+                entry = self._stages[(pipeline, stage)] = (histogram, f"{pipeline}.{stage}")
+        return entry
+
+    def _record(self, histogram: Histogram, name: str, seconds: float):
+        if self.enabled:
+            with self._lock:
+                histogram.observe(seconds)
+        trace = _trace.get()
+        if trace is not None:
+            trace.append((name, seconds))
+
+    def observe(self, name: str, labels: Labels, value: float):
+        """Record one observation in the histogram `name` with the given labels."""
+        key = (name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def inc(self, name: str, value: float = 1, **labels: str):
+        """Increase the counter `name` (e.g. symbols analyzed) by `value`."""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def describe(self, name: str, help_text: str):
+        """Set the HELP line for a metric."""
+        self._help[name] = help_text
+
+    def add_collector(self, prefix: str, collector: Callable[[], Dict[str, Any]]):
+        """Export collector()'s numeric values as gauges named ml_<prefix>_<key>."""
+        self._collectors[prefix] = collector
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._stages.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return counters and per-stage count/sum, e.g. for /health or benchmarks."""
+        with self._lock:
+            counters = {_series(name, labels): value for (name, labels), value in self._counters.items()}
+            stages = {
+                _series(name, labels): {"count": histogram.count, "sum": histogram.sum}
+                for (name, labels), histogram in self._histograms.items()
+            }
+        return {"counters": counters, "histograms": stages}
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                (key, list(histogram.counts), histogram.sum, histogram.count)
+                for key, histogram in self._histograms.items()
+            )
+
+        seen = set()
+        for (name, labels), value in counters:
+            if name not in seen:
+                seen.add(name)
+                lines.extend(self._header(name, "counter"))
+            lines.append(f"{_series(name, labels)} {_number(value)}")
+
+        for (name, labels), counts, total, count in histograms:
+            if name not in seen:
+                seen.add(name)
+                lines.extend(self._header(name, "histogram"))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{_series(name + '_bucket', labels + (('le', le),))} {cumulative}")
+            lines.append(f"{_series(name + '_sum', labels)} {_number(total)}")
+            lines.append(f"{_series(name + '_count', labels)} {count}")
+
+        for prefix, collector in self._collectors.items():
+            try:
+                stats = collector()
+            except Exception as e:
+                logger.warning(f"Metrics collector {prefix} failed: {str(e)}")
+                continue
+            for key, value in stats.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f"ml_{prefix}_{key}"
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {_number(value)}")
+
+        return "\n".join(lines) + "\n"
+
+    def _header(self, name: str, kind: str) -> List[str]:
+        header = []
+        if name in self._help:
+            header.append(f"# HELP {name} {self._help[name]}")
+        header.append(f"# TYPE {name} {kind}")
+        return header
+
+
+def start_trace():
+    """Start collecting stage timings for the current context; returns a token for end_trace."""
+    return _trace.set([])
+
+
+def end_trace(token) -> List[Tuple[str, float]]:
+    """Stop collecting and return the (stage, seconds) entries recorded since start_trace."""
+    entries = _trace.get() or []
+    _trace.reset(token)
+    return entries
+
+
+def format_server_timing(entries: List[Tuple[str, float]]) -> str:
+    """Format trace entries as a Server-Timing header value (durations in ms, repeated stages summed)."""
+    totals: Dict[str, float] = {}
+    for name, seconds in entries:
+        totals[name] = totals.get(name, 0.0) + seconds
+    return ", ".join(f"{name};dur={seconds * 1000:.3f}" for name, seconds in totals.items())
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing every HTTP request and returning opt-in stage traces.
+
+    Requests are recorded in ml_request_duration_seconds labelled with the
+    matched route template (never the raw path, to keep label cardinality
+    bounded) and status code. A request carrying `trace_header` with a
+    non-empty value gets a Server-Timing response header with its per-stage
+    breakdown. Plain ASGI rather than BaseHTTPMiddleware to keep per-request
+    overhead to a few microseconds.
+    """
+
+    def __init__(self, app, registry: Optional[MetricsRegistry] = None, trace_header: str = "x-trace-stages"):
+        self.app = app
+        self.registry = registry or METRICS
+        self.trace_header = trace_header.lower().encode("latin-1")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        traced = any(key == self.trace_header and value for key, value in scope["headers"])
+        token = start_trace() if traced else None
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                if traced:
+                    timing = format_server_timing(_trace.get() or [])
+                    message = dict(message)
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"server-timing", timing.encode("latin-1"))
+                    ]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if self.registry.enabled:
+                route = scope.get("route")
+                labels = (
+                    ("route", getattr(route, "path", "unmatched")),
+                    ("status", str(status[0])),
+                )
+                self.registry.observe(REQUEST_METRIC, labels, time.perf_counter() - start)
+            if token is not None:
+                end_trace(token)
+
+
+def _series(name: str, labels: Labels) -> str:
+    if not labels:
+        return name
+    rendered = ",".join(f'{key}="{value}"' for key, value in labels)
+    return f"{name}{{{rendered}}}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# Process-wide registry used by the services and exposed on /metrics
+METRICS = MetricsRegistry.from_env()
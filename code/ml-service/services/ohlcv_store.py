@@ -0,0 +1,168 @@
+# services/ohlcv_store.py
+import json
+import logging
+import os
+import shutil
+import tempfile
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.json"
+DATA_DIR_PREFIX = "data-"
+PRICE_FIELDS = ["open", "high", "low", "close"]
+FIELDS = ["date"] + PRICE_FIELDS + ["volume"]
+
+PRICE_DTYPES = {"float32": np.float32, "float64": np.float64}
+VOLUME_DTYPES = {"int32": np.int32, "int64": np.int64}
+
+
+def write_ohlcv_store(
+    path: str,
+    historical_data: Dict[str, pd.DataFrame],
+    price_dtype: str = "float64",
+    volume_dtype: str = "int64"
+) -> None:
+    """
+    Write per-symbol OHLCV DataFrames into a columnar on-disk store.
+
+    Each field is stored as one contiguous .npy array holding every symbol's
+    bars back to back, and index.json maps each symbol to its (offset, length)
+    slice of those arrays.
+
+    Rewriting a store never touches the arrays it already holds: the new
+    arrays go into a fresh data directory, and index.json, which names that
+    directory, is swapped in last with os.replace. Readers that opened the
+    previous version keep their mappings of its files; the version before
+    that is deleted.
+
+    Args:
+        path: Directory to write the store into (created if missing)
+        historical_data: Dictionary mapping symbols to DataFrames of historical data
+        price_dtype: "float32" or "float64" for open/high/low/close
+        volume_dtype: "int32" or "int64" for volume
+    """
+    if price_dtype not in PRICE_DTYPES:
+        raise ValueError(f"Unsupported price dtype: {price_dtype}")
+    if volume_dtype not in VOLUME_DTYPES:
+        raise ValueError(f"Unsupported volume dtype: {volume_dtype}")
+
+    os.makedirs(path, exist_ok=True)
+    previous = _read_index(path).get("data_dir") if os.path.exists(os.path.join(path, INDEX_FILE)) else None
+    data_dir = tempfile.mkdtemp(prefix=DATA_DIR_PREFIX, dir=path)
+
+    dtypes = {"date": np.dtype("datetime64[ns]"), "volume": np.dtype(VOLUME_DTYPES[volume_dtype])}
+    dtypes.update({field: np.dtype(PRICE_DTYPES[price_dtype]) for field in PRICE_FIELDS})
+
+    symbols = {}
+    offset = 0
+    for symbol, data in historical_data.items():
+        symbols[symbol] = [offset, len(data)]
+        offset += len(data)
+
+    for field in FIELDS:
+        column = np.empty(offset, dtype=dtypes[field])
+        for symbol, data in historical_data.items():
+            start, length = symbols[symbol]
+            column[start:start + length] = data[field].to_numpy(dtype=dtypes[field])
+        np.save(os.path.join(data_dir, f"{field}.npy"), column)
+
+    index = {
+        "price_dtype": price_dtype,
+        "volume_dtype": volume_dtype,
+        "data_dir": os.path.basename(data_dir),
+        "symbols": symbols
+    }
+    tmp_path = os.path.join(path, INDEX_FILE + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp_path, os.path.join(path, INDEX_FILE))
+
+    # Keep the version just replaced for readers that loaded its index but have not opened its arrays yet
+    for name in os.listdir(path):
+        if name.startswith(DATA_DIR_PREFIX) and name not in (index["data_dir"], previous):
+            shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+
+    logger.info(f"Wrote OHLCV store with {len(symbols)} symbols and {offset} bars to {path}")
+
+
+def _read_index(path: str) -> Dict:
+    with open(os.path.join(path, INDEX_FILE)) as f:
+        return json.load(f)
+
+
+class OHLCVStore:
+    """
+    Read-only, memory-mapped view over a store written by write_ohlcv_store.
+
+    Field arrays are opened with mmap_mode="r", so every uvicorn worker that
+    opens the same store shares the OS page cache instead of holding its own
+    copy. Symbol windows are slices of those arrays and are never copied.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+        index = _read_index(path)
+        data_dir = os.path.join(path, index.get("data_dir", ""))
+
+        self.price_dtype = index["price_dtype"]
+        self.volume_dtype = index["volume_dtype"]
+        self._offsets = {symbol: (start, length) for symbol, (start, length) in index["symbols"].items()}
+        self._columns = {
+            field: np.load(os.path.join(data_dir, f"{field}.npy"), mmap_mode="r")
+            for field in FIELDS
+        }
+        logger.info(f"Opened OHLCV store at {path} with {len(self._offsets)} symbols")
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self._offsets)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def window(self, symbol: str, bars: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Get a zero-copy view of a symbol's most recent bars.
+
+        Args:
+            symbol: Stock symbol
+            bars: Number of most recent bars to return (all bars if None)
+
+        Returns:
+            Dictionary mapping field names to read-only array views
+        """
+        start, length = self._offsets[symbol]
+        end = start + length
+        if bars is not None:
+            start = max(start, end - bars)
+
+        return {field: column[start:end] for field, column in self._columns.items()}
+
+    def load_historical_data(
+        self,
+        symbols: Optional[List[str]] = None,
+        bars: Optional[int] = None
+    ) -> Dict[str, Dict[str, np.ndarray]]:
+        """
+        Load windows in the shape RuleBasedRecommender.generate_recommendations expects.
+
+        The vectorized recommender only reads each symbol's `close` column, so
+        the array views can be passed in directly. Symbols missing from the
+        store are skipped.
+        """
+        if symbols is None:
+            symbols = self.symbols
+
+        return {symbol: self.window(symbol, bars) for symbol in symbols if symbol in self._offsets}
+
+    def frame(self, symbol: str, bars: Optional[int] = None) -> pd.DataFrame:
+        """Get a symbol's window as a DataFrame (copies; for the per-symbol pandas path)."""
+        return pd.DataFrame(self.window(symbol, bars))
@@ -0,0 +1,181 @@
+# services/price_store.py
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# fetcher(symbol, start_date, end_date) -> DataFrame of daily bars with a `date` column;
+# intraday windows call fetcher(symbol, start_date, end_date, interval) instead
+BarFetcher = Callable[..., pd.DataFrame]
+
+DEFAULT_MAX_ENTRIES = 2048
+
+
+class _CacheEntry:
+    __slots__ = ("data", "fetched_at")
+
+    def __init__(self, data: pd.DataFrame, fetched_at: float):
+        self.data = data
+        self.fetched_at = fetched_at
+
+
+class PriceStore:
+    """
+    Process-wide cache of historical bars keyed by (symbol, window_days, interval).
+
+    Entries expire after `ttl_seconds` and the least recently used entry is
+    evicted once `max_entries` is reached. Concurrent requests for the same
+    key share a single fetch, and expired entries are refreshed by appending
+    only the bars newer than the last cached date.
+
+    Returned DataFrames are shared between callers and must be treated as
+    read-only. Callbacks registered with add_listener are called with the
+    symbol whenever a symbol's cached bars change or are invalidated.
+    """
+
+    def __init__(
+        self,
+        fetcher: BarFetcher,
+        ttl_seconds: float = 60.0,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.fetcher = fetcher
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, int, str], _CacheEntry]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, int, str], Future] = {}
+        self._listeners: List[Callable[[str], None]] = []
+
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "full_fetches": 0,
+            "incremental_refreshes": 0,
+        }
+        logger.info(f"PriceStore initialized (ttl={ttl_seconds}s, max_entries={max_entries})")
+
+    def get(self, symbol: str, window_days: int = 30, interval: str = "1d") -> pd.DataFrame:
+        """
+        Get the most recent `window_days` of bars for a symbol.
+
+        Args:
+            symbol: Stock symbol
+            window_days: Lookback window in calendar days
+            interval: "1d" for daily bars, or an intraday pandas frequency such as "15min"
+
+        Returns:
+            DataFrame of historical bars (shared, read-only)
+        """
+        key = (symbol, window_days, interval)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._clock() - entry.fetched_at < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry.data
+
+            flight = self._inflight.get(key)
+            if flight is not None:
+                self._stats["coalesced"] += 1
+                leader = False
+            else:
+                flight = Future()
+                self._inflight[key] = flight
+                self._stats["misses"] += 1
+                leader = True
+
+        if not leader:
+            return flight.result()
+
+        try:
+            data = self._load(symbol, window_days, interval, entry.data if entry is not None else None)
+        except Exception as e:
+            with self._lock:
+                del self._inflight[key]
+            flight.set_exception(e)
+            raise
+
+        with self._lock:
+            self._entries[key] = _CacheEntry(data, self._clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+            del self._inflight[key]
+        flight.set_result(data)
+
+        if entry is None or data is not entry.data:
+            for listener in self._listeners:
+                listener(symbol)
+
+        return data
+
+    def add_listener(self, listener: Callable[[str], None]):
+        """Register a callback invoked with the symbol whenever its cached bars change or are invalidated."""
+        self._listeners.append(listener)
+
+    def invalidate(self, symbol: Optional[str] = None):
+        """
+        Drop cached entries for a symbol, or every entry if no symbol is given.
+
+        Listeners are called with each symbol that had entries, so caches
+        derived from its bars are dropped along with them.
+        """
+        with self._lock:
+            stale = [key for key in self._entries if symbol is None or key[0] == symbol]
+            for key in stale:
+                del self._entries[key]
+
+        for dropped in dict.fromkeys(key[0] for key in stale):
+            for listener in self._listeners:
+                listener(dropped)
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss/eviction counters and current size."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        return stats
+
+    def _load(self, symbol: str, window_days: int, interval: str, cached: Optional[pd.DataFrame]) -> pd.DataFrame:
+        """Fetch a full window, or append the bars missing from a stale cached window."""
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=window_days)
+        extra = () if interval == "1d" else (interval,)
+
+        if cached is None or cached.empty:
+            with self._lock:
+                self._stats["full_fetches"] += 1
+            return self.fetcher(symbol, start_date, end_date, *extra).reset_index(drop=True)
+
+        last_date = cached["date"].iloc[-1]
+        next_date = last_date + (timedelta(days=1) if interval == "1d" else pd.Timedelta(interval))
+        with self._lock:
+            self._stats["incremental_refreshes"] += 1
+
+        data = cached
+        if next_date <= end_date:
+            new_bars = self.fetcher(symbol, next_date, end_date, *extra)
+            if not new_bars.empty:
+                data = pd.concat([cached, new_bars], ignore_index=True)
+
+        # Roll the window forward by whole days without touching the shared cached frame
+        first_day = pd.Timestamp(start_date).normalize()
+        if data["date"].iloc[0] < first_day:
+            data = data[data["date"] >= first_day].reset_index(drop=True)
+
+        return data
@@ -0,0 +1,205 @@
+# services/sentiment_cache.py
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# SQLite caps the number of bound parameters per statement
+_SQL_CHUNK = 500
+
+
+class SentimentLookup:
+    """Result of SentimentCache.lookup: what was found and which unique texts still need analyzing."""
+
+    __slots__ = ("keys", "found", "missing_keys", "missing_texts")
+
+    def __init__(self, keys: List[str], found: Dict[str, Dict[str, Any]], missing: Dict[str, str]):
+        self.keys = keys
+        self.found = found
+        self.missing_keys = list(missing)
+        self.missing_texts = list(missing.values())
+
+
+class SentimentCache:
+    """
+    Analyzer results keyed by a hash of the analyzed text.
+
+    Entries live in an in-memory LRU of at most max_entries and expire
+    ttl_seconds after they were analyzed. With `path`, results are also
+    written through to a local SQLite file and read back on memory misses,
+    so a restarted process starts warm. Expiry uses wall-clock time for the
+    same reason.
+
+    Use it in two steps so the analysis itself can run anywhere (inline, or
+    on an executor):
+
+        lookup = cache.lookup(texts)        # dedupes texts, serves hits
+        analyzed = analyze_batch(lookup.missing_texts)
+        results = cache.fill(lookup, analyzed)  # stores misses, returns per-text results
+
+    `namespace` is mixed into every key (e.g. analyzer class and model path)
+    so results from different models never mix in a shared store.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 50000,
+        ttl_seconds: float = 24 * 3600,
+        path: Optional[str] = None,
+        namespace: str = "",
+        clock: Callable[[], float] = time.time
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self.namespace = namespace
+        self._key_prefix = namespace.encode("utf-8") + b"\0"
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "duplicates": 0, "evictions": 0, "expired": 0}
+
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, result TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM results WHERE created < ?", (self._clock() - ttl_seconds,))
+            self._db.commit()
+        logger.info(f"SentimentCache initialized (max_entries={max_entries}, ttl={ttl_seconds}s, path={path})")
+
+    @classmethod
+    def from_env(cls, namespace: str = "") -> "SentimentCache":
+        """Build a cache from ML_SENTIMENT_CACHE_SIZE, ML_SENTIMENT_CACHE_TTL and ML_SENTIMENT_CACHE_PATH."""
+        return cls(
+            max_entries=int(os.environ.get("ML_SENTIMENT_CACHE_SIZE", "50000")),
+            ttl_seconds=float(os.environ.get("ML_SENTIMENT_CACHE_TTL", str(24 * 3600))),
+            path=os.environ.get("ML_SENTIMENT_CACHE_PATH") or None,
+            namespace=namespace
+        )
+
+    def key(self, text: str) -> str:
+        return hashlib.blake2b(self._key_prefix + text.encode("utf-8"), digest_size=16).hexdigest()
+
+    def lookup(self, texts: List[str]) -> SentimentLookup:
+        """Hash and dedupe texts, and return the cached results plus the unique texts still to analyze."""
+        keys = [self.key(text) for text in texts]
+        unique = dict(zip(keys, texts))
+        now = self._clock()
+
+        found = {}
+        with self._lock:
+            for key in unique:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                if now - entry[0] >= self.ttl_seconds:
+                    del self._entries[key]
+                    self._stats["expired"] += 1
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = entry[1]
+            self._stats["hits"] += len(found)
+            self._stats["duplicates"] += len(texts) - len(unique)
+
+        if self._db is not None and len(found) < len(unique):
+            from_disk = self._load([key for key in unique if key not in found], now)
+            if from_disk:
+                found.update({key: result for key, (_, result) in from_disk.items()})
+                self._remember(from_disk)
+                with self._lock:
+                    self._stats["disk_hits"] += len(from_disk)
+
+        missing = {key: text for key, text in unique.items() if key not in found}
+        with self._lock:
+            self._stats["misses"] += len(missing)
+        return SentimentLookup(keys, found, missing)
+
+    def fill(self, lookup: SentimentLookup, analyzed: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Store the results for lookup.missing_texts and return one result per original text.
+
+        Each returned result is a fresh copy, so callers may modify them.
+        """
+        if len(analyzed) != len(lookup.missing_keys):
+            raise ValueError(f"Expected {len(lookup.missing_keys)} results, got {len(analyzed)}")
+
+        now = self._clock()
+        fresh = {key: (now, result) for key, result in zip(lookup.missing_keys, analyzed)}
+        if fresh:
+            self._remember(fresh)
+            if self._db is not None:
+                self._store(fresh)
+
+        results = dict(lookup.found)
+        results.update(zip(lookup.missing_keys, analyzed))
+        return [_copy_result(results[key]) for key in lookup.keys]
+
+    def invalidate(self):
+        """Drop every cached result, in memory and on disk."""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters (memory and disk), hit ratio, duplicates removed and current size."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_ratio"] = round((stats["hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+    def close(self):
+        if self._db is not None:
+            with self._lock:
+                self._db.close()
+                self._db = None
+
+    def _remember(self, entries: Dict[str, tuple]):
+        with self._lock:
+            for key, entry in entries.items():
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def _load(self, keys: List[str], now: float) -> Dict[str, tuple]:
+        loaded = {}
+        with self._lock:
+            for start in range(0, len(keys), _SQL_CHUNK):
+                chunk = keys[start:start + _SQL_CHUNK]
+                rows = self._db.execute(
+                    f"SELECT key, result, created FROM results WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                for key, result, created in rows:
+                    if now - created < self.ttl_seconds:
+                        loaded[key] = (created, json.loads(result))
+        return loaded
+
+    def _store(self, entries: Dict[str, tuple]):
+        rows = [(key, json.dumps(result), created) for key, (created, result) in entries.items()]
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO results (key, result, created) VALUES (?, ?, ?)", rows)
+            self._db.commit()
+
+
+def _copy_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    copied = dict(result)
+    if "key_terms" in copied:
+        copied["key_terms"] = list(copied["key_terms"])
+    return copied
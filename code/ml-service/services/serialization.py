@@ -0,0 +1,175 @@
+# services/serialization.py
+import importlib.util
+import io
+import json
+import logging
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # optional: the standard library encoder is used without it
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional: MessagePack is not offered without it
+    msgpack = None
+
+# Optional: Arrow IPC is only offered when pyarrow is installed, and imported on first use (it is slow to import)
+ARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+logger = logging.getLogger(__name__)
+
+JSON = "application/json"
+NDJSON = "application/x-ndjson"
+MSGPACK = "application/msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+
+# Other names clients send for the same formats
+_ALIASES = {"application/x-msgpack": MSGPACK, "application/vnd.msgpack": MSGPACK}
+
+_ORJSON_OPTIONS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson is not None else 0
+
+
+class NotAcceptableError(Exception):
+    """The Accept header allows none of the formats this server can produce."""
+
+    def __init__(self, offered: List[str]):
+        super().__init__(f"Acceptable formats: {', '.join(offered)}")
+        self.offered = offered
+
+
+def json_default(value: Any) -> Any:
+    """Serialize the NumPy scalars and datetimes that service results may contain."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps_json(payload: Any) -> bytes:
+    """
+    Encode a payload as compact JSON bytes.
+
+    Uses orjson when installed (datetimes as ISO 8601, NumPy arrays and
+    scalars natively), the standard library otherwise.
+    """
+    if orjson is not None:
+        return orjson.dumps(payload, default=json_default, option=_ORJSON_OPTIONS)
+    return json.dumps(payload, default=json_default, separators=(",", ":")).encode()
+
+
+def dumps_msgpack(payload: Any) -> bytes:
+    """Encode a payload as MessagePack (datetimes as ISO 8601 strings, like JSON)."""
+    if msgpack is None:
+        raise ImportError("msgpack is required for MessagePack responses")
+    return msgpack.packb(payload, default=json_default, use_bin_type=True)
+
+
+def dumps_arrow(payload: Dict[str, Any], table: str) -> bytes:
+    """
+    Encode payload[table] (a list of flat row dicts) as one Arrow IPC stream.
+
+    The other top-level fields are stored as JSON in the schema metadata
+    under "payload", so no part of the response is lost.
+    """
+    if not ARROW_AVAILABLE:
+        raise ImportError("pyarrow is required for Arrow responses")
+    import pyarrow as pa
+    import pyarrow.ipc
+
+    rows = payload[table]
+    metadata = {key: value for key, value in payload.items() if key != table}
+    batch = pa.Table.from_pylist(rows) if rows else pa.table({})
+    batch = batch.replace_schema_metadata({"payload": dumps_json(metadata), "table": table})
+
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_table(batch)
+    return sink.getvalue()
+
+
+def offered(table: Optional[str] = None) -> List[str]:
+    """Media types a response can be sent as (Arrow only for tabular responses), preferred first."""
+    types = [JSON]
+    if msgpack is not None:
+        types.append(MSGPACK)
+    if ARROW_AVAILABLE and table is not None:
+        types.append(ARROW)
+    return types
+
+
+def negotiate(accept: Optional[str], table: Optional[str] = None) -> str:
+    """
+    Pick the response media type from an Accept header.
+
+    Each offered type takes the q of the most specific range that matches
+    it. The highest-q type wins; on equal q, a type named outright beats
+    one matched by a wildcard, then JSON is preferred. Anything else (no
+    header, or only types this server cannot produce, e.g. a browser's
+    text/html) gets JSON, unless the header explicitly excludes JSON.
+
+    Raises:
+        NotAcceptableError: If the header excludes JSON (q=0) and accepts no other offered type
+    """
+    available = offered(table)
+    if not accept or not accept.strip():
+        return JSON
+
+    ranges = []
+    for item in accept.split(","):
+        media_type, _, params = item.strip().partition(";")
+        media_type = media_type.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        ranges.append((_ALIASES.get(media_type, media_type), q))
+
+    best, choice = None, None
+    for position, media_type in enumerate(available):
+        match = _match(ranges, media_type)
+        if match is None or match[1] <= 0:
+            continue
+        rank = (match[1], match[0] == 2, -position)
+        if best is None or rank > best:
+            best, choice = rank, media_type
+
+    if choice is not None:
+        return choice
+    if _match(ranges, JSON) is not None:
+        raise NotAcceptableError(available)
+    return JSON
+
+
+def _match(ranges: List[Tuple[str, float]], media_type: str) -> Optional[Tuple[int, float]]:
+    """(specificity, q) of the most specific Accept range matching media_type: 2 exact, 1 type/*, 0 */*."""
+    wildcard = media_type.split("/")[0] + "/*"
+    match = None
+    for media_range, q in ranges:
+        if media_range == media_type:
+            specificity = 2
+        elif media_range == wildcard:
+            specificity = 1
+        elif media_range == "*/*":
+            specificity = 0
+        else:
+            continue
+        if match is None or specificity > match[0]:
+            match = (specificity, q)
+    return match
+
+
+def encode(payload: Dict[str, Any], media_type: str, table: Optional[str] = None) -> bytes:
+    """Encode a response payload in a media type returned by negotiate."""
+    if media_type == MSGPACK:
+        return dumps_msgpack(payload)
+    if media_type == ARROW:
+        return dumps_arrow(payload, table)
+    return dumps_json(payload)
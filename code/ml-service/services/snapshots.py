@@ -0,0 +1,178 @@
+# services/snapshots.py
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from services.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+
+class Snapshot:
+    """One immutable build: precomputed entries by key, plus when it was built and from which data."""
+
+    __slots__ = ("entries", "version", "built_at", "build_seconds")
+
+    def __init__(self, entries: Dict[Hashable, Any], version: int, built_at: float, build_seconds: float):
+        self.entries = entries
+        self.version = version
+        self.built_at = built_at
+        self.build_seconds = build_seconds
+
+    def get(self, key: Hashable) -> Any:
+        return self.entries.get(key)
+
+
+class SnapshotRefresher:
+    """
+    Rebuilds a Snapshot in a background thread and publishes it with an atomic swap.
+
+    `current` is a plain attribute holding the latest Snapshot. Readers take
+    one reference to it and use it without locking; a refresh builds a whole
+    new Snapshot and only then replaces the reference, so a reader never
+    sees a half-built one and old snapshots stay valid while in use.
+
+    A rebuild starts after notify() (register it as a PriceStore listener:
+    market data changed), at most once per min_interval_seconds, and at
+    least every interval_seconds so bars that the store only reloads on
+    access are picked up. Notifications raised on the refresher's own thread
+    (its fetches reloading expired bars) are ignored, since the build in
+    progress already sees that data.
+    """
+
+    def __init__(
+        self,
+        build: Callable[[], Dict[Hashable, Any]],
+        interval_seconds: float = 60.0,
+        min_interval_seconds: float = 5.0,
+        max_age_seconds: float = 300.0,
+        name: str = "snapshot",
+        clock: Callable[[], float] = time.time
+    ):
+        """
+        Args:
+            build: Returns the entries of a new snapshot
+            interval_seconds: Longest time between rebuilds
+            min_interval_seconds: Shortest time between rebuild starts (debounces bursts of updates)
+            max_age_seconds: Age after which fresh() stops returning a snapshot
+            name: Stage name of the rebuild duration metric, and thread name
+            clock: Wall-clock time source
+        """
+        self.build = build
+        self.interval_seconds = interval_seconds
+        self.min_interval_seconds = min_interval_seconds
+        self.max_age_seconds = max_age_seconds
+        self.name = name
+        self._clock = clock
+
+        self.current: Optional[Snapshot] = None
+        self._refresh_lock = threading.Lock()
+        self._changed = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # When data first changed after the current snapshot's build started
+        self._changed_at: Optional[float] = None
+        self._last_start: Optional[float] = None
+        self._stats = {"refreshes": 0, "failures": 0, "notifications": 0}
+        logger.info(f"SnapshotRefresher {name} initialized (interval={interval_seconds}s, max_age={max_age_seconds}s)")
+
+    @classmethod
+    def from_env(cls, build: Callable[[], Dict[Hashable, Any]], name: str = "snapshot") -> Optional["SnapshotRefresher"]:
+        """Build from ML_SNAPSHOT_* env vars, or None if ML_SNAPSHOTS is "0"."""
+        if os.environ.get("ML_SNAPSHOTS", "1") == "0":
+            return None
+        return cls(
+            build,
+            interval_seconds=float(os.environ.get("ML_SNAPSHOT_INTERVAL_SECONDS", "60")),
+            min_interval_seconds=float(os.environ.get("ML_SNAPSHOT_MIN_INTERVAL_SECONDS", "5")),
+            max_age_seconds=float(os.environ.get("ML_SNAPSHOT_MAX_AGE_SECONDS", "300")),
+            name=name
+        )
+
+    def start(self):
+        """Start rebuilding in the background (the first build runs right away unless one exists)."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        self._changed.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def notify(self, *_):
+        """Signal that the data snapshots are built from changed."""
+        if threading.current_thread() is self._thread:
+            return
+        if self._changed_at is None:
+            self._changed_at = self._clock()
+        self._stats["notifications"] += 1
+        self._changed.set()
+
+    def fresh(self) -> Optional[Snapshot]:
+        """The current snapshot, or None if there is none or it is older than max_age_seconds."""
+        snapshot = self.current
+        if snapshot is None or self._clock() - snapshot.built_at > self.max_age_seconds:
+            return None
+        return snapshot
+
+    def refresh(self) -> Snapshot:
+        """Build a snapshot on the calling thread and publish it."""
+        with self._refresh_lock:
+            started = self._clock()
+            self._last_start = started
+            changed_at, self._changed_at = self._changed_at, None
+            self._changed.clear()
+            start = time.perf_counter()
+            try:
+                entries = self.build()
+            except Exception:
+                self._stats["failures"] += 1
+                # Whatever changed is still not reflected
+                if changed_at is not None and (self._changed_at is None or changed_at < self._changed_at):
+                    self._changed_at = changed_at
+                raise
+            seconds = time.perf_counter() - start
+
+            previous = self.current
+            snapshot = Snapshot(entries, previous.version + 1 if previous is not None else 1, started, seconds)
+            self.current = snapshot
+            self._stats["refreshes"] += 1
+        METRICS.record_stage("snapshots", self.name, seconds)
+        logger.info(f"Published {self.name} snapshot {snapshot.version} with {len(entries)} entries in {seconds:.2f}s")
+        return snapshot
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters, plus the current snapshot's age and how long data changes have gone unreflected."""
+        now = self._clock()
+        snapshot = self.current
+        changed_at = self._changed_at
+        stats = dict(self._stats)
+        stats["version"] = snapshot.version if snapshot is not None else 0
+        stats["entries"] = len(snapshot.entries) if snapshot is not None else 0
+        stats["age_seconds"] = now - snapshot.built_at if snapshot is not None else None
+        stats["staleness_seconds"] = now - changed_at if changed_at is not None else 0.0
+        stats["last_refresh_seconds"] = snapshot.build_seconds if snapshot is not None else None
+        return stats
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self.current is not None:
+                since = self._clock() - (self._last_start or 0.0)
+                self._changed.wait(max(self.interval_seconds - since, 0.0))
+                if self._stop.is_set():
+                    break
+                # Debounce: let a burst of updates land in one rebuild
+                wait = self.min_interval_seconds - (self._clock() - (self._last_start or 0.0))
+                if wait > 0 and self._stop.wait(wait):
+                    break
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Failed to refresh {self.name} snapshot: {str(e)}")
+                # Retry on the normal schedule rather than spinning on a persistent error
+                self._stop.wait(self.min_interval_seconds)
@@ -0,0 +1,131 @@
+# services/stock_details.py
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StockDetailsClient:
+    """
+    Bulk, short-TTL cached front for StockDataService.get_stock_details.
+
+    get_stock_details_many serves what it can from the quote cache and looks
+    up the rest in one go: with a single get_stock_details_many call if the
+    underlying service offers one, otherwise by fanning the per-symbol calls
+    out over a pool of worker threads that lives as long as the client, so
+    connections and threads are reused across requests instead of being set
+    up per call.
+
+    Quotes are cached for `ttl_seconds` only, so prices shown next to a
+    recommendation are never more than that stale.
+    """
+
+    def __init__(
+        self,
+        stock_data_service,
+        ttl_seconds: float = 15.0,
+        max_entries: int = 4096,
+        max_workers: int = 16,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.stock_data_service = stock_data_service
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_workers = max_workers
+        self._clock = clock
+
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "lookups": 0, "evictions": 0}
+        logger.info(f"StockDetailsClient initialized (ttl={ttl_seconds}s, max_entries={max_entries})")
+
+    def get_stock_details(self, symbol: str) -> Dict[str, Any]:
+        """Get details for one symbol (served from the quote cache when fresh)."""
+        return self.get_stock_details_many([symbol])[symbol]
+
+    def get_stock_details_many(self, symbols: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get details for many symbols with at most one batched lookup.
+
+        Args:
+            symbols: Stock symbols (duplicates are looked up once)
+
+        Returns:
+            Dictionary mapping each symbol to its details
+        """
+        symbols = list(dict.fromkeys(symbols))
+        details = {}
+        missing = []
+
+        now = self._clock()
+        with self._lock:
+            for symbol in symbols:
+                entry = self._entries.get(symbol)
+                if entry is not None and now - entry[0] < self.ttl_seconds:
+                    self._entries.move_to_end(symbol)
+                    details[symbol] = entry[1]
+                else:
+                    missing.append(symbol)
+            self._stats["hits"] += len(details)
+            self._stats["misses"] += len(missing)
+            if missing:
+                self._stats["lookups"] += 1
+
+        if not missing:
+            return details
+
+        fetched = self._lookup(missing)
+
+        fetched_at = self._clock()
+        with self._lock:
+            for symbol, stock_data in fetched.items():
+                self._entries[symbol] = (fetched_at, stock_data)
+                self._entries.move_to_end(symbol)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+        details.update(fetched)
+        return details
+
+    def invalidate(self, symbol: Optional[str] = None):
+        """Drop a symbol's cached quote, or every quote if no symbol is given."""
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(symbol, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters, hit ratio, batched lookups made and current size."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+
+    def _lookup(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Look up uncached symbols with one bulk call, or concurrently on the pool."""
+        bulk = getattr(self.stock_data_service, "get_stock_details_many", None)
+        if bulk is not None:
+            return dict(bulk(symbols))
+
+        if len(symbols) == 1:
+            return {symbols[0]: self.stock_data_service.get_stock_details(symbols[0])}
+
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stock-details")
+        results = self._pool.map(self.stock_data_service.get_stock_details, symbols)
+        return dict(zip(symbols, results))
@@ -0,0 +1,246 @@
+# services/universe_index.py
+import logging
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+RISK_LEVELS = ("conservative", "moderate", "aggressive")
+VOLATILITY_BUCKETS = ("low", "medium", "high")
+
+# Risk levels a symbol belongs to when its metadata does not list them explicitly
+RISK_BUCKETS = {
+    "conservative": ("low",),
+    "moderate": ("low", "medium"),
+    "aggressive": ("medium", "high"),
+}
+
+# Built-in universe used when no ML_UNIVERSE_PATH is configured; order and
+# risk membership reproduce the original hardcoded per-risk ticker lists.
+# Market caps ($B) and liquidity (average daily $M traded) are illustrative.
+DEFAULT_UNIVERSE = [
+    # symbol, sector, market_cap, volatility_bucket, liquidity, risk_levels
+    ("AAPL", "Technology", 2800, "low", 11000, ("conservative", "moderate")),
+    ("MSFT", "Technology", 2700, "low", 8500, ("conservative", "moderate")),
+    ("JNJ", "Healthcare", 380, "low", 1100, ("conservative",)),
+    ("PG", "Consumer Staples", 370, "low", 1000, ("conservative",)),
+    ("KO", "Consumer Staples", 260, "low", 900, ("conservative",)),
+    ("PEP", "Consumer Staples", 230, "low", 850, ("conservative",)),
+    ("VZ", "Communication Services", 170, "low", 800, ("conservative",)),
+    ("T", "Communication Services", 130, "low", 700, ("conservative",)),
+    ("PFE", "Healthcare", 160, "low", 1000, ("conservative",)),
+    ("MRK", "Healthcare", 300, "low", 1100, ("conservative",)),
+    ("GOOGL", "Communication Services", 1900, "medium", 4500, ("moderate",)),
+    ("AMZN", "Consumer Discretionary", 1800, "medium", 7000, ("moderate",)),
+    ("FB", "Communication Services", 1200, "medium", 5500, ("moderate",)),
+    ("V", "Financials", 520, "medium", 1700, ("moderate",)),
+    ("MA", "Financials", 420, "medium", 1400, ("moderate",)),
+    ("PYPL", "Financials", 70, "medium", 900, ("moderate",)),
+    ("DIS", "Communication Services", 170, "medium", 1200, ("moderate",)),
+    ("NFLX", "Communication Services", 270, "medium", 2500, ("moderate",)),
+    ("TSLA", "Consumer Discretionary", 700, "high", 25000, ("aggressive",)),
+    ("NVDA", "Technology", 2200, "high", 30000, ("aggressive",)),
+    ("AMD", "Technology", 250, "high", 7000, ("aggressive",)),
+    ("PLTR", "Technology", 50, "high", 1500, ("aggressive",)),
+    ("SQ", "Financials", 40, "high", 800, ("aggressive",)),
+    ("SHOP", "Technology", 90, "high", 900, ("aggressive",)),
+    ("ROKU", "Communication Services", 9, "high", 400, ("aggressive",)),
+    ("CRWD", "Technology", 75, "high", 1200, ("aggressive",)),
+    ("NET", "Technology", 30, "high", 500, ("aggressive",)),
+    ("DKNG", "Consumer Discretionary", 18, "high", 600, ("aggressive",)),
+]
+
+
+class UniverseIndex:
+    """
+    Immutable, precomputed index over the tradable universe.
+
+    Symbol metadata is held in compact column arrays (symbol, sector code,
+    market cap, volatility bucket code, liquidity) and every sector and risk
+    level gets a packed bitmap (np.packbits) of the symbols in it. Selecting
+    a universe is then an OR over the requested sector bitmaps, ANDs with the
+    risk bitmap and a NOT of the exclusion bitmap, plus optional vectorized
+    market-cap / liquidity thresholds. Results keep index order.
+
+    Built once at startup and shared read-only by every request.
+    """
+
+    def __init__(self, records: Iterable[Sequence[Any]]):
+        """
+        Args:
+            records: (symbol, sector, market_cap, volatility_bucket, liquidity[, risk_levels])
+                tuples; without risk_levels, membership follows RISK_BUCKETS
+        """
+        symbols, sectors, market_caps, buckets, liquidity, risk_levels = [], [], [], [], [], []
+        for record in records:
+            symbol, sector, market_cap, bucket, volume = record[:5]
+            if bucket not in VOLATILITY_BUCKETS:
+                raise ValueError(f"Unknown volatility bucket for {symbol}: {bucket}")
+            symbols.append(symbol)
+            sectors.append(sector)
+            market_caps.append(market_cap)
+            buckets.append(bucket)
+            liquidity.append(volume)
+            if len(record) > 5 and record[5]:
+                risk_levels.append(tuple(record[5]))
+            else:
+                risk_levels.append(tuple(level for level, allowed in RISK_BUCKETS.items() if bucket in allowed))
+
+        self.size = len(symbols)
+        self.symbols = np.array(symbols, dtype=object)
+        self.sector_names = sorted(set(sectors))
+        sector_codes = {name: code for code, name in enumerate(self.sector_names)}
+        self.sector_codes = np.array([sector_codes[sector] for sector in sectors], dtype=np.int16)
+        self.market_caps = np.array(market_caps, dtype=np.float64)
+        self.volatility_buckets = np.array([VOLATILITY_BUCKETS.index(b) for b in buckets], dtype=np.int8)
+        self.liquidity = np.array(liquidity, dtype=np.float64)
+
+        # Inverted indexes
+        self._positions = {symbol: position for position, symbol in enumerate(symbols)}
+        self._sector_lookup = {name.lower(): code for name, code in sector_codes.items()}
+        self._sector_bitmaps = [self._bitmap(self.sector_codes == code) for code in range(len(self.sector_names))]
+        self._risk_bitmaps = {
+            level: self._bitmap(np.array([level in levels for levels in risk_levels], dtype=bool))
+            for level in RISK_LEVELS
+        }
+        self._all_bitmap = self._bitmap(np.ones(self.size, dtype=bool))
+        logger.info(f"UniverseIndex built with {self.size} symbols in {len(self.sector_names)} sectors")
+
+    @classmethod
+    def default(cls) -> "UniverseIndex":
+        return cls(DEFAULT_UNIVERSE)
+
+    @classmethod
+    def from_csv(cls, path: str) -> "UniverseIndex":
+        """
+        Load metadata from a CSV with symbol, sector, market_cap, volatility_bucket
+        and liquidity columns, plus an optional "|"-separated risk_levels column.
+        """
+        frame = pd.read_csv(path)
+        if "risk_levels" in frame:
+            risk_levels = [
+                tuple(value.split("|")) if isinstance(value, str) else ()
+                for value in frame["risk_levels"]
+            ]
+        else:
+            risk_levels = [()] * len(frame)
+        return cls(zip(
+            frame["symbol"], frame["sector"], frame["market_cap"],
+            frame["volatility_bucket"], frame["liquidity"], risk_levels
+        ))
+
+    @classmethod
+    def from_env(cls) -> "UniverseIndex":
+        """Load ML_UNIVERSE_PATH if set, otherwise the built-in universe."""
+        path = os.environ.get("ML_UNIVERSE_PATH")
+        return cls.from_csv(path) if path else cls.default()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._positions
+
+    def select(
+        self,
+        risk_tolerance: str,
+        sectors: Optional[List[str]] = None,
+        exclusions: Optional[List[str]] = None,
+        min_market_cap: Optional[float] = None,
+        min_liquidity: Optional[float] = None
+    ) -> List[str]:
+        """
+        Select the universe for a profile.
+
+        Args:
+            risk_tolerance: Risk level (unknown levels fall back to "moderate")
+            sectors: Sectors to keep (case-insensitive); ignored if none are known
+            exclusions: Symbols and/or sector names to drop
+            min_market_cap: Optional market-cap floor
+            min_liquidity: Optional liquidity floor
+
+        Returns:
+            Matching symbols in index order
+        """
+        mask = self.mask(risk_tolerance, sectors, exclusions, min_market_cap, min_liquidity)
+        return self.symbols[np.flatnonzero(mask)].tolist()
+
+    def mask(
+        self,
+        risk_tolerance: Optional[str] = None,
+        sectors: Optional[List[str]] = None,
+        exclusions: Optional[List[str]] = None,
+        min_market_cap: Optional[float] = None,
+        min_liquidity: Optional[float] = None
+    ) -> np.ndarray:
+        """
+        Boolean mask (in index order) of the symbols select would return.
+
+        Without a risk tolerance every risk level is kept, e.g. to screen the
+        whole universe.
+        """
+        if risk_tolerance is None:
+            bits = self._all_bitmap
+        else:
+            bits = self._risk_bitmaps.get(risk_tolerance, self._risk_bitmaps["moderate"])
+
+        if sectors:
+            codes = [self._sector_lookup[s.lower()] for s in sectors if s.lower() in self._sector_lookup]
+            if codes:
+                bits = bits & np.bitwise_or.reduce([self._sector_bitmaps[code] for code in codes])
+            else:
+                logger.warning(f"No known sectors in preferences {sectors}, ignoring them")
+
+        if exclusions:
+            bits = bits & ~self._exclusion_bitmap(exclusions)
+
+        # unpackbits returns a fresh array, so callers may narrow it in place
+        mask = np.unpackbits(bits, count=self.size).view(bool)
+        if min_market_cap is not None:
+            mask &= self.market_caps >= min_market_cap
+        if min_liquidity is not None:
+            mask &= self.liquidity >= min_liquidity
+        return mask
+
+    def positions(self, symbols: Iterable[str]) -> np.ndarray:
+        """Index positions of symbols (all of which must be in the index)."""
+        return np.fromiter((self._positions[symbol] for symbol in symbols), dtype=np.int64)
+
+    def metadata(self, symbol: str) -> Dict[str, Any]:
+        """Metadata of one symbol."""
+        position = self._positions[symbol]
+        return {
+            "symbol": symbol,
+            "sector": self.sector_names[self.sector_codes[position]],
+            "market_cap": float(self.market_caps[position]),
+            "volatility_bucket": VOLATILITY_BUCKETS[self.volatility_buckets[position]],
+            "liquidity": float(self.liquidity[position]),
+        }
+
+    def sectors_of(self, symbols: List[str]) -> Dict[str, str]:
+        """Sector of each symbol in the index (symbols not in the index are left out)."""
+        return {
+            symbol: self.sector_names[self.sector_codes[self._positions[symbol]]]
+            for symbol in symbols if symbol in self._positions
+        }
+
+    def _exclusion_bitmap(self, exclusions: List[str]) -> np.ndarray:
+        positions = list(map(self._positions.get, exclusions))
+        mask = np.zeros(self.size, dtype=bool)
+        mask[[position for position in positions if position is not None]] = True
+        bitmap = self._bitmap(mask)
+
+        # Whatever is not a known symbol may be a sector name
+        for item, position in zip(exclusions, positions):
+            if position is None:
+                code = self._sector_lookup.get(item.lower())
+                if code is not None:
+                    bitmap |= self._sector_bitmaps[code]
+        return bitmap
+
+    @staticmethod
+    def _bitmap(mask: np.ndarray) -> np.ndarray:
+        return np.packbits(mask)
@@ -0,0 +1,153 @@
+# services/warmup.py
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from services.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+PENDING, RUNNING, READY, FAILED = "pending", "running", "ready", "failed"
+
+
+class _Step:
+    __slots__ = ("name", "func", "required", "lock", "state", "value", "error", "seconds")
+
+    def __init__(self, name: str, func: Callable[[], Any], required: bool):
+        self.name = name
+        self.func = func
+        self.required = required
+        self.lock = threading.Lock()
+        self.state = PENDING
+        self.value = None
+        self.error: Optional[BaseException] = None
+        self.seconds: Optional[float] = None
+
+
+class Warmup:
+    """
+    Builds the app's services, and warms their models and caches, off the
+    import path.
+
+    Each step is a named function registered with @warmup.step(name) whose
+    return value is the component (steps that only warm something return
+    None). A step runs at most once, either when get(name) first needs it
+    (lazy init, on the caller's thread) or from start(), which runs every
+    step in registration order on a background thread. Steps can get()
+    components of other steps; concurrent callers of one step wait for the
+    same run.
+
+    A failing step is recorded, not retried: get() re-raises its error.
+    The app is ready once every step has run and no required step failed;
+    optional (warm-only) steps that fail are only reported in status().
+    With lazy=True, steps only run on demand, so the app counts as ready as
+    long as no required step has failed.
+    """
+
+    def __init__(self, lazy: bool = False):
+        self.lazy = lazy
+        self._steps: Dict[str, _Step] = {}
+        self._created = time.perf_counter()
+        self._thread: Optional[threading.Thread] = None
+
+    def step(self, name: str, required: bool = True):
+        """Register the decorated function as the step building `name`."""
+        def register(func: Callable[[], Any]) -> Callable[[], Any]:
+            self._steps[name] = _Step(name, func, required)
+            return func
+        return register
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._steps
+
+    def start(self):
+        """Run every step not run yet on a background daemon thread (once)."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run_all, name="ml-warmup", daemon=True)
+            self._thread.start()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the background run finishes; return whether the app is ready."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.is_ready()
+
+    def get(self, name: str) -> Any:
+        """
+        Return the component built by step `name`, running the step now if needed.
+
+        Raises:
+            Whatever the step raised
+        """
+        step = self._steps[name]
+        if step.state not in (READY, FAILED):
+            with step.lock:
+                if step.state == PENDING:
+                    self._run(step)
+        if step.error is not None:
+            raise step.error
+        return step.value
+
+    async def aget(self, name: str) -> Any:
+        """get() for async callers: waits on a worker thread instead of blocking the event loop."""
+        if self._steps[name].state in (READY, FAILED):
+            return self.get(name)
+        return await asyncio.to_thread(self.get, name)
+
+    def peek(self, name: str) -> Any:
+        """Return the component if step `name` already succeeded, without running or waiting for it."""
+        step = self._steps[name]
+        return step.value if step.state == READY else None
+
+    def is_ready(self) -> bool:
+        if self.lazy:
+            return not any(step.state == FAILED and step.required for step in self._steps.values())
+        return all(
+            step.state == READY or (step.state == FAILED and not step.required)
+            for step in self._steps.values()
+        )
+
+    def status(self) -> Dict[str, Any]:
+        """Readiness plus the state, duration and error of every step."""
+        return {
+            "ready": self.is_ready(),
+            "lazy": self.lazy,
+            "uptime_seconds": round(time.perf_counter() - self._created, 3),
+            "steps": {
+                step.name: {
+                    "state": step.state,
+                    "required": step.required,
+                    "seconds": round(step.seconds, 4) if step.seconds is not None else None,
+                    "error": str(step.error) if step.error is not None else None,
+                }
+                for step in self._steps.values()
+            },
+        }
+
+    def _run(self, step: _Step):
+        step.state = RUNNING
+        start = time.perf_counter()
+        try:
+            step.value = step.func()
+            step.state = READY
+        except Exception as e:
+            step.error = e
+            step.state = FAILED
+            log = logger.error if step.required else logger.warning
+            log(f"Warmup step {step.name} failed: {str(e)}")
+        finally:
+            step.seconds = time.perf_counter() - start
+            METRICS.record_stage("startup", step.name, step.seconds)
+        if step.state == READY:
+            logger.info(f"Warmup step {step.name} ready in {step.seconds * 1000:.1f}ms")
+
+    def _run_all(self):
+        for name in list(self._steps):
+            try:
+                self.get(name)
+            except Exception:
+                pass  # recorded on the step
+        ready = "ready" if self.is_ready() else "not ready"
+        logger.info(f"Warmup finished in {time.perf_counter() - self._created:.2f}s ({ready})")
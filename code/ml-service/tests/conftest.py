@@ -0,0 +1,38 @@
+# tests/conftest.py
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Modules are imported from the service root, as app.py and the benchmarks do
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def make_closes():
+    """Factory of {symbol: {"close": array}} universes with varying lengths, as OHLCVStore returns them."""
+    def make(num_symbols: int, num_bars: int = 120, seed: int = 7, min_bars: int = None):
+        rng = np.random.default_rng(seed)
+        returns = rng.normal(0.0004, rng.uniform(0.005, 0.03, num_symbols), (num_bars, num_symbols))
+        paths = rng.uniform(20, 500, num_symbols) * np.cumprod(1 + returns, axis=0)
+        lengths = rng.integers(min_bars or num_bars // 2, num_bars + 1, num_symbols)
+        return {
+            f"SYM{index:04d}": {"close": paths[num_bars - lengths[index]:, index]}
+            for index in range(num_symbols)
+        }
+    return make
+
+
+@pytest.fixture
+def edge_closes():
+    """Close series of every shape scoring must agree on: random, flat, monotone and partly flat, short to long."""
+    rng = np.random.default_rng(11)
+    series = {}
+    for length in (1, 2, 5, 14, 15, 20, 21, 31, 120, 700):
+        series[f"RND{length}"] = 100 * np.cumprod(1 + rng.normal(0.0005, 0.02, length))
+        series[f"FLAT{length}"] = np.full(length, 42.0)
+        series[f"UP{length}"] = 50 + np.arange(length, dtype=np.float64)
+        series[f"DOWN{length}"] = 50 + np.arange(length, 0, -1, dtype=np.float64)
+        series[f"STEP{length}"] = np.where(np.arange(length) < length // 2, 30.0, 31.5)
+    return series
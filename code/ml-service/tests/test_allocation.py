@@ -0,0 +1,63 @@
+# tests/test_allocation.py
+import pytest
+
+from models.recommendation.allocation import CovarianceAllocator
+from models.recommendation.rule_based import RuleBasedRecommender
+
+
+@pytest.mark.parametrize("budget", [2500, 10000, 1000000])
+def test_lots_are_sized_at_the_quoted_prices(make_closes, budget):
+    historical_data = make_closes(60, num_bars=260, min_bars=260)
+    recommender = RuleBasedRecommender(allocator=CovarianceAllocator(lot_size=1))
+    ranking = recommender.rank_stocks(historical_data, "moderate", "medium")
+    base = recommender.base_allocation(ranking, "moderate", historical_data)
+    assert "weight" in base[0]
+
+    # Live quotes 10% above the last closes the plan saw
+    quoted = {rec["symbol"]: round(rec["price"] * 1.1, 2) for rec in base}
+    requested = []
+
+    def quotes(symbols):
+        requested.append(list(symbols))
+        return {symbol: quoted[symbol] for symbol in symbols}
+
+    recommendations = recommender.scale_allocation(base, budget, quotes)
+    assert requested == [[rec["symbol"] for rec in base]]
+    invested = 0.0
+    for rec in recommendations:
+        assert rec["shares"] * quoted[rec["symbol"]] / budget * 100 == pytest.approx(rec["allocation"], abs=0.005)
+        invested += rec["shares"] * quoted[rec["symbol"]]
+    assert invested <= budget
+    # Allocations plus the uninvested cash account for the whole budget
+    cash = (budget - invested) / budget * 100
+    assert sum(rec["allocation"] for rec in recommendations) + cash == pytest.approx(100, abs=0.005 * len(recommendations))
+
+
+def test_unquoted_symbols_fall_back_to_the_last_close(make_closes):
+    historical_data = make_closes(30, num_bars=260, min_bars=260)
+    recommender = RuleBasedRecommender(allocator=CovarianceAllocator(lot_size=1))
+    ranking = recommender.rank_stocks(historical_data, "aggressive", "short")
+    base = recommender.base_allocation(ranking, "aggressive", historical_data)
+
+    assert recommender.scale_allocation(base, 50000, lambda symbols: {}) == recommender.scale_allocation(base, 50000)
+
+
+@pytest.mark.parametrize("budget", [0, -5000])
+def test_non_positive_budget_buys_no_shares(make_closes, budget):
+    historical_data = make_closes(30, num_bars=260, min_bars=260)
+    recommender = RuleBasedRecommender(allocator=CovarianceAllocator(lot_size=1))
+    ranking = recommender.rank_stocks(historical_data, "moderate", "medium")
+    base = recommender.base_allocation(ranking, "moderate", historical_data)
+
+    recommendations = recommender.scale_allocation(base, budget)
+    assert [rec["symbol"] for rec in recommendations] == [rec["symbol"] for rec in base]
+    assert all(rec["shares"] == 0 for rec in recommendations)
+    assert [rec["allocation"] for rec in recommendations] == [round(rec["weight"] * 100, 2) for rec in base]
+
+
+def test_user_profile_requires_a_positive_budget():
+    pydantic = pytest.importorskip("pydantic")
+    app = pytest.importorskip("app")
+    with pytest.raises(pydantic.ValidationError):
+        app.UserProfile(risk_tolerance="moderate", budget=0, time_horizon="medium")
+    assert app.UserProfile(risk_tolerance="moderate", budget=1, time_horizon="medium").budget == 1
@@ -0,0 +1,59 @@
+# tests/test_batch_recommendations.py
+from collections import Counter
+
+import pytest
+
+recommend = pytest.importorskip("api.recommend")
+from models.recommendation.rule_based import RuleBasedRecommender
+
+
+@pytest.fixture
+def service(make_closes):
+    service = recommend.RecommendationService(RuleBasedRecommender())
+    closes = make_closes(len(service.universe_index), num_bars=260, min_bars=260)
+    by_symbol = dict(zip(service.universe_index.symbols.tolist(), closes.values()))
+    service.fetches = Counter()
+    service.rankings = Counter()
+
+    def fetch(symbols, time_horizon="medium"):
+        service.fetches[tuple(symbols), time_horizon] += 1
+        return {symbol: by_symbol[symbol] for symbol in symbols}
+
+    rank_stocks = service.recommender.rank_stocks
+
+    def counted_rank_stocks(historical_data, risk_tolerance, time_horizon, *args, **kwargs):
+        service.rankings[tuple(historical_data), risk_tolerance, time_horizon] += 1
+        return rank_stocks(historical_data, risk_tolerance, time_horizon, *args, **kwargs)
+
+    service._fetch_historical_data = fetch
+    service.recommender.rank_stocks = counted_rank_stocks
+    return service
+
+
+def test_each_group_is_ranked_once_and_records_keep_input_order(service):
+    excluded = service._get_stock_universe("moderate", None, None)[0]
+    profiles = [
+        {"risk_tolerance": "moderate", "budget": 10000, "time_horizon": "medium"},
+        {"risk_tolerance": "aggressive", "budget": 5000, "time_horizon": "short"},
+        {"risk_tolerance": "moderate", "budget": 250000, "time_horizon": "medium"},
+        {"risk_tolerance": "moderate", "budget": 10000, "time_horizon": "medium", "exclusions": [excluded]},
+        {"risk_tolerance": "moderate", "time_horizon": "medium"},
+        {"risk_tolerance": "aggressive", "budget": 7500, "time_horizon": "short", "exclusions": []},
+    ]
+
+    records = list(service.generate_batch_recommendations(iter(profiles)))
+
+    assert [record["index"] for record in records] == list(range(len(profiles)))
+    # (moderate, medium), (aggressive, short) and (moderate, medium) without one symbol
+    assert len(service.rankings) == 3 and set(service.rankings.values()) == {1}
+    assert len(service.fetches) == 3 and set(service.fetches.values()) == {1}
+
+    assert set(records[4]) == {"index", "error"}
+    for index, (profile, record) in enumerate(zip(profiles, records)):
+        if index == 4:
+            continue
+        assert set(record) == {"index", "recommendations", "cash_allocation"}
+        expected = service.generate_recommendations(**profile)
+        assert record["recommendations"] == expected
+        assert record["cash_allocation"] == service.cash_allocation(expected, profile["budget"])
+    assert excluded not in [rec["symbol"] for rec in records[3]["recommendations"]]
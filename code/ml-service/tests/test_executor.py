@@ -0,0 +1,76 @@
+# tests/test_executor.py
+import asyncio
+import gc
+import json
+
+import pytest
+
+from services.executor import BoundedExecutor, ExecutorSaturatedError
+
+
+@pytest.mark.parametrize("kind", ["thread", "process", "inline"])
+def test_reserved_slot_counts_toward_the_backlog(kind):
+    executor = BoundedExecutor(kind=kind, max_workers=1, max_queue=1)
+    try:
+        first = executor.reserve()
+        second = executor.reserve()
+        with pytest.raises(ExecutorSaturatedError):
+            executor.reserve()
+        with pytest.raises(ExecutorSaturatedError):
+            asyncio.run(executor.run(len, "abc"))
+
+        # Stateful calls such as a generator's __next__ run under the slot, even with a process pool
+        records = iter([1, 2])
+        assert asyncio.run(first.run(next, records, None)) == 1
+        assert asyncio.run(first.run(next, records, None)) == 2
+        assert asyncio.run(first.run(next, records, None)) is None
+
+        first.release()
+        first.release()
+        assert executor.stats()["pending"] == 1
+        assert asyncio.run(executor.run(len, "abc")) == 3
+        del second
+        gc.collect()
+        assert executor.stats()["pending"] == 0
+        assert executor.stats()["rejected"] == 2
+    finally:
+        executor.shutdown()
+
+
+def test_batch_endpoint_is_refused_when_the_executor_is_saturated(monkeypatch):
+    testclient = pytest.importorskip("fastapi.testclient")
+    app = pytest.importorskip("app")
+
+    class Service:
+        def __init__(self):
+            self.calls = 0
+
+        def generate_batch_recommendations(self, profiles):
+            for index, profile in enumerate(profiles):
+                self.calls += 1
+                yield {"index": index, "recommendations": [], "cash_allocation": None}
+
+    service = Service()
+
+    async def aget(name):
+        return service
+
+    executor = BoundedExecutor(kind="thread", max_workers=1, max_queue=0)
+    monkeypatch.setattr(app, "cpu_executor", executor)
+    monkeypatch.setattr(app.warmup, "aget", aget)
+    client = testclient.TestClient(app.app)
+    body = {"profiles": [{"risk_tolerance": "moderate", "budget": 1000, "time_horizon": "medium"}] * 3}
+    try:
+        held = executor.reserve()
+        response = client.post("/recommend/batch", json=body)
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+        assert service.calls == 0
+
+        held.release()
+        response = client.post("/recommend/batch", json=body)
+        assert response.status_code == 200
+        assert [json.loads(line)["index"] for line in response.text.splitlines()] == [0, 1, 2]
+        assert executor.stats()["pending"] == 0
+    finally:
+        executor.shutdown()
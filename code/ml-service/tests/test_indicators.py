@@ -0,0 +1,52 @@
+# tests/test_indicators.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.recommendation.indicators import BARS_PER_YEAR, compute_indicator_batch, pack_closes
+from models.recommendation.rule_based import RuleBasedRecommender
+
+PROFILES = [
+    (risk_tolerance, time_horizon)
+    for risk_tolerance in ("conservative", "moderate", "aggressive")
+    for time_horizon in ("short", "medium", "long")
+]
+PER_BAR = ("ma_5", "ma_10", "ma_20", "rsi", "ema_12", "ema_26", "macd", "macd_signal")
+
+
+@pytest.mark.parametrize("risk_tolerance,time_horizon,interval", [
+    *[(risk_tolerance, time_horizon, "1d") for risk_tolerance, time_horizon in PROFILES],
+    ("conservative", "long", "1w"), ("moderate", "medium", "1w"), ("aggressive", "short", "60min"),
+])
+def test_vectorized_scoring_matches_per_symbol(edge_closes, make_closes, risk_tolerance, time_horizon, interval):
+    historical_data = {symbol: pd.DataFrame({"close": closes}) for symbol, closes in edge_closes.items()}
+    historical_data.update(make_closes(40, num_bars=300, min_bars=2))
+
+    vectorized = RuleBasedRecommender().rank_stocks(historical_data, risk_tolerance, time_horizon, interval)
+    per_symbol = RuleBasedRecommender(vectorized=False).rank_stocks(
+        historical_data, risk_tolerance, time_horizon, interval
+    )
+    assert vectorized == per_symbol
+
+
+@pytest.mark.parametrize("rows", [None, 1])
+def test_indicator_batch_matches_pandas_columns(edge_closes, rows):
+    recommender = RuleBasedRecommender(vectorized=False)
+    symbols, closes, lengths = pack_closes({symbol: {"close": series} for symbol, series in edge_closes.items()})
+    indicators = compute_indicator_batch(closes, lengths, BARS_PER_YEAR["1d"], rows=rows)
+
+    for column, symbol in enumerate(symbols):
+        frame = recommender._calculate_indicators(pd.DataFrame({"close": edge_closes[symbol]}))
+        expected_rows = frame.iloc[-(rows or len(frame)):]
+        for name in PER_BAR:
+            actual = indicators[name][-len(expected_rows):, column]
+            np.testing.assert_allclose(actual, expected_rows[name].to_numpy(), rtol=1e-9, atol=1e-9,
+                                       equal_nan=True, err_msg=f"{symbol} {name}")
+
+        trends = recommender._calculate_trend_strength(frame)
+        for name, value in trends.items():
+            np.testing.assert_allclose(indicators[name][column], value, rtol=1e-9, atol=1e-12,
+                                       equal_nan=True, err_msg=f"{symbol} {name}")
+        volatility = frame["close"].pct_change().std() * np.sqrt(BARS_PER_YEAR["1d"])
+        np.testing.assert_allclose(indicators["volatility"][column], volatility, rtol=1e-9, atol=1e-12,
+                                   equal_nan=True, err_msg=symbol)
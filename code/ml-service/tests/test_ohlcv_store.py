@@ -0,0 +1,93 @@
+# tests/test_ohlcv_store.py
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.ohlcv_store import FIELDS, OHLCVStore, write_ohlcv_store
+
+
+def frames(num_bars=(30, 5, 12), seed=3):
+    rng = np.random.default_rng(seed)
+    historical_data = {}
+    for index, length in enumerate(num_bars):
+        close = 100 * np.cumprod(1 + rng.normal(0, 0.01, length))
+        historical_data[f"SYM{index}"] = pd.DataFrame({
+            "date": pd.date_range("2024-01-01", periods=length, freq="D"),
+            "open": close * 0.99,
+            "high": close * 1.01,
+            "low": close * 0.98,
+            "close": close,
+            "volume": rng.integers(1_000, 1_000_000, length),
+        })
+    return historical_data
+
+
+@pytest.mark.parametrize("price_dtype,volume_dtype", [("float64", "int64"), ("float32", "int32")])
+def test_round_trip_returns_read_only_zero_copy_views(tmp_path, price_dtype, volume_dtype):
+    historical_data = frames()
+    write_ohlcv_store(str(tmp_path), historical_data, price_dtype=price_dtype, volume_dtype=volume_dtype)
+    store = OHLCVStore(str(tmp_path))
+
+    assert sorted(store.symbols) == sorted(historical_data)
+    assert (store.price_dtype, store.volume_dtype) == (price_dtype, volume_dtype)
+    for symbol, data in historical_data.items():
+        window = store.window(symbol)
+        assert set(window) == set(FIELDS)
+        assert window["close"].dtype == np.dtype(price_dtype)
+        assert window["volume"].dtype == np.dtype(volume_dtype)
+        np.testing.assert_array_equal(window["close"], data["close"].to_numpy(dtype=price_dtype))
+        np.testing.assert_array_equal(window["volume"], data["volume"].to_numpy(dtype=volume_dtype))
+        np.testing.assert_array_equal(window["date"], data["date"].to_numpy())
+        for field, view in window.items():
+            assert not view.flags.writeable
+            assert np.shares_memory(view, store._columns[field])
+
+    recent = store.window("SYM0", bars=7)
+    np.testing.assert_array_equal(recent["close"], historical_data["SYM0"]["close"].to_numpy(dtype=price_dtype)[-7:])
+    assert np.shares_memory(recent["close"], store.window("SYM0")["close"])
+
+
+def test_load_historical_data_skips_unknown_symbols(tmp_path):
+    historical_data = frames()
+    write_ohlcv_store(str(tmp_path), historical_data)
+    store = OHLCVStore(str(tmp_path))
+
+    loaded = store.load_historical_data(["SYM1", "MISSING", "SYM2"], bars=10)
+    assert list(loaded) == ["SYM1", "SYM2"]
+    assert len(loaded["SYM1"]["close"]) == 5
+    assert len(loaded["SYM2"]["close"]) == 10
+    assert np.shares_memory(loaded["SYM2"]["close"], store._columns["close"])
+    assert "MISSING" not in store
+    with pytest.raises(KeyError):
+        store.window("MISSING")
+
+
+def test_empty_windows(tmp_path):
+    historical_data = frames()
+    historical_data["EMPTY"] = historical_data["SYM0"].iloc[:0]
+    write_ohlcv_store(str(tmp_path), historical_data)
+    store = OHLCVStore(str(tmp_path))
+
+    assert all(len(view) == 0 for view in store.window("EMPTY").values())
+    assert all(len(view) == 0 for view in store.window("SYM0", bars=0).values())
+    assert store.frame("EMPTY").empty
+
+
+def test_rewrite_leaves_open_stores_on_their_version(tmp_path):
+    write_ohlcv_store(str(tmp_path), frames(seed=1))
+    old_store = OHLCVStore(str(tmp_path))
+    old_close = np.array(old_store.window("SYM0")["close"])
+
+    new_data = frames(num_bars=(40, 2), seed=2)
+    write_ohlcv_store(str(tmp_path), new_data)
+    new_store = OHLCVStore(str(tmp_path))
+
+    np.testing.assert_array_equal(old_store.window("SYM0")["close"], old_close)
+    np.testing.assert_array_equal(new_store.window("SYM0")["close"], new_data["SYM0"]["close"].to_numpy())
+    assert "SYM2" in old_store and "SYM2" not in new_store
+
+    # Only the current and the previous version are kept
+    write_ohlcv_store(str(tmp_path), frames(seed=4))
+    assert len([name for name in os.listdir(tmp_path) if name.startswith("data-")]) == 2
@@ -0,0 +1,36 @@
+# tests/test_parallel.py
+import pytest
+
+from models.recommendation.parallel import ParallelScorer
+from models.recommendation.rule_based import RuleBasedRecommender
+
+THRESHOLDS = {"rsi_momentum": 50, "volatility_low": 0.25, "volatility_high": 0.35, "trend_short": 0.5}
+PROFILES = [("conservative", "long"), ("moderate", "medium"), ("aggressive", "short")]
+
+
+@pytest.fixture(scope="module")
+def scorer():
+    scorer = ParallelScorer(workers=2, min_symbols=0)
+    yield scorer
+    scorer.shutdown()
+
+
+@pytest.mark.parametrize("risk_tolerance,time_horizon", PROFILES)
+def test_parallel_ranks_like_serial_with_custom_thresholds(scorer, make_closes, risk_tolerance, time_horizon):
+    historical_data = make_closes(300)
+    serial = RuleBasedRecommender(thresholds=THRESHOLDS)
+    parallel = RuleBasedRecommender(parallel_scorer=scorer, thresholds=THRESHOLDS)
+
+    top_n = 25
+    expected = serial.rank_stocks(historical_data, risk_tolerance, time_horizon)[:top_n]
+    assert scorer.top_stocks(historical_data, risk_tolerance, time_horizon, top_n,
+                             thresholds=serial.thresholds) == expected
+    assert (parallel.generate_recommendations(historical_data, risk_tolerance, time_horizon, 10000)
+            == serial.generate_recommendations(historical_data, risk_tolerance, time_horizon, 10000))
+
+
+def test_thresholds_change_the_parallel_ranking(scorer, make_closes):
+    historical_data = make_closes(300)
+    custom = scorer.top_stocks(historical_data, "aggressive", "short", 300, thresholds=THRESHOLDS)
+    default = scorer.top_stocks(historical_data, "aggressive", "short", 300)
+    assert [analysis["score"] for analysis in custom] != [analysis["score"] for analysis in default]
@@ -0,0 +1,29 @@
+# tests/test_price_store.py
+import pandas as pd
+
+from services.price_store import PriceStore
+
+
+def fetch_bars(symbol, start_date, end_date, interval="1d"):
+    dates = pd.date_range(start=start_date, end=end_date, freq="D" if interval == "1d" else interval)
+    return pd.DataFrame({"date": dates, "close": range(len(dates))})
+
+
+def test_invalidate_notifies_listeners_for_each_dropped_symbol():
+    store = PriceStore(fetch_bars)
+    for symbol in ("AAA", "BBB", "CCC"):
+        store.get(symbol, 30)
+    store.get("AAA", 60)
+    notified = []
+    store.add_listener(notified.append)
+
+    store.invalidate("AAA")
+    assert notified == ["AAA"]
+    assert store.stats()["entries"] == 2
+
+    store.invalidate("MISSING")
+    assert notified == ["AAA"]
+
+    store.invalidate()
+    assert sorted(notified) == ["AAA", "BBB", "CCC"]
+    assert store.stats()["entries"] == 0
@@ -0,0 +1,42 @@
+# tests/test_score_cache.py
+from models.recommendation.score_cache import ScoreCache
+
+
+def key(symbol, version=0, risk_tolerance="moderate"):
+    return (symbol, version.to_bytes(2, "little"), risk_tolerance, "medium", "1d")
+
+
+def test_invalidate_drops_only_that_symbols_entries():
+    cache = ScoreCache()
+    for symbol in ("AAA", "BBB"):
+        for risk_tolerance in ("conservative", "moderate"):
+            cache.put(key(symbol, risk_tolerance=risk_tolerance), {"symbol": symbol})
+
+    cache.invalidate("AAA")
+    assert cache.get(key("AAA")) is None
+    assert cache.get(key("BBB")) == {"symbol": "BBB"}
+    assert cache.stats()["invalidations"] == 2
+    assert cache.stats()["entries"] == 2
+
+
+def test_evicted_keys_leave_the_symbol_index():
+    cache = ScoreCache(max_entries=3)
+    for version in range(5):
+        cache.put(key("AAA", version), {"symbol": "AAA", "version": version})
+    cache.put(key("BBB"), {"symbol": "BBB"})
+
+    assert cache.stats()["evictions"] == 3
+    assert cache._symbol_keys["AAA"] == {key("AAA", 3), key("AAA", 4)}
+    cache.invalidate("AAA")
+    assert cache.stats()["invalidations"] == 2
+    assert "AAA" not in cache._symbol_keys
+    assert cache.get(key("BBB")) == {"symbol": "BBB"}
+
+
+def test_invalidate_all_clears_the_symbol_index():
+    cache = ScoreCache()
+    cache.put(key("AAA"), {"symbol": "AAA"})
+    cache.invalidate()
+    cache.invalidate("AAA")
+    assert cache.stats()["entries"] == 0
+    assert cache._symbol_keys == {}
@@ -0,0 +1,36 @@
+# tests/test_screener.py
+import numpy as np
+import pytest
+
+from models.recommendation.rule_based import RuleBasedRecommender
+from models.recommendation.screener import Screener
+from services.universe_index import UniverseIndex
+
+
+@pytest.fixture
+def screener():
+    index = UniverseIndex.default()
+    rng = np.random.default_rng(3)
+    histories = {
+        symbol: {"close": rng.uniform(50, 60) * np.cumprod(1 + rng.normal(0, 0.01, 60)),
+                 "volume": rng.uniform(1e6, 5e6, 60)}
+        for symbol in index.symbols.tolist()
+    }
+    screener = Screener(RuleBasedRecommender(), index, {"short": "1d", "medium": "1d", "long": "1d"})
+    for features in screener.features.values():
+        features.refresh(histories.get)
+    return screener
+
+
+def test_screen_matches_rank_order(screener):
+    screen = screener.screen("moderate", "medium", limit=5)
+    scores = [result["score"] for result in screen["results"]]
+    assert len(scores) == 5 and scores == sorted(scores, reverse=True)
+    assert list(screener._scores) == [("medium", "moderate")]
+
+
+@pytest.mark.parametrize("risk_tolerance,time_horizon", [("reckless", "medium"), ("moderate", "forever")])
+def test_unknown_profiles_are_rejected_without_caching_scores(screener, risk_tolerance, time_horizon):
+    with pytest.raises(ValueError):
+        screener.screen(risk_tolerance, time_horizon)
+    assert screener._scores == {}
@@ -0,0 +1,77 @@
+# tests/test_sentiment_batch.py
+import asyncio
+import pickle
+
+import pytest
+
+from services.executor import BoundedExecutor
+
+transformer_model = pytest.importorskip("models.sentiment.transformer_model")
+
+
+@pytest.fixture(scope="module")
+def analyzer():
+    return transformer_model.TransformerSentimentAnalyzer()
+
+
+TEXTS = [
+    "",
+    "   ",
+    "Earnings beat estimates as revenue growth stays strong",
+    "Fed signals interest rates will stay higher; inflation concern grows",
+    "Interest-rates fears: the FED warns of a RECESSION risk!!!",
+    "interest\nrates, interest  rates and interestrates are not the same",
+    "Loss, loss, LOSS. Decline, decline... and weak guidance again",
+    "profit profit profit up up up",
+    "Bull market? Bear market! Volatility, rally, correction.",
+    "CEO steps down after merger; layoffs and restructuring announced",
+    "Dividend upgrade: outlook positive, momentum strong, record quarter",
+    "Growth-growth (growth) [growth] {profit}",
+    "No financial words at all here",
+    "Émission négative: décline et risque",
+]
+
+
+def assert_matches_analyze(analyzer, texts):
+    expected = [analyzer.analyze(text) for text in texts]
+    assert analyzer.analyze_batch(texts) == expected
+    for result in expected:
+        assert set(result) == {"score", "label", "key_terms", "confidence"}
+
+
+def test_analyze_batch_matches_analyze(analyzer):
+    assert_matches_analyze(analyzer, TEXTS)
+
+
+def test_analyze_batch_matches_analyze_on_multi_word_terms(analyzer):
+    results = analyzer.analyze_batch(["interest rates rise", "interest in rates", "rates of interest"])
+    assert "interest rates" in results[0]["key_terms"]
+    assert "interest rates" not in results[1]["key_terms"]
+    assert "interest rates" not in results[2]["key_terms"]
+    assert_matches_analyze(analyzer, ["interest rates rise", "interest in rates", "rates of interest"])
+
+
+def test_analyze_batch_of_empty_list(analyzer):
+    assert analyzer.analyze_batch([]) == []
+
+
+def test_analyze_batch_past_the_result_cache_size(analyzer):
+    words = sorted(analyzer.positive_words) + sorted(analyzer.negative_words) + analyzer.financial_terms
+    texts = [
+        f"{words[i % len(words)]} {words[(i * 7) % len(words)]} {words[(i * 13) % len(words)]} item {i}"
+        + " up" * (i % 11) + " down" * (i % 7)
+        for i in range(transformer_model.RESULT_CACHE_SIZE + 500)
+    ]
+    assert_matches_analyze(analyzer, texts)
+    # A second pass starts from a full memo, which is cleared rather than grown
+    assert_matches_analyze(analyzer, texts[::-1])
+
+
+def test_process_pool_workers_build_their_own_analyzer(analyzer):
+    executor = BoundedExecutor(kind="process", max_workers=1)
+    try:
+        results = asyncio.run(executor.run(transformer_model.analyze_batch_in_worker, TEXTS))
+    finally:
+        executor.shutdown()
+    assert results == analyzer.analyze_batch(TEXTS)
+    pickle.dumps(transformer_model.analyze_batch_in_worker)
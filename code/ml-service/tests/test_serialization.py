@@ -0,0 +1,42 @@
+# tests/test_serialization.py
+import pytest
+
+from services import serialization
+from services.serialization import JSON, MSGPACK, NotAcceptableError, negotiate
+
+
+@pytest.mark.parametrize("accept", [
+    None,
+    "",
+    "*/*",
+    "application/*",
+    "text/html",
+    "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "application/msgpack;q=0",
+])
+def test_unlisted_or_missing_types_fall_back_to_json(accept):
+    assert negotiate(accept) == JSON
+    assert negotiate(accept, "results") == JSON
+
+
+@pytest.mark.parametrize("accept", [
+    "application/json;q=0",
+    "*/*;q=0",
+    "application/json;q=0, text/html",
+])
+def test_excluding_json_without_an_alternative_is_not_acceptable(accept):
+    with pytest.raises(NotAcceptableError):
+        negotiate(accept)
+
+
+def test_specific_range_overrides_wildcard_exclusion():
+    assert negotiate("*/*;q=0, application/json;q=0.1") == JSON
+
+
+@pytest.mark.skipif(serialization.msgpack is None, reason="msgpack not installed")
+def test_msgpack_is_chosen_when_accepted():
+    assert negotiate("application/msgpack") == MSGPACK
+    assert negotiate("application/x-msgpack") == MSGPACK
+    assert negotiate("application/*;q=0, application/msgpack") == MSGPACK
+    assert negotiate("application/json;q=0.5, */*") == MSGPACK
+    assert negotiate("application/msgpack;q=0.5, application/json") == JSON
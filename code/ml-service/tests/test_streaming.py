@@ -0,0 +1,84 @@
+# tests/test_streaming.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.recommendation.indicators import BARS_PER_YEAR, compute_indicator_batch, pack_closes
+from models.recommendation.rule_based import RuleBasedRecommender
+from models.recommendation.streaming import StreamingIndicators, snapshot_indicators
+
+PROFILES = [("conservative", "long"), ("moderate", "medium"), ("aggressive", "short")]
+PER_BAR = ("ma_5", "ma_10", "ma_20", "rsi", "ema_12", "ema_26", "macd", "macd_signal")
+SUMMARIES = ("volatility", "short_term", "medium_term", "long_term")
+
+
+@pytest.mark.parametrize("window", [21, 31, 252])
+def test_snapshot_matches_batch_indicators(edge_closes, window):
+    states = {symbol: StreamingIndicators.from_closes(closes, window) for symbol, closes in edge_closes.items()}
+    streamed = snapshot_indicators(states.values())
+
+    # Per-bar indicators run over every bar seen; summaries over the last `window` bars
+    symbols, closes, lengths = pack_closes({symbol: {"close": series} for symbol, series in edge_closes.items()})
+    full = compute_indicator_batch(closes, lengths, BARS_PER_YEAR["1d"], rows=1)
+    symbols, closes, lengths = pack_closes({symbol: {"close": series[-window:]} for symbol, series in edge_closes.items()})
+    windowed = compute_indicator_batch(closes, lengths, BARS_PER_YEAR["1d"], rows=1)
+
+    assert symbols == list(states)
+    for name in PER_BAR:
+        np.testing.assert_allclose(streamed[name], full[name], rtol=1e-7, atol=1e-9, equal_nan=True, err_msg=name)
+    for name in SUMMARIES:
+        np.testing.assert_allclose(streamed[name], windowed[name], rtol=1e-7, atol=1e-9, equal_nan=True, err_msg=name)
+    np.testing.assert_array_equal(streamed["last_close"], full["last_close"])
+
+
+@pytest.mark.parametrize("risk_tolerance,time_horizon", PROFILES)
+def test_streamed_states_score_like_their_window(edge_closes, risk_tolerance, time_horizon):
+    recommender = RuleBasedRecommender()
+    window = 31
+    states = {symbol: StreamingIndicators.from_closes(closes, window) for symbol, closes in edge_closes.items()}
+    frames = {symbol: pd.DataFrame({"close": closes[-window:]}) for symbol, closes in edge_closes.items()}
+    # Only the EMAs look past the window, and scoring does not read them
+    assert (recommender._analyze_stocks_batch(states, risk_tolerance, time_horizon)
+            == recommender._analyze_stocks_batch(frames, risk_tolerance, time_horizon))
+
+
+@pytest.mark.parametrize("interval", ["1d", "1w", "60min"])
+@pytest.mark.parametrize("risk_tolerance,time_horizon", PROFILES)
+def test_every_scoring_path_annualizes_for_the_interval(make_closes, interval, risk_tolerance, time_horizon):
+    closes = {symbol: data["close"] for symbol, data in make_closes(40, num_bars=80, min_bars=80).items()}
+    recommender = RuleBasedRecommender()
+
+    frames = {symbol: pd.DataFrame({"close": series}) for symbol, series in closes.items()}
+    states = {symbol: StreamingIndicators.from_closes(series, len(series), interval) for symbol, series in closes.items()}
+    per_symbol = [recommender._analyze_stock(symbol, frame, risk_tolerance, time_horizon, interval)
+                  for symbol, frame in frames.items()]
+    per_state = [recommender._analyze_stock(symbol, state, risk_tolerance, time_horizon, interval)
+                 for symbol, state in states.items()]
+
+    assert recommender._analyze_stocks_batch(frames, risk_tolerance, time_horizon, interval) == per_symbol
+    assert recommender._analyze_stocks_batch(states, risk_tolerance, time_horizon, interval) == per_symbol
+    assert per_state == per_symbol
+
+
+def test_streaming_volatility_uses_bars_per_year(make_closes):
+    series = make_closes(1, num_bars=60, min_bars=60)["SYM0000"]["close"]
+    daily = StreamingIndicators.from_closes(series, 60, "1d").snapshot()["volatility"]
+    weekly = StreamingIndicators.from_closes(series, 60, "1w").snapshot()["volatility"]
+    assert weekly == pytest.approx(daily * np.sqrt(52 / 252))
+    assert weekly == pytest.approx(pd.Series(series).pct_change().std() * np.sqrt(52))
+
+
+def test_long_stream_volatility_does_not_drift_from_batch():
+    # A million volatile bars, then a calm stretch whose variance is tiny next to the rounding of the old sums
+    rng = np.random.default_rng(5)
+    window = 31
+    closes = 100 * np.exp(rng.normal(0, 0.5, 1_000_000))
+    closes[-2 * window:] = 100 * (1 + rng.normal(0, 1e-5, 2 * window))
+
+    state = StreamingIndicators.from_closes(closes, window)
+    _, packed, lengths = pack_closes({"SYM": {"close": closes[-window:]}})
+    batch = compute_indicator_batch(packed, lengths, BARS_PER_YEAR["1d"], rows=1)
+
+    snapshot = state.snapshot()
+    for name in SUMMARIES:
+        assert snapshot[name] == pytest.approx(batch[name][0], rel=1e-9, abs=1e-12), name